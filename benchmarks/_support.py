@@ -0,0 +1,45 @@
+"""Shared helpers for the benchmark scripts in this directory."""
+import http.client
+import importlib.util
+import socket
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def load_app_module():
+    """Import eye-timer.py (not importable by name because of the hyphen)."""
+    if 'eye_timer' not in sys.modules:
+        sys.path.insert(0, str(ROOT))
+        spec = importlib.util.spec_from_file_location('eye_timer', ROOT / 'eye-timer.py')
+        module = importlib.util.module_from_spec(spec)
+        sys.modules['eye_timer'] = module
+        spec.loader.exec_module(module)
+    return sys.modules['eye_timer']
+
+
+def free_port():
+    """A TCP port on 127.0.0.1 that nothing is listening on."""
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_until_serving(proc, port, path='/healthz'):
+    """Poll `path` until the server started as `proc` answers 200; return the open connection."""
+    while True:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+            conn.request('GET', path)
+            resp = conn.getresponse()
+            resp.read()
+            if resp.status == 200:
+                return conn
+            conn.close()
+        except OSError:
+            pass
+        if proc.poll() is not None:
+            raise RuntimeError(f'server exited with {proc.returncode}')
+        time.sleep(0.002)
@@ -0,0 +1,148 @@
+"""Write a browser harness that measures the gaps between repeated rings.
+
+"Before" repeats the ring with recursive setTimeout, as SoundEngine.play() used
+to, and reads the audio clock when each repeat actually starts. "After"
+schedules every repeat up front at t0 + i * delay, as play() does now. It
+reports the start times the audio clock will use. It also renders the same
+schedule through an OfflineAudioContext and finds the onsets in the samples.
+Click Run, then background the tab until it finishes to see throttling.
+
+Usage: python benchmarks/audio_repeat_jitter.py [--output audio_repeat_jitter.html] [--repeats N] [--delay S]
+"""
+import argparse
+import json
+from pathlib import Path
+
+from _support import load_app_module
+
+HARNESS = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="UTF-8">
+<title>Eye Timer repeat jitter</title>
+<style>
+  body { font: 14px system-ui, sans-serif; margin: 2rem; }
+  table { border-collapse: collapse; margin-top: 1rem; }
+  td, th { padding: 4px 12px; text-align: right; border-bottom: 1px solid #ddd; }
+</style>
+</head>
+<body>
+<h1>Repeat jitter</h1>
+<p>__REPEATS__ chime repeats, __DELAY__ s apart. Jitter = |gap - delay|.</p>
+<button id="run">Run</button>
+<table>
+  <thead><tr><th>method</th><th>repeats</th><th>mean jitter ms</th><th>max jitter ms</th><th>total drift ms</th></tr></thead>
+  <tbody id="stats"></tbody>
+</table>
+<script>
+const SOUND_PROFILES = __PROFILES__;
+const REPEATS = __REPEATS__, DELAY = __DELAY__;
+const notes = SOUND_PROFILES.chime.forward;
+
+const scheduleNotes = (ctx, destination, t0) => {
+    for (const [freq, wave, start, duration] of notes) {
+        const osc = ctx.createOscillator();
+        osc.type = wave;
+        osc.frequency.value = freq;
+        const envelope = ctx.createGain();
+        envelope.gain.setValueAtTime(0, t0 + start);
+        envelope.gain.linearRampToValueAtTime(1, t0 + start + 0.05);
+        envelope.gain.exponentialRampToValueAtTime(0.01, t0 + start + duration);
+        osc.connect(envelope).connect(destination);
+        osc.start(t0 + start);
+        osc.stop(t0 + start + duration);
+    }
+};
+
+const report = (method, starts) => {
+    const gaps = starts.slice(1).map((t, i) => t - starts[i]);
+    const jitter = gaps.map((gap) => Math.abs(gap - DELAY) * 1000);
+    const drift = ((starts[starts.length - 1] - starts[0]) - (starts.length - 1) * DELAY) * 1000;
+    const mean = jitter.reduce((a, b) => a + b, 0) / jitter.length;
+    document.getElementById('stats').insertAdjacentHTML('beforeend',
+        `<tr><td>${method}</td><td>${starts.length}</td><td>${mean.toFixed(2)}</td>`
+        + `<td>${Math.max(...jitter).toFixed(2)}</td><td>${drift.toFixed(2)}</td></tr>`);
+};
+
+// Before: each repeat armed by setTimeout after the previous one
+const runTimeouts = (ctx, buffer) => new Promise((resolve) => {
+    const starts = [];
+    const ring = (count) => {
+        if (count <= 0) return resolve(starts);
+        const source = ctx.createBufferSource();
+        source.buffer = buffer;
+        source.connect(ctx.destination);
+        starts.push(ctx.currentTime);
+        source.start(ctx.currentTime);
+        setTimeout(() => ring(count - 1), DELAY * 1000);
+    };
+    ring(REPEATS);
+});
+
+// After: every repeat scheduled up front on the audio clock
+const runScheduled = (ctx, buffer) => {
+    const t0 = ctx.currentTime;
+    const starts = [];
+    for (let i = 0; i < REPEATS; i++) {
+        const source = ctx.createBufferSource();
+        source.buffer = buffer;
+        source.connect(ctx.destination);
+        source.start(t0 + i * DELAY);
+        starts.push(t0 + i * DELAY);
+    }
+    return new Promise((resolve) => setTimeout(() => resolve(starts), REPEATS * DELAY * 1000));
+};
+
+// Render the up-front schedule offline and find each ring's first loud sample
+const measureScheduledOnsets = async (sampleRate, buffer) => {
+    const offline = new OfflineAudioContext(1, Math.ceil((REPEATS * DELAY + 1) * sampleRate), sampleRate);
+    for (let i = 0; i < REPEATS; i++) {
+        const source = offline.createBufferSource();
+        source.buffer = buffer;
+        source.connect(offline.destination);
+        source.start(i * DELAY);
+    }
+    const samples = (await offline.startRendering()).getChannelData(0);
+    const onsets = [];
+    for (let i = 0; i < samples.length; i++) {
+        if (Math.abs(samples[i]) > 0.01 && (!onsets.length || i / sampleRate - onsets[onsets.length - 1] > DELAY / 2)) {
+            onsets.push(i / sampleRate);
+        }
+    }
+    return onsets;
+};
+
+document.getElementById('run').addEventListener('click', async () => {
+    const ctx = new AudioContext();
+    const offline = new OfflineAudioContext(1, Math.ceil(1.0 * ctx.sampleRate), ctx.sampleRate);
+    scheduleNotes(offline, offline.destination, 0);
+    const buffer = await offline.startRendering();
+
+    report('setTimeout (before)', await runTimeouts(ctx, buffer));
+    report('audio clock (after)', await runScheduled(ctx, buffer));
+    report('audio clock, rendered onsets', await measureScheduledOnsets(ctx.sampleRate, buffer));
+    ctx.close();
+});
+</script>
+</body>
+</html>
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--output', default='audio_repeat_jitter.html')
+    parser.add_argument('--repeats', type=int, default=10)
+    parser.add_argument('--delay', type=float, default=1.0)
+    args = parser.parse_args()
+
+    module = load_app_module()
+    page = (HARNESS.replace('__PROFILES__', json.dumps(module.SOUND_PROFILES))
+            .replace('__REPEATS__', str(args.repeats))
+            .replace('__DELAY__', str(args.delay)))
+    Path(args.output).write_text(page)
+    print(f'Wrote {args.output}; open it in a browser and click Run')
+
+
+if __name__ == '__main__':
+    main()
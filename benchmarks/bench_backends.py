@@ -0,0 +1,74 @@
+"""Cold-start time and resident memory of each serving backend.
+
+Starts the app as a real process per backend, polls /healthz until it answers
+(time to first response), serves --requests page loads over one keep-alive
+connection, then reads resident memory from /proc (Linux only). For gunicorn
+the RSS is the master plus its workers. The stdlib backend is measured with its
+export already built, as a kiosk runs after the first boot.
+
+Usage: python benchmarks/bench_backends.py [--runs N] [--requests N]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from _support import ROOT, free_port, wait_until_serving
+
+BACKENDS = [
+    ('flask (dev server)', {'BACKEND': 'flask', 'SERVER_MODE': 'dev'}),
+    ('flask (gunicorn, 1 worker)', {'BACKEND': 'flask', 'SERVER_MODE': 'production', 'WORKERS': '1'}),
+    ('stdlib', {'BACKEND': 'stdlib'}),
+]
+
+
+def rss_kib(pid):
+    """Resident memory of `pid` and its child processes, in KiB."""
+    total = 0
+    with open(f'/proc/{pid}/status') as f:
+        total += next(int(line.split()[1]) for line in f if line.startswith('VmRSS:'))
+    with open(f'/proc/{pid}/task/{pid}/children') as f:
+        return total + sum(rss_kib(int(child)) for child in f.read().split())
+
+
+def measure(env, requests):
+    port = free_port()
+    env = {**os.environ, **env, 'HOST': '127.0.0.1', 'PORT': str(port), 'DEBUG': 'False'}
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, str(ROOT / 'eye-timer.py')], env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        conn = wait_until_serving(proc, port)
+        startup = time.perf_counter() - start
+        for _ in range(requests):
+            conn.request('GET', '/', headers={'Accept-Encoding': 'gzip'})
+            conn.getresponse().read()
+        conn.close()
+        return startup, rss_kib(proc.pid)
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args()
+
+    # Build the stdlib export up front so its one-off cost isn't counted
+    subprocess.run([sys.executable, str(ROOT / 'eye-timer.py'), '--export', str(ROOT / 'build')],
+                   check=True, stdout=subprocess.DEVNULL)
+
+    print(f"{'backend':<28} {'startup ms (median)':>20} {'RSS MiB (median)':>17}")
+    for label, env in BACKENDS:
+        results = [measure(env, args.requests) for _ in range(args.runs)]
+        startup = statistics.median(r[0] for r in results) * 1000
+        rss = statistics.median(r[1] for r in results) / 1024
+        print(f'{label:<28} {startup:>20.0f} {rss:>17.1f}')
+
+
+if __name__ == '__main__':
+    main()
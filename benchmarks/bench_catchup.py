@@ -0,0 +1,65 @@
+"""Cost of catching the timer up after a sleep: phase-by-phase walk vs closed form.
+
+Runs the page's real TIMER_ENGINE_JS under node against a simulated clock that
+jumps ahead by an hour up to a month. The walk is what tick() used to do: one
+iteration (and, in the page, one sound, notification and DOM rewrite) per
+missed phase.
+
+Usage: python benchmarks/bench_catchup.py [--calls N]
+"""
+import argparse
+import shutil
+import subprocess
+import sys
+
+from _support import load_app_module
+
+MINUTE = 60 * 1000
+JUMPS = [('1 hour', 60 * MINUTE), ('1 day', 24 * 60 * MINUTE), ('7 days', 7 * 24 * 60 * MINUTE),
+         ('30 days', 30 * 24 * 60 * MINUTE)]
+
+HARNESS = """
+function stepwise(isFocus, endTimeMs, nowMs, focusMs, breakMs) {
+    let transitions = 0;
+    while (nowMs >= endTimeMs) {
+        isFocus = !isFocus;
+        endTimeMs += isFocus ? focusMs : breakMs;
+        transitions++;
+    }
+    return { isFocus, endTimeMs, transitions };
+}
+function time(fn, jumpMs, calls) {
+    let sink = 0;
+    const start = process.hrtime.bigint();
+    for (let i = 0; i < calls; i++) sink += fn(true, 0, jumpMs + i, 20 * 60000, 20000).transitions;
+    const ns = Number(process.hrtime.bigint() - start) / calls;
+    return [ns, sink / calls];
+}
+// Warm up both functions so the JIT has compiled them before timing
+time(stepwise, JUMPS[0][1], CALLS);
+time(catchUpPhase, JUMPS[0][1], CALLS);
+for (const [label, jumpMs] of JUMPS) {
+    const [walkNs, phases] = time(stepwise, jumpMs, CALLS);
+    const [closedNs] = time(catchUpPhase, jumpMs, CALLS);
+    console.log(`${label.padEnd(10)} ${phases.toFixed(0).padStart(8)} ${walkNs.toFixed(0).padStart(12)} ${closedNs.toFixed(0).padStart(12)} ${(walkNs / closedNs).toFixed(0).padStart(8)}x`);
+}
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--calls', type=int, default=20000)
+    args = parser.parse_args()
+
+    node = shutil.which('node')
+    if node is None:
+        sys.exit('node is required to run the page JavaScript')
+    jumps = '[' + ','.join(f'["{label}", {ms}]' for label, ms in JUMPS) + ']'
+    script = (load_app_module().TIMER_ENGINE_JS
+              + f'const JUMPS = {jumps}; const CALLS = {args.calls};' + HARNESS)
+    print(f"{'jump':<10} {'phases':>8} {'walk ns':>12} {'closed ns':>12} {'speedup':>9}")
+    subprocess.run([node, '-e', script], check=True)
+
+
+if __name__ == '__main__':
+    main()
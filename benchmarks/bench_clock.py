@@ -0,0 +1,129 @@
+"""Cost of the /api/time clock probe, and how well the page's offset estimate holds up under load.
+
+1. Server-side cost: the app's WSGI callable is called directly, without
+   sockets, for `/api/time` (answered before Flask routing) and for `/healthz`
+   (the cheapest Flask view). This is the CPU each request costs the app,
+   excluding gunicorn's HTTP parsing.
+2. Estimate accuracy: the app is started as a real process. A client whose
+   clock is off by --skew-ms runs --sessions probe sessions of 5 sequential
+   probes each, like syncClock() in the page. --load threads keep the server
+   busy with page requests, which adds queueing jitter to the round trips.
+   The error of each session's estimate is reported for three ways of reading
+   the samples: the first probe alone, the mean of all five, and the
+   shortest-round-trip filter the page uses (estimateClockOffset()).
+
+Usage: python benchmarks/bench_clock.py [--sessions N] [--load N] [--skew-ms MS] [--server-mode production|dev]
+"""
+import argparse
+import http.client
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+from _support import ROOT, free_port, load_app_module, wait_until_serving
+
+PROBES = 5
+
+
+def wsgi_cost(app, path, n):
+    """Mean seconds per call of the app's WSGI callable for GET `path`."""
+    from werkzeug.test import EnvironBuilder
+
+    environ = EnvironBuilder(path=path).get_environ()
+    start_response = lambda status, headers, exc_info=None: None  # noqa: E731
+    start = time.perf_counter()
+    for _ in range(n):
+        body = app(dict(environ), start_response)
+        b''.join(body)
+        if hasattr(body, 'close'):
+            body.close()
+    return (time.perf_counter() - start) / n
+
+
+def probe(conn, skew_ms):
+    """One NTP-style sample (t0, t1, t2, t3) from a client clock that is off by `skew_ms`."""
+    t0 = time.time() * 1000 + skew_ms
+    sent = time.perf_counter()
+    conn.request('GET', '/api/time')
+    resp = conn.getresponse()
+    server = json.loads(resp.read())
+    return t0, server['t1'], server['t2'], t0 + (time.perf_counter() - sent) * 1000
+
+
+def offset(sample):
+    t0, t1, t2, t3 = sample
+    return ((t1 - t0) + (t2 - t3)) / 2
+
+
+def delay(sample):
+    t0, t1, t2, t3 = sample
+    return (t3 - t0) - (t2 - t1)
+
+
+def background_load(port, stop):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    while not stop.is_set():
+        conn.request('GET', '/', headers={'Accept-Encoding': 'gzip, br'})
+        conn.getresponse().read()
+    conn.close()
+
+
+def summarize(label, errors):
+    errors = sorted(abs(e) for e in errors)
+    cuts = statistics.quantiles(errors, n=100, method='inclusive')
+    print(f'{label:<24} {cuts[49]:8.2f} {cuts[94]:8.2f} {errors[-1]:8.2f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=200)
+    parser.add_argument('--load', type=int, default=4, help='threads requesting / meanwhile')
+    parser.add_argument('--skew-ms', type=float, default=-3000, help="the client's clock minus the server's")
+    parser.add_argument('--server-mode', default='production', choices=('production', 'dev'))
+    parser.add_argument('--calls', type=int, default=20000, help='WSGI calls per route for the cost measurement')
+    args = parser.parse_args()
+
+    app = load_app_module().app
+    print('server-side cost per request (WSGI call, no sockets)')
+    for path in ('/api/time', '/healthz'):
+        cost = wsgi_cost(app, path, args.calls)
+        print(f'  {path:<12} {cost * 1e6:7.1f} us  ({1 / cost:,.0f} req/s per core)')
+
+    port = free_port()
+    env = {**os.environ, 'PORT': str(port), 'HOST': '127.0.0.1', 'SERVER_MODE': args.server_mode, 'WORKERS': '1'}
+    proc = subprocess.Popen([sys.executable, str(ROOT / 'eye-timer.py')], cwd=ROOT, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    stop = threading.Event()
+    try:
+        conn = wait_until_serving(proc, port)
+        loaders = [threading.Thread(target=background_load, args=(port, stop)) for _ in range(args.load)]
+        for thread in loaders:
+            thread.start()
+        first, mean, filtered, delays = [], [], [], []
+        for _ in range(args.sessions):
+            samples = [probe(conn, args.skew_ms) for _ in range(PROBES)]
+            # The true offset is -skew: the estimate's error is how far it lands from that
+            first.append(offset(samples[0]) + args.skew_ms)
+            mean.append(statistics.fmean(offset(s) for s in samples) + args.skew_ms)
+            filtered.append(offset(min(samples, key=delay)) + args.skew_ms)
+            delays += [delay(s) for s in samples]
+        conn.close()
+    finally:
+        stop.set()
+        proc.terminate()
+        proc.wait()
+
+    print(f'\n{args.sessions} sessions of {PROBES} probes, {args.load} loading threads, '
+          f'round trip p50 {statistics.median(delays):.2f} ms, max {max(delays):.2f} ms')
+    print(f'{"offset error (ms)":<24} {"p50":>8} {"p95":>8} {"max":>8}')
+    summarize('first probe only', first)
+    summarize('mean of 5', mean)
+    summarize('shortest round trip', filtered)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,221 @@
+"""Throughput and p50/p95/p99 latency of the app's routes under concurrent load, with a regression gate.
+
+Two ways to drive the real app:
+- `--mode inprocess` (default): one Flask test client per thread, so the numbers
+  are the WSGI stack alone, without sockets.
+- `--mode server`: a local server started as a real process (SERVER_MODE and
+  WORKERS as given; pass --url to target one that is already running). Each
+  thread holds its own keep-alive connection.
+
+Each route gets --requests requests from --concurrency threads, after a short
+warm-up. Latency is measured per request on the client.
+
+Save a run with --save-baseline FILE, then run again with --baseline FILE to
+compare. The script exits with status 1 when a route's throughput drops, or
+its p50/p95/p99 rises, by more than --tolerance. Latency also has to rise by
+more than --slack-ms, so sub-millisecond jitter is not reported as a regression.
+A baseline only compares against runs with the same mode and concurrency.
+
+Usage: python benchmarks/bench_http.py [--mode inprocess|server] [--concurrency N] [--requests N]
+       [--server-mode production|dev] [--workers N] [--url URL]
+       [--save-baseline FILE] [--baseline FILE] [--tolerance 0.25] [--slack-ms 0.5]
+"""
+import argparse
+import functools
+import http.client
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from _support import ROOT, free_port, load_app_module, wait_until_serving
+
+BROWSER_ENCODINGS = {'Accept-Encoding': 'gzip, deflate, br'}
+METRICS = ('rps', 'p50_ms', 'p95_ms', 'p99_ms')
+
+
+def routes(fetch):
+    """(label, path, headers) per benchmarked route; `fetch(path, headers)` returns (status, headers, body)."""
+    _, headers, body = fetch('/', {'Accept-Encoding': 'identity'})
+    cases = [
+        ('/', '/', BROWSER_ENCODINGS),
+        ('/ (If-None-Match)', '/', {**BROWSER_ENCODINGS, 'If-None-Match': headers['ETag']}),
+        ('/favicon.png', '/favicon.png', {}),
+        ('/healthz', '/healthz', {}),
+        ('/api/time', '/api/time', {}),
+    ]
+    bundle = re.search(rb'/assets/app\.[0-9a-f]{12}\.js', body)
+    if bundle:
+        cases.append(('/assets/app.js', bundle.group().decode(), BROWSER_ENCODINGS))
+    return cases
+
+
+class InProcessClient:
+    """Requests through a Flask test client of the imported app."""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def fetch(self, path, headers):
+        resp = self.client.get(path, headers=headers)
+        result = resp.status_code, resp.headers, resp.get_data()
+        resp.close()
+        return result
+
+    def close(self):
+        pass
+
+
+class SocketClient:
+    """Requests over one keep-alive HTTP/1.1 connection."""
+
+    def __init__(self, host, port):
+        self.conn = http.client.HTTPConnection(host, port, timeout=10)
+
+    def fetch(self, path, headers):
+        self.conn.request('GET', path, headers=headers)
+        resp = self.conn.getresponse()
+        return resp.status, resp.headers, resp.read()
+
+    def close(self):
+        self.conn.close()
+
+
+def load(make_client, path, headers, requests, concurrency):
+    """Send `requests` GETs from `concurrency` threads; return (wall seconds, per-request seconds)."""
+    latencies, errors = [], []
+    start_line = threading.Barrier(concurrency + 1)
+
+    def worker(count):
+        client = make_client()
+        client.fetch(path, headers)  # warm-up: connection setup, first-call costs
+        own = []
+        start_line.wait()
+        for _ in range(count):
+            sent = time.perf_counter()
+            status, _, _ = client.fetch(path, headers)
+            own.append(time.perf_counter() - sent)
+            if status >= 400:
+                errors.append(status)
+        client.close()
+        latencies.extend(own)
+
+    counts = [requests // concurrency + (i < requests % concurrency) for i in range(concurrency)]
+    threads = [threading.Thread(target=worker, args=(count,)) for count in counts]
+    for thread in threads:
+        thread.start()
+    start_line.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+    if errors:
+        raise RuntimeError(f'{path}: {len(errors)} failed requests (e.g. HTTP {errors[0]})')
+    return wall, latencies
+
+
+def summarize(wall, latencies):
+    cuts = statistics.quantiles(latencies, n=100, method='inclusive')
+    return {'rps': len(latencies) / wall, 'p50_ms': cuts[49] * 1000, 'p95_ms': cuts[94] * 1000,
+            'p99_ms': cuts[98] * 1000}
+
+
+def regressions(results, baseline, tolerance, slack_ms):
+    """Human-readable regressions of `results` against `baseline` (both {route: metrics})."""
+    found = []
+    for route, metrics in results.items():
+        base = baseline.get(route)
+        if base is None:
+            continue
+        if metrics['rps'] < base['rps'] * (1 - tolerance):
+            found.append(f"{route}: throughput {metrics['rps']:.0f} req/s vs {base['rps']:.0f}")
+        for metric in METRICS[1:]:
+            if metrics[metric] > base[metric] * (1 + tolerance) + slack_ms:
+                found.append(f'{route}: {metric} {metrics[metric]:.2f} vs {base[metric]:.2f}')
+    return found
+
+
+def start_server(server_mode, workers):
+    port = free_port()
+    env = {**os.environ, 'HOST': '127.0.0.1', 'PORT': str(port), 'DEBUG': 'False',
+           'BACKEND': 'flask', 'SERVER_MODE': server_mode, 'WORKERS': str(workers)}
+    proc = subprocess.Popen([sys.executable, str(ROOT / 'eye-timer.py')], env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    wait_until_serving(proc, port).close()
+    return proc, port
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--mode', default='inprocess', choices=('inprocess', 'server'))
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=2000, help='per route')
+    parser.add_argument('--server-mode', default='production', choices=('production', 'dev'))
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--url', help='benchmark a running server instead of starting one (implies --mode server)')
+    parser.add_argument('--save-baseline', metavar='FILE')
+    parser.add_argument('--baseline', metavar='FILE')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed relative regression (0.25 = 25%%)')
+    parser.add_argument('--slack-ms', type=float, default=0.5, help='latency increase always tolerated')
+    args = parser.parse_args()
+    if args.url:
+        args.mode = 'server'
+
+    baseline = json.loads(Path(args.baseline).read_text()) if args.baseline else None
+    if baseline and (baseline['mode'], baseline['concurrency']) != (args.mode, args.concurrency):
+        parser.error(f"baseline was recorded with --mode {baseline['mode']} --concurrency {baseline['concurrency']}")
+
+    proc = None
+    if args.mode == 'inprocess':
+        app = load_app_module().app
+        make_client = functools.partial(InProcessClient, app)
+    else:
+        if args.url:
+            url = urlsplit(args.url)
+            host, port = url.hostname, url.port or 80
+        else:
+            proc, port = start_server(args.server_mode, args.workers)
+            host = '127.0.0.1'
+        make_client = functools.partial(SocketClient, host, port)
+
+    results = {}
+    try:
+        probe = make_client()
+        cases = routes(probe.fetch)
+        probe.close()
+        print(f'mode={args.mode} concurrency={args.concurrency} requests/route={args.requests}')
+        print(f"{'route':<20} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'vs baseline':>14}")
+        for label, path, headers in cases:
+            results[label] = summarize(*load(make_client, path, headers, args.requests, args.concurrency))
+            m = results[label]
+            change = ''
+            if baseline and label in baseline['routes']:
+                change = f"{100 * (m['rps'] / baseline['routes'][label]['rps'] - 1):+.1f}% req/s"
+            print(f"{label:<20} {m['rps']:>9.0f} {m['p50_ms']:>8.2f} {m['p95_ms']:>8.2f} {m['p99_ms']:>8.2f} {change:>14}")
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+
+    if args.save_baseline:
+        Path(args.save_baseline).write_text(json.dumps(
+            {'mode': args.mode, 'concurrency': args.concurrency, 'routes': results}, indent=1) + '\n')
+        print(f'Saved baseline to {args.save_baseline}')
+    if baseline:
+        found = regressions(results, baseline['routes'], args.tolerance, args.slack_ms)
+        for line in found:
+            print(f'REGRESSION {line}')
+        if found:
+            return 1
+        print(f'No regressions beyond {args.tolerance:.0%} of the baseline')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,63 @@
+"""Requests/second of the prebuilt index response versus per-request rendering.
+
+Drives the real Flask app through its test client, so the numbers include the
+full WSGI stack but no socket overhead.
+
+Usage: python benchmarks/bench_index.py [--requests N]
+"""
+import argparse
+import time
+
+from flask import render_template_string
+
+from _support import load_app_module
+
+
+def measure(client, path, headers, requests):
+    status = client.get(path, headers=headers).status_code  # warm-up
+    assert status in (200, 304), f'{path} answered {status}'
+    start = time.perf_counter()
+    for _ in range(requests):
+        client.get(path, headers=headers)
+    return requests / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    module = load_app_module()
+    app = module.app
+
+    # The pre-change view, registered side by side for comparison: Jinja on every
+    # request, with the same context the prebuilt page is rendered from
+    context = module.template_context()
+
+    @app.route('/__legacy_index')
+    def legacy_index():
+        return render_template_string(module.HTML_TEMPLATE, **context)
+
+    client = app.test_client()
+    etag = client.get('/', headers={'Accept-Encoding': 'gzip'}).headers['ETag']
+    cases = [
+        ('legacy render_template_string', '/__legacy_index', {}),
+        ('prebuilt, identity', '/', {'Accept-Encoding': 'identity'}),
+        ('prebuilt, gzip', '/', {'Accept-Encoding': 'gzip'}),
+        ('prebuilt, br', '/', {'Accept-Encoding': 'br'}),
+        ('prebuilt, If-None-Match (304)', '/', {'Accept-Encoding': 'gzip', 'If-None-Match': etag}),
+    ]
+
+    baseline = None
+    print(f"{'case':<32} {'req/s':>10} {'speedup':>8}")
+    for label, path, headers in cases:
+        if label.endswith('br') and 'br' not in module.INDEX_PAGE.variants:
+            print(f'{label:<32} {"skipped (brotli not installed)":>19}')
+            continue
+        rate = measure(client, path, headers, args.requests)
+        baseline = baseline or rate
+        print(f'{label:<32} {rate:>10.0f} {rate / baseline:>7.2f}x')
+
+
+if __name__ == '__main__':
+    main()
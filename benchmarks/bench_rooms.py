@@ -0,0 +1,178 @@
+"""Fan-out load test for shared rooms: thousands of SSE viewers, one controller.
+
+Starts rooms_server.py as a real process (or targets --url). A local asyncio
+fan-out client opens --viewers event streams into one room. The controller
+then posts --actions start/pause actions, one at a time. For each action the
+benchmark records when every viewer received it.
+
+It reports:
+- how long the viewers took to connect
+- delivery latency from POST to receipt, over every (viewer, action) pair
+- fan-out time: POST until the last viewer has the event
+- the server's resident memory per open stream (Linux only)
+
+The client shares one core with its own parsing, so at high viewer counts the
+latencies are an upper bound on the server's.
+
+Usage: python benchmarks/bench_rooms.py [--viewers N] [--actions N] [--url http://host:5001]
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from urllib.parse import urlsplit
+
+from _support import ROOT, free_port, wait_until_serving
+
+sys.path.insert(0, str(ROOT))
+from rooms_server import raise_open_file_limit  # noqa: E402
+
+
+def rss_kib(pid):
+    with open(f'/proc/{pid}/status') as f:
+        return next(int(line.split()[1]) for line in f if line.startswith('VmRSS:'))
+
+
+async def request(host, port, method, path, body=None, headers=None):
+    reader, writer = await asyncio.open_connection(host, port)
+    data = json.dumps(body).encode() if body is not None else b''
+    head = [f'{method} {path} HTTP/1.1', f'Host: {host}', 'Connection: close', f'Content-Length: {len(data)}',
+            *(f'{name}: {value}' for name, value in (headers or {}).items())]
+    writer.write(('\r\n'.join(head) + '\r\n\r\n').encode() + data)
+    raw = await reader.read()
+    writer.close()
+    return json.loads(raw.partition(b'\r\n\r\n')[2])
+
+
+class Tally:
+    """How many viewers have each event; `complete` is set once all of them have the latest."""
+
+    def __init__(self, viewers):
+        self.viewers = viewers
+        self.counts = {}
+        self.complete = asyncio.Event()
+
+    def add(self, seq):
+        self.counts[seq] = self.counts.get(seq, 0) + 1
+        if self.counts[seq] == self.viewers:
+            self.complete.set()
+
+
+class Viewer:
+    """One event stream, noting when each event id arrived."""
+
+    def __init__(self, tally):
+        self.received = {}
+        self.tally = tally
+
+    async def run(self, host, port, room, connected):
+        reader, writer = await asyncio.open_connection(host, port)
+        writer.write(f'GET /rooms/{room}/events HTTP/1.1\r\nHost: {host}\r\n\r\n'.encode())
+        await reader.readuntil(b'\r\n\r\n')
+        connected()
+        try:
+            while True:
+                block = await reader.readuntil(b'\n\n')
+                if block.startswith(b'id: '):
+                    seq = int(block[4:block.index(b'\n')])
+                    self.received[seq] = time.perf_counter()
+                    self.tally.add(seq)
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            writer.close()
+
+
+async def run(args, host, port):
+    created = await request(host, port, 'POST', '/rooms')
+    room, auth = created['room'], {'Authorization': f"Bearer {created['token']}", 'Content-Type': 'application/json'}
+
+    tally = Tally(args.viewers)
+    viewers = [Viewer(tally) for _ in range(args.viewers)]
+    all_connected = asyncio.Event()
+    count = 0
+
+    def connected():
+        nonlocal count
+        count += 1
+        if count == args.viewers:
+            all_connected.set()
+
+    start = time.perf_counter()
+    tasks = []
+    for i in range(0, args.viewers, args.connect_batch):
+        tasks += [asyncio.ensure_future(v.run(host, port, room, connected)) for v in viewers[i:i + args.connect_batch]]
+        await asyncio.sleep(0)  # let the batch's handshakes start before opening more
+    await asyncio.wait_for(all_connected.wait(), 120)
+    connect_s = time.perf_counter() - start
+    await asyncio.sleep(0.5)  # let the server finish registering every stream
+
+    latencies, fanouts = [], []
+    for seq in range(1, args.actions + 1):
+        state = {'action': 'start' if seq % 2 else 'pause', 'timer': {'isFocus': True, 'isRunning': bool(seq % 2),
+                 'endTimeMs': int(time.time() * 1000) + 1200000}, 'focusTime': 1200, 'breakTime': 20}
+        tally.complete.clear()
+        sent = time.perf_counter()
+        await request(host, port, 'POST', f'/rooms/{room}/actions', state, auth)
+        try:
+            await asyncio.wait_for(tally.complete.wait(), 30)
+        except TimeoutError:
+            pass
+        arrivals = [v.received[seq] - sent for v in viewers if seq in v.received]
+        if len(arrivals) < len(viewers):
+            print(f'action {seq}: only {len(arrivals)} of {len(viewers)} viewers received it within 30 s')
+        latencies += arrivals
+        fanouts.append(max(arrivals))
+        await asyncio.sleep(args.interval)
+
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return connect_s, latencies, fanouts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--viewers', type=int, default=2000)
+    parser.add_argument('--actions', type=int, default=20)
+    parser.add_argument('--interval', type=float, default=0.05, help='seconds between actions')
+    parser.add_argument('--connect-batch', type=int, default=200)
+    parser.add_argument('--url', help='benchmark a running rooms server instead of starting one')
+    args = parser.parse_args()
+    raise_open_file_limit()
+
+    proc = None
+    if args.url:
+        url = urlsplit(args.url)
+        host, port = url.hostname, url.port or 80
+    else:
+        host, port = '127.0.0.1', free_port()
+        env = {**os.environ, 'HOST': host, 'ROOMS_PORT': str(port)}
+        proc = subprocess.Popen([sys.executable, str(ROOT / 'rooms_server.py')], env=env, stdout=subprocess.DEVNULL)
+        wait_until_serving(proc, port).close()
+    try:
+        idle_rss = rss_kib(proc.pid) if proc else None
+        connect_s, latencies, fanouts = asyncio.run(run(args, host, port))
+        loaded_rss = rss_kib(proc.pid) if proc else None
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+
+    cuts = statistics.quantiles(latencies, n=100, method='inclusive')
+    print(f'{args.viewers} viewers, {args.actions} actions')
+    print(f'connect all viewers        {connect_s * 1000:8.0f} ms')
+    print(f'delivery latency p50       {cuts[49] * 1000:8.1f} ms')
+    print(f'delivery latency p95       {cuts[94] * 1000:8.1f} ms')
+    print(f'delivery latency p99       {cuts[98] * 1000:8.1f} ms')
+    print(f'fan-out to all (median)    {statistics.median(fanouts) * 1000:8.1f} ms')
+    print(f'fan-out to all (max)       {max(fanouts) * 1000:8.1f} ms')
+    if proc is not None:
+        print(f'server RSS idle / loaded   {idle_rss / 1024:8.1f} / {loaded_rss / 1024:.1f} MiB '
+              f'({(loaded_rss - idle_rss) / args.viewers:.1f} KiB per stream)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""Memory, operation cost and firing lateness of the server-side phase scheduler at 100k timers.
+
+1. Memory: tracemalloc's count of what --timers scheduled timers add to an
+   empty PhaseScheduler. That covers the heap entries, the Timer objects and
+   the key index, but not the key strings, which the synced state holds anyway.
+2. Operation cost, at that size: schedule a new key, reschedule one (a user's
+   pause or skip, which leaves a stale heap entry), cancel one, and fire a due
+   boundary (pop_due, which also schedules the next phase).
+3. Lateness: the scheduler's thread runs --timers timers whose first boundaries
+   are spread over --window seconds, with short phases, so most of them fire
+   several times. Meanwhile a churn thread reschedules --churn random keys per
+   second. Lateness is measured when on_phase is called, compared with the
+   boundary's due time.
+
+Usage: python benchmarks/bench_scheduler.py [--timers N] [--window S] [--focus-s S] [--break-s S] [--churn N]
+"""
+import argparse
+import random
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+
+from _support import ROOT
+
+sys.path.insert(0, str(ROOT))
+from phase_scheduler import PhaseScheduler  # noqa: E402
+
+
+def keys(n):
+    return [f'{i:022d}' for i in range(n)]
+
+
+def measure_memory(n):
+    names = keys(n)
+    scheduler = PhaseScheduler(on_phase=None)
+    end_ms = scheduler.now_ms() + 3600 * 1000
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for i, key in enumerate(names):
+        scheduler.schedule(key, True, end_ms + i, 20 * 60 * 1000, 20 * 1000)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / n
+
+
+def per_op(fn, n):
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def measure_operations(n):
+    names = keys(n)
+    clock_ms = [0]
+    scheduler = PhaseScheduler(on_phase=None, clock=lambda: clock_ms[0] / 1000)
+    shuffled = random.sample(range(n), n)
+    results = {}
+    results['schedule'] = per_op(lambda: [scheduler.schedule(names[i], True, 1000 + i, 20 * 60 * 1000, 20 * 1000)
+                                          for i in shuffled], n)
+    results['reschedule'] = per_op(lambda: [scheduler.schedule(names[i], True, 1000 + i + n, 20 * 60 * 1000, 20 * 1000)
+                                            for i in shuffled], n)
+    results['fire (pop_due)'] = per_op(lambda: scheduler.pop_due(1000 + 2 * n), n)
+    results['cancel'] = per_op(lambda: [scheduler.cancel(names[i]) for i in shuffled], n)
+    return results
+
+
+def measure_lateness(args):
+    names = keys(args.timers)
+    lateness = []
+    scheduler = PhaseScheduler(lambda key, is_focus, due_ms, fired_ms: lateness.append(time.time() * 1000 - due_ms))
+    start_ms = scheduler.now_ms() + 1000
+    for key in names:
+        scheduler.schedule(key, True, start_ms + random.random() * args.window * 1000,
+                           args.focus_s * 1000, args.break_s * 1000)
+    stop = threading.Event()
+
+    def churn():
+        # Users pausing and restarting: each reschedule leaves a stale heap entry behind
+        while not stop.wait(1 / args.churn):
+            key = random.choice(names)
+            scheduler.schedule(key, True, scheduler.now_ms() + args.focus_s * 1000, args.focus_s * 1000, args.break_s * 1000)
+
+    scheduler.start()
+    churner = threading.Thread(target=churn)
+    if args.churn:
+        churner.start()
+    time.sleep(1 + args.window + args.focus_s + args.break_s)
+    stop.set()
+    scheduler.stop()
+    if args.churn:
+        churner.join()
+    return lateness
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--timers', type=int, default=100_000)
+    parser.add_argument('--window', type=float, default=10, help='seconds over which first boundaries are spread')
+    parser.add_argument('--focus-s', type=float, default=6)
+    parser.add_argument('--break-s', type=float, default=3)
+    parser.add_argument('--churn', type=int, default=1000, help='reschedules per second while firing')
+    args = parser.parse_args()
+
+    print(f'{args.timers} timers')
+    print(f'memory per timer           {measure_memory(args.timers):8.0f} B')
+    for name, us in measure_operations(args.timers).items():
+        print(f'{name:<26} {us:8.2f} us')
+
+    lateness = measure_lateness(args)
+    cuts = statistics.quantiles(lateness, n=100, method='inclusive')
+    print(f'\n{len(lateness)} boundaries fired over {args.window + args.focus_s + args.break_s:.0f} s '
+          f'({args.churn} reschedules/s meanwhile)')
+    print(f'lateness p50 / p99 / max   {cuts[49]:.2f} / {cuts[98]:.2f} / {max(lateness):.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
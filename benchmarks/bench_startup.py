@@ -0,0 +1,84 @@
+"""Time from process exec to the first successful `GET /`, per way of launching the app.
+
+Each launcher is started --runs times after one discarded warm-up run. The
+numbers are exec-to-first-200 on `/`, including interpreter start, imports,
+the page build and the server's first accept. Runs use a fixed environment
+(PYTHONHASHSEED=0, DEBUG off, the Docker image's SERVER_MODE by default) so
+they are comparable between machines and commits:
+- `python eye-timer.py`: the script is recompiled on every start
+- `python serve.py`: imports the app from bytecode precompiled by this script
+- `uv run eye-timer.py` (with --uv): the image's old CMD, which has uv check the
+  environment first
+Each launcher is timed rendering the page at startup and starting from a current
+`--export` in BUILD_DIR, as the Docker image does (the stdlib backend always
+needs the export).
+
+Usage: python benchmarks/bench_startup.py [--runs N] [--server-mode production|dev] [--backend flask|stdlib] [--uv]
+"""
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from _support import ROOT, free_port, wait_until_serving
+
+
+def time_to_first_page(command, env):
+    port = free_port()
+    env = {**env, 'PORT': str(port)}
+    start = time.perf_counter()
+    proc = subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_until_serving(proc, port, '/').close()
+        return time.perf_counter() - start
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--server-mode', default='production', choices=('production', 'dev'))
+    parser.add_argument('--backend', default='flask', choices=('flask', 'stdlib'))
+    parser.add_argument('--uv', action='store_true', help='also time `uv run eye-timer.py`')
+    args = parser.parse_args()
+
+    env = {**os.environ, 'HOST': '127.0.0.1', 'DEBUG': 'False', 'PYTHONHASHSEED': '0',
+           'SERVER_MODE': args.server_mode, 'WORKERS': '1', 'BACKEND': args.backend}
+    # The bytecode serve.py loads (the Docker image compiles it at build time)
+    subprocess.run([sys.executable, '-m', 'compileall', '-q', '-l', str(ROOT)], check=True)
+    tmp = tempfile.TemporaryDirectory()
+    exported = os.path.join(tmp.name, 'build')
+    subprocess.run([sys.executable, str(ROOT / 'eye-timer.py'), '--export', exported],
+                   check=True, stdout=subprocess.DEVNULL, env=env)
+    builds = [('from export', exported)]
+    if args.backend == 'flask':
+        builds.insert(0, ('rendered', os.path.join(tmp.name, 'missing')))
+
+    launchers = [
+        ('python eye-timer.py', [sys.executable, 'eye-timer.py']),
+        ('python serve.py (bytecode)', [sys.executable, 'serve.py']),
+    ]
+    if args.uv:
+        if shutil.which('uv') is None:
+            parser.error('uv is not installed')
+        launchers.insert(0, ('uv run eye-timer.py', ['uv', 'run', 'eye-timer.py']))
+
+    print(f'backend={args.backend} server_mode={args.server_mode} runs={args.runs}')
+    print(f"{'launcher':<30} {'page':<12} {'min ms':>8} {'median ms':>10} {'max ms':>8}")
+    for build, build_dir in builds:
+        for label, command in launchers:
+            run_env = {**env, 'BUILD_DIR': build_dir}
+            time_to_first_page(command, run_env)  # warm-up: OS file cache, first-run compiles
+            samples = [time_to_first_page(command, run_env) * 1000 for _ in range(args.runs)]
+            print(f'{label:<30} {build:<12} {min(samples):>8.0f} {statistics.median(samples):>10.0f} {max(samples):>8.0f}')
+    tmp.cleanup()
+
+
+if __name__ == '__main__':
+    main()
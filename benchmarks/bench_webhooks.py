@@ -0,0 +1,153 @@
+"""Webhook delivery throughput and latency against a local stand-in receiver.
+
+The receiver is this script run as a separate process with --receiver PORT.
+It is a small asyncio HTTP/1.1 server that keeps connections alive, answers
+--fail-rate of requests with 503, and counts events, requests and connections.
+For each configuration a WebhookDispatcher delivers --events phase events,
+enqueued as fast as one thread can. The run ends once close() has delivered
+everything. Throughput is events over that time. Latency runs from an event's
+firedMs to the receiver reading its batch.
+
+Default configurations:
+- batch 1, 1 connection: one request per event, sequentially
+- batch 1, 8 connections: the same with a pool
+- batch 100, 4 connections: the defaults
+- the defaults with 10% of requests failing (retried with backoff)
+- the defaults with the receiver closing every connection (no keep-alive)
+
+Usage: python benchmarks/bench_webhooks.py [--events N]
+"""
+import argparse
+import asyncio
+import http.client
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from _support import ROOT, free_port
+
+sys.path.insert(0, str(ROOT))
+from webhooks import WebhookDispatcher, phase_event  # noqa: E402
+
+CONFIGURATIONS = [
+    ('batch 1, 1 conn', {'batch_size': 1, 'connections': 1}, {}),
+    ('batch 1, 8 conns', {'batch_size': 1, 'connections': 8}, {}),
+    ('batch 100, 4 conns', {'batch_size': 100, 'connections': 4}, {}),
+    ('  + 10% 503s', {'batch_size': 100, 'connections': 4}, {'fail_rate': 0.1}),
+    ('  + no keep-alive', {'batch_size': 100, 'connections': 4}, {'close': True}),
+]
+
+
+async def receive(port, fail_rate, close):
+    stats = {'events': 0, 'requests': 0, 'connections': 0, 'latencies': []}
+
+    async def handle(reader, writer):
+        counted = False  # the benchmark's own /stats requests don't count
+        try:
+            while True:
+                request_line = await reader.readuntil(b'\r\n')
+                length = 0
+                while (line := await reader.readuntil(b'\r\n')) != b'\r\n':
+                    name, _, value = line.partition(b':')
+                    if name.strip().lower() == b'content-length':
+                        length = int(value)
+                body = await reader.readexactly(length)
+                if request_line.startswith(b'GET /stats'):
+                    latencies = sorted(stats['latencies'])
+                    reply = json.dumps({**stats, 'latencies': [latencies[int(q * (len(latencies) - 1))] for q in (0.5, 0.99)]
+                                        if latencies else []}).encode()
+                    status = b'200 OK'
+                else:
+                    if not counted:
+                        stats['connections'] += 1
+                        counted = True
+                    stats['requests'] += 1
+                    if random.random() < fail_rate:
+                        status, reply = b'503 Service Unavailable', b'{}'
+                    else:
+                        now = time.time() * 1000
+                        events = json.loads(body)['events']
+                        stats['events'] += len(events)
+                        stats['latencies'] += [now - event['firedMs'] for event in events]
+                        status, reply = b'200 OK', b'{}'
+                connection = b'Connection: close\r\n' if close else b''
+                writer.write(b'HTTP/1.1 ' + status + b'\r\nContent-Type: application/json\r\n' + connection
+                             + b'Content-Length: ' + str(len(reply)).encode() + b'\r\n\r\n' + reply)
+                await writer.drain()
+                if close:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        writer.close()
+
+    server = await asyncio.start_server(handle, '127.0.0.1', port, backlog=1024)
+    async with server:
+        await server.serve_forever()
+
+
+def receiver_stats(port):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    conn.request('GET', '/stats')
+    stats = json.loads(conn.getresponse().read())
+    conn.close()
+    return stats
+
+
+def run(label, options, receiver_options, args):
+    port = free_port()
+    command = [sys.executable, __file__, '--receiver', str(port), '--fail-rate', str(receiver_options.get('fail_rate', 0))]
+    if receiver_options.get('close'):
+        command.append('--close')
+    proc = subprocess.Popen(command)
+    try:
+        deadline = time.time() + 10
+        while True:
+            try:
+                receiver_stats(port)
+                break
+            except OSError:
+                if time.time() > deadline:
+                    raise
+                time.sleep(0.02)
+        with tempfile.TemporaryDirectory() as tmp:
+            dispatcher = WebhookDispatcher([f'http://127.0.0.1:{port}/hook'], os.path.join(tmp, 'dead.jsonl'),
+                                           queue_size=args.events, backoff=0.05, max_attempts=10, **options)
+            dispatcher.start()
+            start = time.perf_counter()
+            for i in range(args.events):
+                dispatcher.enqueue(phase_event(f'key{i % 1000:019d}', i % 2 == 0, time.time() * 1000, time.time() * 1000))
+            dispatcher.close()
+            elapsed = time.perf_counter() - start
+        stats = receiver_stats(port)
+    finally:
+        proc.terminate()
+        proc.wait()
+    p50, p99 = stats['latencies']
+    print(f'{label:<22} {args.events / elapsed:10.0f} {stats["requests"]:9d} {stats["connections"]:6d} '
+          f'{dispatcher.stats["delivered"] / max(1, dispatcher.stats["requests"] - dispatcher.stats["retries"]):7.1f} '
+          f'{p50:9.1f} {p99:9.1f} {dispatcher.stats["dead"]:6d}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--events', type=int, default=20000)
+    parser.add_argument('--receiver', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--fail-rate', type=float, default=0, help=argparse.SUPPRESS)
+    parser.add_argument('--close', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.receiver:
+        asyncio.run(receive(args.receiver, args.fail_rate, args.close))
+        return
+
+    print(f'{args.events} events per configuration')
+    print(f'{"configuration":<22} {"events/s":>10} {"requests":>9} {"conns":>6} {"batch":>7} {"p50 ms":>9} {"p99 ms":>9} {"dead":>6}')
+    for label, options, receiver_options in CONFIGURATIONS:
+        run(label, options, receiver_options, args)
+
+
+if __name__ == '__main__':
+    main()
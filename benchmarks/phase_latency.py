@@ -0,0 +1,117 @@
+"""Write a browser harness that measures phase-event lateness: worker vs main thread.
+
+The page runs the app's real TIMER_ENGINE_JS twice on short phases (3 s focus,
+2 s break by default): once in the TIMER_WORKER_JS worker, once on main-thread
+setTimeout as the page did before. For each engine it records how late every
+phase event fired after its scheduled boundary. Put the tab in the background
+for a few minutes to see throttling, then come back and read the table (or
+copy the JSON log).
+
+Usage: python benchmarks/phase_latency.py [--output phase_latency.html] [--focus-ms N] [--break-ms N]
+"""
+import argparse
+import json
+from pathlib import Path
+
+from _support import load_app_module
+
+HARNESS = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="UTF-8">
+<title>Eye Timer phase latency</title>
+<style>
+  body { font: 14px system-ui, sans-serif; margin: 2rem; }
+  table { border-collapse: collapse; }
+  td, th { padding: 4px 12px; text-align: right; border-bottom: 1px solid #ddd; }
+  textarea { width: 100%; height: 12rem; margin-top: 1rem; }
+</style>
+</head>
+<body>
+<h1>Phase event lateness</h1>
+<p>Focus __FOCUS_MS__ ms, break __BREAK_MS__ ms. Background this tab for a while, then return.</p>
+<table>
+  <thead><tr><th>engine</th><th>hidden</th><th>events</th><th>p50 ms</th><th>p95 ms</th><th>max ms</th></tr></thead>
+  <tbody id="stats"></tbody>
+</table>
+<textarea id="log" readonly></textarea>
+<script>
+const ENGINE = __ENGINE__;
+const WORKER = __WORKER__;
+const FOCUS_MS = __FOCUS_MS__, BREAK_MS = __BREAK_MS__;
+eval(ENGINE);  // catchUpPhase / nextWakeupMs for the main-thread engine
+
+const log = [];
+const record = (engine, dueMs, firedMs) => {
+    log.push({ engine, hidden: document.hidden, dueMs, firedMs, lateMs: firedMs - dueMs });
+    render();
+};
+
+const percentile = (values, p) => values[Math.min(values.length - 1, Math.floor(p * values.length))];
+const render = () => {
+    const rows = [];
+    for (const engine of ['worker', 'main']) {
+        for (const hidden of [false, true]) {
+            const late = log.filter((e) => e.engine === engine && e.hidden === hidden).map((e) => e.lateMs).sort((a, b) => a - b);
+            if (!late.length) continue;
+            rows.push(`<tr><td>${engine}</td><td>${hidden}</td><td>${late.length}</td><td>${percentile(late, 0.5)}</td>`
+                + `<td>${percentile(late, 0.95)}</td><td>${late[late.length - 1]}</td></tr>`);
+        }
+    }
+    document.getElementById('stats').innerHTML = rows.join('');
+    document.getElementById('log').value = JSON.stringify(log);
+};
+
+const start = Date.now();
+const arm = { type: 'arm', generation: 1, isFocus: true, endTimeMs: start + FOCUS_MS, focusMs: FOCUS_MS, breakMs: BREAK_MS };
+
+// Worker engine, exactly as the app runs it
+const worker = new Worker(URL.createObjectURL(new Blob([ENGINE + WORKER], { type: 'text/javascript' })));
+// Re-arming on visibility changes must resume from the worker's latest phase
+let workerSchedule = {};
+worker.onmessage = ({ data }) => {
+    if (data.type !== 'phase') return;
+    record('worker', data.dueMs, data.firedMs);
+    workerSchedule = { isFocus: data.isFocus, endTimeMs: data.endTimeMs };
+};
+const armWorker = () => worker.postMessage({ ...arm, ...workerSchedule, hidden: document.hidden });
+
+// Main-thread engine: the same functions driven by page timers
+const main = { isFocus: true, endTimeMs: arm.endTimeMs, timerId: null };
+const mainTick = () => {
+    const now = Date.now();
+    if (now >= main.endTimeMs) {
+        record('main', main.endTimeMs, now);
+        Object.assign(main, catchUpPhase(main.isFocus, main.endTimeMs, now, FOCUS_MS, BREAK_MS));
+    }
+    clearTimeout(main.timerId);
+    main.timerId = setTimeout(mainTick, nextWakeupMs(main.endTimeMs - Date.now(), document.hidden));
+};
+
+document.addEventListener('visibilitychange', () => { armWorker(); mainTick(); });
+armWorker();
+mainTick();
+</script>
+</body>
+</html>
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--output', default='phase_latency.html')
+    parser.add_argument('--focus-ms', type=int, default=3000)
+    parser.add_argument('--break-ms', type=int, default=2000)
+    args = parser.parse_args()
+
+    module = load_app_module()
+    page = (HARNESS.replace('__ENGINE__', json.dumps(module.TIMER_ENGINE_JS))
+            .replace('__WORKER__', json.dumps(module.TIMER_WORKER_JS))
+            .replace('__FOCUS_MS__', str(args.focus_ms))
+            .replace('__BREAK_MS__', str(args.break_ms)))
+    Path(args.output).write_text(page)
+    print(f'Wrote {args.output}; open it in a browser')
+
+
+if __name__ == '__main__':
+    main()
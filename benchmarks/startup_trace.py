@@ -0,0 +1,110 @@
+"""Write a browser harness that traces the page's startup: first paint and time to interactive.
+
+The harness loads the running app in an iframe with `?startup-trace` several
+times. On each load the page posts its `eyeTimerStartup` trace: first paint and
+first contentful paint from the Paint Timing API, and interactive once init has
+run with every handler bound. The harness tabulates p50/p95/max per metric.
+
+No baseline trace ships with the repo: paint timings depend on the browser and
+machine, so a before/after comparison needs both runs from the same setup. Run
+the harness on the old code and save the JSON it shows, then pass that file
+with --baseline on the new code to see the change in each p50.
+
+Usage: python benchmarks/startup_trace.py [--url http://localhost:5000/] [--runs N] [--baseline trace.json] [--output startup_trace.html]
+"""
+import argparse
+import json
+from pathlib import Path
+
+HARNESS = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="UTF-8">
+<title>Eye Timer startup trace</title>
+<style>
+  body { font: 14px system-ui, sans-serif; margin: 2rem; }
+  table { border-collapse: collapse; margin-top: 1rem; }
+  td, th { padding: 4px 12px; text-align: right; border-bottom: 1px solid #ddd; }
+  textarea { width: 100%; height: 8rem; margin-top: 1rem; }
+  iframe { width: 480px; height: 320px; border: 1px solid #ddd; margin-top: 1rem; }
+</style>
+</head>
+<body>
+<h1>Startup trace</h1>
+<p>__RUNS__ loads of <code>__URL__</code>. Keep this tab in the foreground while it runs.</p>
+<button id="run">Run</button> <span id="progress"></span>
+<table>
+  <thead><tr><th>metric</th><th>p50 ms</th><th>p95 ms</th><th>max ms</th><th>baseline p50 ms</th><th>change</th></tr></thead>
+  <tbody id="stats"></tbody>
+</table>
+<textarea id="log" readonly></textarea>
+<iframe id="frame"></iframe>
+<script>
+const URL_ = __URL_JSON__, RUNS = __RUNS__, BASELINE = __BASELINE__;
+const METRICS = ['firstPaintMs', 'firstContentfulPaintMs', 'interactiveMs'];
+const frame = document.getElementById('frame');
+
+const percentile = (values, p) => values[Math.min(values.length - 1, Math.floor(p * values.length))];
+const summarize = (traces) => Object.fromEntries(METRICS.map((metric) => {
+    const values = traces.map((t) => t[metric]).filter((v) => v !== null).sort((a, b) => a - b);
+    return [metric, values.length ? { p50: percentile(values, 0.5), p95: percentile(values, 0.95), max: values[values.length - 1] } : null];
+}));
+
+const render = (traces) => {
+    const summary = summarize(traces);
+    document.getElementById('stats').innerHTML = METRICS.map((metric) => {
+        const s = summary[metric];
+        const base = BASELINE && BASELINE.summary[metric];
+        if (!s) return `<tr><td>${metric}</td><td colspan="5">not reported</td></tr>`;
+        const change = base ? `${(100 * (s.p50 - base.p50) / base.p50).toFixed(1)}%` : '';
+        return `<tr><td>${metric}</td><td>${s.p50}</td><td>${s.p95}</td><td>${s.max}</td><td>${base ? base.p50 : ''}</td><td>${change}</td></tr>`;
+    }).join('');
+    document.getElementById('log').value = JSON.stringify({ url: URL_, summary, traces });
+};
+
+// Resolve with the next trace the framed page posts
+const load = (i) => new Promise((resolve) => {
+    const onMessage = ({ data }) => {
+        if (!data || !data.eyeTimerStartup) return;
+        window.removeEventListener('message', onMessage);
+        resolve(data.eyeTimerStartup);
+    };
+    window.addEventListener('message', onMessage);
+    const separator = URL_.includes('?') ? '&' : '?';
+    frame.src = `${URL_}${separator}startup-trace&run=${i}`;
+});
+
+document.getElementById('run').addEventListener('click', async () => {
+    const traces = [];
+    for (let i = 0; i < RUNS; i++) {
+        document.getElementById('progress').textContent = `${i + 1} / ${RUNS}`;
+        traces.push(await load(i));
+        render(traces);
+    }
+    frame.src = 'about:blank';
+});
+</script>
+</body>
+</html>
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default='http://localhost:5000/')
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--baseline', help='JSON saved from an earlier run of the harness')
+    parser.add_argument('--output', default='startup_trace.html')
+    args = parser.parse_args()
+
+    baseline = json.loads(Path(args.baseline).read_text()) if args.baseline else None
+    page = (HARNESS.replace('__URL_JSON__', json.dumps(args.url))
+            .replace('__URL__', args.url)
+            .replace('__RUNS__', str(args.runs))
+            .replace('__BASELINE__', json.dumps(baseline)))
+    Path(args.output).write_text(page)
+    print(f'Wrote {args.output}; start the app, open it in a browser and click Run')
+
+
+if __name__ == '__main__':
+    main()
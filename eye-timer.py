@@ -1,17 +1,301 @@
 #!/usr/bin/env -S uv run
+import atexit
+import gzip
+import hashlib
+import json
+import math
 import os
+import re
 import sys
-import threading
-import webbrowser
-from flask import Flask, render_template_string, send_from_directory
+import time
+
+# BACKEND=stdlib serves the prebuilt page without ever importing Flask (see
+# stdlib_server.py), so hand off before the imports below
+if __name__ == '__main__' and os.environ.get('BACKEND', 'flask').lower() == 'stdlib' and '--export' not in sys.argv:
+    import stdlib_server
+    sys.exit(stdlib_server.main())
+
+from flask import Flask, abort, render_template_string, request, send_from_directory
+
+from phase_scheduler import PhaseScheduler
+from server_common import (ASSET_CACHE_CONTROL, AUDIO_TYPES, BUILD_DIR, BUILTIN_SOUND_CACHE_CONTROL, DEBUG, HOST,
+                           KEEPALIVE_TIMEOUT, PORT, ROOMS_PORT, SOUND_NAME, SOUNDS_DIR, WAV_CACHE_DIR,
+                           builtin_sound_options, clock_probe_body, load_wav_synth, write_atomically)
+from state_store import InvalidState, StateStore, StateTooLarge, VersionConflict
+from tailwind_build import compile_tailwind
+
+try:
+    import brotli  # Optional: adds a `br` variant next to gzip when installed
+except ImportError:
+    brotli = None
 
 # Configuration
-# Allow environment overrides so the app can run inside containers and CI
-HOST = os.environ.get('HOST', '0.0.0.0')
-PORT = int(os.environ.get('PORT', str(5000)))
-DEBUG = os.environ.get('DEBUG', 'False').lower() in ('1', 'true', 'yes')
+# Allow environment overrides so the app can run inside containers and CI.
+# HOST, PORT, DEBUG, KEEPALIVE_TIMEOUT and the upload, cache and build
+# directories are shared with the stdlib backend (server_common.py)
+
+# Serving: 'dev' uses Flask's development server; 'production' runs gunicorn with
+# WORKERS pre-forked processes of THREADS threads each, keeps idle HTTP/1.1
+# connections open for KEEPALIVE_TIMEOUT seconds and on SIGTERM gives in-flight
+# requests GRACEFUL_TIMEOUT seconds to finish
+SERVER_MODE = os.environ.get('SERVER_MODE', 'dev').lower()
+WORKERS = int(os.environ.get('WORKERS', str(os.cpu_count() or 1)))
+THREADS = int(os.environ.get('THREADS', '8'))
+GRACEFUL_TIMEOUT = int(os.environ.get('GRACEFUL_TIMEOUT', '10'))
+
+# How Tailwind styles reach the page: 'asset' (compiled, hashed stylesheet),
+# 'inline' (compiled, embedded in a <style> block) or 'cdn' (in-browser Play CDN)
+TAILWIND_MODE = os.environ.get('TAILWIND_MODE', 'asset').lower()
+# Where fonts and icons come from: 'local' (vendored, subsetted files from
+# static/fonts/ served as hashed assets) or 'cdn' (Google Fonts + cdnjs)
+ASSET_SOURCE = os.environ.get('ASSET_SOURCE', 'local').lower()
+# With ASSET_SOURCE=local, load text families static/fonts/ doesn't vendor from
+# Google Fonts; off (the default) keeps the page free of third-party requests
+GOOGLE_FONTS_FALLBACK = os.environ.get('GOOGLE_FONTS_FALLBACK', 'False').lower() in ('1', 'true', 'yes')
+# Serve the page's own stylesheet and script as minified, content-hashed assets
+# (app.css/app.js) instead of inline, so they are cached across navigations and the
+# script can use the browser's code cache; off keeps them inline and as written
+BUNDLE_ASSETS = os.environ.get('BUNDLE_ASSETS', 'True').lower() in ('1', 'true', 'yes')
+# Register a service worker that serves the app shell from cache on repeat loads
+SERVICE_WORKER = os.environ.get('SERVICE_WORKER', 'True').lower() in ('1', 'true', 'yes')
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+MAX_SOUND_BYTES = int(os.environ.get('MAX_SOUND_BYTES', str(5 * 1024 * 1024)))
+# Timer state and settings synced between devices (/api/state), in one SQLite
+# database shared by every worker; each document is capped at MAX_STATE_BYTES
+STATE_DB = os.environ.get('STATE_DB', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'uploads', 'state.sqlite3'))
+MAX_STATE_BYTES = int(os.environ.get('MAX_STATE_BYTES', str(16 * 1024)))
+# Shared room timers are served by rooms_server.py, a separate asyncio process.
+# The page connects to ROOMS_URL, or by default to ROOMS_PORT on its own host
+ROOMS_URL = os.environ.get('ROOMS_URL', '')
+# Phase changes are POSTed, in batches, to every URL in WEBHOOK_URLS (separated by
+# commas and/or whitespace; see webhooks.py). Batches that fail for good are
+# appended to WEBHOOK_DEAD_LETTER
+WEBHOOK_URLS = [url for url in re.split(r'[\s,]+', os.environ.get('WEBHOOK_URLS', '')) if url]
+WEBHOOK_DEAD_LETTER = os.environ.get('WEBHOOK_DEAD_LETTER', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'uploads', 'webhooks-dead-letter.jsonl'))
+WEBHOOK_BATCH_SIZE = int(os.environ.get('WEBHOOK_BATCH_SIZE', '100'))
+WEBHOOK_CONNECTIONS = int(os.environ.get('WEBHOOK_CONNECTIONS', '4'))
+WEBHOOK_MAX_ATTEMPTS = int(os.environ.get('WEBHOOK_MAX_ATTEMPTS', '6'))
+# Server-side phase timers for every synced key (phase_scheduler.py). One process
+# per STATE_DB runs them, picking up changed documents every SCHEDULER_POLL_INTERVAL
+# seconds. Webhooks are their only consumer, so by default they run only with WEBHOOK_URLS
+PHASE_SCHEDULER = os.environ.get('PHASE_SCHEDULER', str(bool(WEBHOOK_URLS))).lower() in ('1', 'true', 'yes')
+SCHEDULER_POLL_INTERVAL = float(os.environ.get('SCHEDULER_POLL_INTERVAL', '1'))
+
+# The HTML shell is always revalidated, but a matching ETag only costs a bodiless 304
+INDEX_CACHE_CONTROL = 'no-cache'
+# Sync keys are random, URL-safe tokens generated by the page
+SYNC_KEY = re.compile(r'[A-Za-z0-9_-]{16,64}')
+
+# Theme extensions shared by the compiled stylesheet and the Play CDN config
+TAILWIND_THEME = {
+    'fontFamily': {
+        'sans': ['Inter', 'sans-serif'],
+        'mono': ['JetBrains Mono', 'monospace'],
+    },
+    'colors': {
+        'brand': {
+            '500': '#3b82f6',
+            '600': '#2563eb',
+        },
+    },
+}
+
+# FontAwesome release of the vendored icon subset and of the ASSET_SOURCE=cdn stylesheet
+FONTAWESOME_VERSION = '6.6.0'
+# FontAwesome icons used by the template (name -> codepoint).
+# scripts/vendor_assets.py subsets the icon font down to exactly these glyphs.
+FONTAWESOME_ICONS = {
+    'eye': 'f06e',
+    'forward-step': 'f051',
+    'gear': 'f013',
+    'pause': 'f04c',
+    'play': 'f04b',
+    'rotate-right': 'f2f9',
+    'volume-high': 'f028',
+    'xmark': 'f00d',
+}
+FONTAWESOME_CSS = (
+    '.fa-solid{-moz-osx-font-smoothing:grayscale;-webkit-font-smoothing:antialiased;'
+    'display:var(--fa-display,inline-block);font-style:normal;font-variant:normal;line-height:1;'
+    'text-rendering:auto;font-family:"Font Awesome 6 Free";font-weight:900}'
+)
+
+# The page's text families as Google Fonts requests (family -> css2 `family=` value).
+# ASSET_SOURCE=cdn loads all of them from there. Locally, the ones
+# static/fonts/fonts.json doesn't vendor fall back to the generic stack in
+# TAILWIND_THEME, or to Google Fonts with GOOGLE_FONTS_FALLBACK.
+GOOGLE_FONT_FAMILIES = {
+    'Inter': 'Inter:wght@300;400;600;800',
+    'JetBrains Mono': 'JetBrains+Mono:wght@500',
+}
+
+
+def google_fonts_url(families):
+    """The Google Fonts stylesheet for `families` (keys of GOOGLE_FONT_FAMILIES), or None for none."""
+    if not families:
+        return None
+    return ('https://fonts.googleapis.com/css2?' + '&'.join(f'family={GOOGLE_FONT_FAMILIES[f]}' for f in families)
+            + '&display=swap')
+
+# Built-in notification sounds. Per profile, the notes of the normal ring and of the
+# reversed ring (played when a break ends and "reverse" is on), each as
+# (frequency Hz, oscillator wave, start s, duration s). Every note gets the same
+# envelope: 50 ms linear attack, then exponential decay to 1% at its end.
+SOUND_PROFILES = {
+    'chime': {
+        'forward': [(660, 'sine', 0, 0.1), (880, 'sine', 0.15, 0.8)],
+        'reverse': [(880, 'sine', 0, 0.1), (660, 'sine', 0.15, 0.8)],
+    },
+    'digital': {
+        'forward': [(800, 'square', 0, 0.1), (800, 'square', 0.15, 0.1)],
+        'reverse': [(800, 'square', 0, 0.1), (800, 'square', 0.2, 0.15)],
+    },
+    'harp': {
+        'forward': [(440, 'triangle', 0, 1.5), (554, 'triangle', 0.1, 1.5),
+                    (659, 'triangle', 0.2, 1.5), (880, 'triangle', 0.3, 1.5)],
+        'reverse': [(880, 'triangle', 0, 1.5), (659, 'triangle', 0.1, 1.5),
+                    (554, 'triangle', 0.2, 1.5), (440, 'triangle', 0.3, 1.5)],
+    },
+    # A low drone, then a figure that speeds up halfway through
+    'hd2': {
+        'forward': [(55, 'triangle', 0, 2.25),
+                    (110, 'triangle', 1.25, 0.75), (117, 'triangle', 1.45, 0.75),
+                    (110, 'triangle', 1.65, 0.75), (131, 'triangle', 1.85, 0.75),
+                    (123, 'triangle', 2.05, 0.75), (117, 'triangle', 2.25, 0.75),
+                    (131, 'triangle', 2.35, 0.75), (123, 'triangle', 2.45, 0.75)],
+        'reverse': [(55, 'triangle', 0, 2.25),
+                    (110, 'triangle', 1.25, 0.75), (117, 'triangle', 1.45, 0.75),
+                    (110, 'triangle', 1.65, 0.75), (131, 'triangle', 1.85, 0.75),
+                    (123, 'triangle', 2.05, 0.75), (117, 'triangle', 2.15, 0.75),
+                    (110, 'triangle', 2.25, 0.75)],
+    },
+}
+
+# Pure timing functions shared by the page (and exercised under node by the tests).
+# No DOM, no globals: everything they need is passed in, including the clock.
+TIMER_ENGINE_JS = """
+        // Where the focus/break cycle stands at `nowMs`, given that the phase
+        // (`isFocus`) was due to end at `endTimeMs`. Phases alternate, so after a
+        // long sleep the current one is found with a modulo instead of stepping
+        // through every missed phase. `transitions` is 0 while the phase is still
+        // running, otherwise how many phase ends were crossed.
+        function catchUpPhase(isFocus, endTimeMs, nowMs, focusMs, breakMs) {
+            const overshoot = nowMs - endTimeMs;
+            if (overshoot < 0) return { isFocus, endTimeMs, transitions: 0 };
+            const nextMs = isFocus ? breakMs : focusMs;
+            const cycleMs = focusMs + breakMs;
+            // Zero-length phases can't be caught up; just flip and re-check next tick
+            if (cycleMs <= 0) return { isFocus: !isFocus, endTimeMs: nowMs, transitions: 1 };
+            const cycles = Math.floor(overshoot / cycleMs);
+            const intoCycle = overshoot - cycles * cycleMs;
+            if (intoCycle < nextMs) {
+                return { isFocus: !isFocus, endTimeMs: nowMs - intoCycle + nextMs, transitions: 2 * cycles + 1 };
+            }
+            const currentMs = cycleMs - nextMs;
+            return { isFocus, endTimeMs: nowMs - (intoCycle - nextMs) + currentMs, transitions: 2 * cycles + 2 };
+        }
+
+        // Delay until the timer next needs to run. A visible page wakes exactly when
+        // the displayed seconds change; a hidden one `leadMs` before the phase
+        // boundary (to queue the chime on the audio clock) and at the boundary.
+        function nextWakeupMs(remainingMs, hidden, leadMs = 0) {
+            if (remainingMs <= 0) return 0;
+            if (!hidden) return remainingMs % 1000 || 1000;
+            return remainingMs > leadMs ? remainingMs - leadMs : remainingMs;
+        }
+
+        // NTP-style clock filter over /api/time probes. Each sample holds the device's
+        // send time `t0`, the server's receive and reply times `t1`/`t2`, and the
+        // device's receive time `t3`. A sample's offset is off by at most half its
+        // round trip, so the one with the shortest round trip wins. Returns
+        // { offsetMs, delayMs } (offset = server clock - device clock), or null.
+        function estimateClockOffset(samples) {
+            let best = null;
+            for (const { t0, t1, t2, t3 } of samples) {
+                const delayMs = (t3 - t0) - (t2 - t1);
+                if (best === null || delayMs < best.delayMs) {
+                    best = { offsetMs: ((t1 - t0) + (t2 - t3)) / 2, delayMs };
+                }
+            }
+            return best;
+        }
+"""
+
+# Size-bounded LRU cache for decoded uploaded sounds (inlined into the page;
+# pure, so the tests run it under node)
+SOUND_CACHE_JS = """
+        // Least recently used first (Map keeps insertion order). Bounded by the summed
+        // `bytes` of its entries; the newest entry is kept even if it alone is too big.
+        class BufferCache {
+            constructor(maxBytes) {
+                this.maxBytes = maxBytes;
+                this.bytes = 0;
+                this.entries = new Map();
+            }
+
+            get(key) {
+                const entry = this.entries.get(key);
+                if (!entry) return undefined;
+                this.entries.delete(key);
+                this.entries.set(key, entry);
+                return entry.value;
+            }
+
+            set(key, value, bytes) {
+                if (this.entries.has(key)) {
+                    this.bytes -= this.entries.get(key).bytes;
+                    this.entries.delete(key);
+                }
+                this.entries.set(key, { value, bytes });
+                this.bytes += bytes;
+                for (const [oldest, entry] of this.entries) {
+                    if (this.bytes <= this.maxBytes || oldest === key) break;
+                    this.entries.delete(oldest);
+                    this.bytes -= entry.bytes;
+                }
+            }
+        }
+"""
+
+# Dedicated worker that owns the running phase schedule (served as a hashed asset
+# together with TIMER_ENGINE_JS). The page sends 'arm'/'disarm'; the worker answers
+# with 'tick' (display refresh, or the chime lead while hidden) and 'phase'
+# (boundary crossed) messages.
+TIMER_WORKER_JS = """
+        let schedule = null;
+        let timerId = null;
+        // The page's clock correction (see syncClock()), sent with every 'arm'
+        const clockNow = () => Date.now() + (schedule.clockOffsetMs || 0);
+
+        const wake = () => {
+            timerId = null;
+            if (!schedule) return;
+            const now = clockNow();
+            const { generation } = schedule;
+            if (now >= schedule.endTimeMs) {
+                const dueMs = schedule.endTimeMs;
+                const next = catchUpPhase(schedule.isFocus, dueMs, now, schedule.focusMs, schedule.breakMs);
+                schedule.isFocus = next.isFocus;
+                schedule.endTimeMs = next.endTimeMs;
+                postMessage({ type: 'phase', generation, isFocus: next.isFocus, endTimeMs: next.endTimeMs, dueMs, firedMs: now });
+            } else if (!schedule.hidden || schedule.endTimeMs - now <= (schedule.leadMs || 0)) {
+                postMessage({ type: 'tick', generation, remainingMs: schedule.endTimeMs - now });
+            }
+            timerId = setTimeout(wake, nextWakeupMs(schedule.endTimeMs - clockNow(), schedule.hidden, schedule.leadMs));
+        };
+
+        onmessage = ({ data }) => {
+            clearTimeout(timerId);
+            timerId = null;
+            schedule = data.type === 'arm' ? data : null;
+            // Evaluate right away: renders the current second and catches up missed phases
+            wake();
+        };
+"""
 
 app = Flask(__name__)
+# Uploads are the only request bodies; leave room for the multipart envelope
+app.config['MAX_CONTENT_LENGTH'] = MAX_SOUND_BYTES + 64 * 1024
 
 # The complete frontend (HTML/CSS/JS) embedded in the Python file
 HTML_TEMPLATE = """
@@ -22,32 +306,43 @@ HTML_TEMPLATE = """
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>20-20-20 Eye Timer</title>
     <link rel="icon" href="/favicon.png" type="image/png">
-    <!-- Tailwind CSS for styling -->
+{% if tailwind_mode == 'cdn' %}
+    <!-- Tailwind CSS for styling (in-browser JIT) -->
     <script src="https://cdn.tailwindcss.com"></script>
+{% endif %}
+{% if asset_source == 'cdn' %}
     <!-- FontAwesome for Icons -->
-    <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0/css/all.min.css">
+    <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/{{ fontawesome_version }}/css/all.min.css">
     <!-- Google Fonts -->
-    <link href="https://fonts.googleapis.com/css2?family=Inter:wght@300;400;600;800&family=JetBrains+Mono:wght@500&display=swap" rel="stylesheet">
+    <link href="{{ google_fonts_url }}" rel="stylesheet">
+{% else %}
+    <!-- Self-hosted, subsetted fonts and icons -->
+{% for url in font_preloads %}
+    <link rel="preload" href="{{ url }}" as="font" type="font/woff2" crossorigin>
+{% endfor %}
+    <link rel="stylesheet" href="{{ fonts_css_url }}">
+{% if google_fonts_url %}
+    <!-- Text families not vendored into static/fonts/ (GOOGLE_FONTS_FALLBACK) -->
+    <link href="{{ google_fonts_url }}" rel="stylesheet">
+{% endif %}
+{% endif %}
     
+{% if tailwind_mode == 'cdn' %}
     <script>
         tailwind.config = {
             darkMode: 'class',
             theme: {
-                extend: {
-                    fontFamily: {
-                        sans: ['Inter', 'sans-serif'],
-                        mono: ['JetBrains Mono', 'monospace'],
-                    },
-                    colors: {
-                        brand: {
-                            500: '#3b82f6',
-                            600: '#2563eb',
-                        }
-                    }
-                }
+                extend: {{ tailwind_theme|tojson }}
             }
         }
     </script>
+{% elif tailwind_mode == 'inline' %}
+    <!-- Tailwind utilities compiled ahead of time -->
+    <style>{{ tailwind_css|safe }}</style>
+{% else %}
+    <!-- Tailwind utilities compiled ahead of time -->
+    <link rel="stylesheet" href="{{ tailwind_css_url }}">
+{% endif %}
     <style>
         /* Custom transitions */
         .fade-enter-active, .fade-leave-active { transition: opacity 0.5s; }
@@ -118,6 +413,8 @@ HTML_TEMPLATE = """
                                 <i class="fa-solid fa-volume-high"></i>
                             </button>
                         </div>
+                        <input type="file" id="sound-upload" accept="audio/*" class="hidden">
+                        <button id="btn-upload-sound" type="button" class="mt-2 text-xs font-medium text-brand-500 hover:text-brand-600">Upload your own sound...</button>
                     </div>
 
                     <!-- Volume -->
@@ -165,6 +462,18 @@ HTML_TEMPLATE = """
                             <div class="w-4 h-4 bg-white rounded-full absolute top-1 left-1 transition-all duration-300 shadow-sm"></div>
                         </button>
                     </div>
+
+                    <!-- Sync Across Devices -->
+                    <div class="flex items-center justify-between pt-2">
+                        <label class="block text-sm font-medium text-gray-500 dark:text-gray-400">Sync Across Devices</label>
+                        <button id="btn-sync-link" type="button" class="text-xs font-medium text-brand-500 hover:text-brand-600">Copy sync link</button>
+                    </div>
+
+                    <!-- Shared Room -->
+                    <div class="flex items-center justify-between pt-2">
+                        <label class="block text-sm font-medium text-gray-500 dark:text-gray-400">Shared Room</label>
+                        <button id="btn-room" type="button" class="text-xs font-medium text-brand-500 hover:text-brand-600">Host a room</button>
+                    </div>
                 </div>
 
                 <div class="mt-8">
@@ -184,7 +493,7 @@ HTML_TEMPLATE = """
                     <div class="w-8 h-8 rounded-lg bg-brand-500 flex items-center justify-center text-white">
                         <i class="fa-solid fa-eye"></i>
                     </div>
-                    <h1 class="font-bold text-lg tracking-tight">20-20-20</h1>
+                    <h1 class="font-bold text-lg tracking-tight" id="app-heading">20-20-20</h1>
                 </div>
                 <button id="open-settings" class="w-10 h-10 rounded-full hover:bg-gray-100 dark:hover:bg-slate-700 flex items-center justify-center transition text-gray-500 dark:text-gray-400">
                     <i class="fa-solid fa-gear"></i>
@@ -216,7 +525,7 @@ HTML_TEMPLATE = """
 
             <!-- Progress Bar -->
             <div class="w-full h-2 bg-gray-100 dark:bg-slate-900">
-                <div id="progress-bar" class="h-full bg-brand-500 transition-all duration-1000 ease-linear w-full"></div>
+                <div id="progress-bar" class="h-full bg-brand-500 w-full origin-left will-change-transform"></div>
             </div>
 
             <!-- Controls -->
@@ -239,131 +548,274 @@ HTML_TEMPLATE = """
         </div>
         
         <div class="text-center mt-8 text-gray-400 text-xs">
-            <p>Look 20 feet away for 20 seconds every 20 minutes.</p>
+            <p id="rule-text">Look 20 feet away for 20 seconds every 20 minutes.</p>
         </div>
     </div>
 
     <!-- Audio Context Logic -->
     <script>
         // --- Audio Engine (Web Audio API) ---
+        // Note tables per profile, from SOUND_PROFILES in eye-timer.py
+        const SOUND_PROFILES = {{ sound_profiles|tojson }};
+
+        // Schedule a profile's notes on any (live or offline) context, starting at t0;
+        // returns the oscillators so a pending ring can be stopped
+        const scheduleNotes = (ctx, notes, destination, t0) => {
+            return notes.map(([freq, wave, start, duration]) => {
+                const startTime = t0 + start;
+                const osc = ctx.createOscillator();
+                osc.type = wave;
+                osc.frequency.value = freq;
+
+                const envelope = ctx.createGain();
+                envelope.gain.setValueAtTime(0, startTime);
+                envelope.gain.linearRampToValueAtTime(1, startTime + 0.05);
+                envelope.gain.exponentialRampToValueAtTime(0.01, startTime + duration);
+
+                osc.connect(envelope);
+                envelope.connect(destination);
+
+                osc.start(startTime);
+                osc.stop(startTime + duration);
+                return osc;
+            });
+        };
+
+{{ sound_cache_js|safe }}
+        // An AudioBuffer stores 32-bit float samples
+        const audioBufferBytes = (buffer) => buffer.length * buffer.numberOfChannels * 4;
+
+        // A copy of `buffer` played backwards (the "reverse" ring of an uploaded sound)
+        const reversedBuffer = (ctx, buffer) => {
+            const copy = ctx.createBuffer(buffer.numberOfChannels, buffer.length, buffer.sampleRate);
+            for (let ch = 0; ch < buffer.numberOfChannels; ch++) {
+                copy.getChannelData(ch).set(buffer.getChannelData(ch).slice().reverse());
+            }
+            return copy;
+        };
+
         class SoundEngine {
             constructor() {
-                this.ctx = new (window.AudioContext || window.webkitAudioContext)();
+                // The AudioContext is created on first use (context()), not at page load:
+                // it starts an audio thread, and browsers only let it run after a gesture
+                this.ctx = null;
+                this.unavailable = false;
+                // One persistent volume stage; each ring is a single buffer source into it
+                this.master = null;
                 this.volume = 0.5;
                 this.type = 'chime';
+                // variant ('forward' | 'reverse') -> Promise<AudioBuffer|null> for this.type
+                this.buffers = new Map();
+                // The ring sequence currently scheduled, so stop() can cancel it
+                this.sequence = null;
+                // Uploaded sounds ('custom:<id>' types), decoded once and kept across type
+                // switches; the HTTP cache already makes the re-fetch free, decoding isn't
+                this.uploads = new BufferCache(32 * 1024 * 1024);
+                this.decoding = new Map();
+            }
+
+            // The AudioContext, created on first call; null without working Web Audio,
+            // in which case rings fall back to plain <audio> elements (playElements())
+            context() {
+                if (this.ctx || this.unavailable) return this.ctx;
+                const Context = window.AudioContext || window.webkitAudioContext;
+                try {
+                    if (Context) this.ctx = new Context();
+                } catch (err) {
+                    console.warn('Web Audio unavailable, using <audio> fallback', err);
+                }
+                if (!this.ctx) {
+                    this.unavailable = true;
+                    return null;
+                }
+                this.master = this.ctx.createGain();
+                this.master.gain.value = this.volume;
+                this.master.connect(this.ctx.destination);
+                return this.ctx;
             }
 
             setVolume(val) {
                 this.volume = val / 100;
+                if (this.master) this.master.gain.value = this.volume;
             }
 
             setType(type) {
+                if (type === this.type) return;
                 this.type = type;
+                // Rendered buffers belong to the old profile
+                this.buffers.clear();
             }
 
             resume() {
-                if (this.ctx.state === 'suspended') {
-                    this.ctx.resume();
+                const ctx = this.context();
+                if (ctx && ctx.state === 'suspended') {
+                    ctx.resume();
+                }
+            }
+
+            // Decode an uploaded sound, sharing one request between concurrent callers
+            decodeUpload(url) {
+                const cached = this.uploads.get(url);
+                if (cached) return Promise.resolve(cached);
+                if (!this.decoding.has(url)) {
+                    const decoded = fetch(url)
+                        .then((resp) => {
+                            if (!resp.ok) throw new Error(`${url}: HTTP ${resp.status}`);
+                            return resp.arrayBuffer();
+                        })
+                        .then((data) => new Promise((resolve, reject) => this.ctx.decodeAudioData(data, resolve, reject)))
+                        .then((buffer) => {
+                            this.uploads.set(url, buffer, audioBufferBytes(buffer));
+                            return buffer;
+                        })
+                        .finally(() => this.decoding.delete(url));
+                    this.decoding.set(url, decoded);
+                }
+                return this.decoding.get(url);
+            }
+
+            // Render the current profile's variant once into an AudioBuffer (null if
+            // the browser has no OfflineAudioContext; play() then schedules live notes)
+            buffer(variant) {
+                if (!this.buffers.has(variant) && this.type.startsWith('custom:')) {
+                    const upload = this.decodeUpload(`/sounds/${this.type.slice('custom:'.length)}`);
+                    this.buffers.set(variant, upload
+                        .then((buffer) => (variant === 'reverse' ? reversedBuffer(this.ctx, buffer) : buffer))
+                        .catch((err) => {
+                            console.warn('Could not load uploaded sound', err);
+                            return null;
+                        }));
+                }
+                if (!this.buffers.has(variant)) {
+                    const notes = SOUND_PROFILES[this.type][variant];
+                    const Offline = window.OfflineAudioContext || window.webkitOfflineAudioContext;
+                    let rendered = Promise.resolve(null);
+                    if (Offline) {
+                        const seconds = Math.max(...notes.map(([, , start, duration]) => start + duration));
+                        const offline = new Offline(1, Math.ceil(seconds * this.ctx.sampleRate), this.ctx.sampleRate);
+                        scheduleNotes(offline, notes, offline.destination, 0);
+                        rendered = offline.startRendering().catch(() => null);
+                    }
+                    this.buffers.set(variant, rendered);
                 }
+                return this.buffers.get(variant);
             }
 
-            play(repeatCount = 1, repeatDelay = 1, reverse = false) {
+            // Seconds between a sample's scheduled audio-clock time and it leaving the
+            // speakers (large on Bluetooth); 0 where the browser doesn't report it
+            outputLatency() {
+                return (this.ctx.baseLatency || 0) + (this.ctx.outputLatency || 0);
+            }
+
+            // Ring `repeatCount` times, `repeatDelay` seconds apart. Every repeat is
+            // scheduled up front on the audio clock, so background-tab timer throttling
+            // can't stretch the gaps. With `atMs` (on clockNow()) the first ring is queued
+            // early enough to be heard at that moment, net of the output latency.
+            // Replaces any sequence still pending. Resolves to the clockNow() time the
+            // first ring is expected to be heard (null if nothing was scheduled).
+            play(repeatCount = 1, repeatDelay = 1, reverse = false, atMs = null) {
                 this.resume();
-                const playSound = (count) => {
-                    if (count <= 0) return;
-                    const t = this.ctx.currentTime;
-                    const gainNode = this.ctx.createGain();
-                    gainNode.gain.value = this.volume;
-                    gainNode.connect(this.ctx.destination);
-
-                    if (!reverse) {
-                        if (this.type === 'chime') {
-                            this.playOscillator(660, 'sine', t, 0.1, gainNode);
-                            this.playOscillator(880, 'sine', t + 0.15, 0.8, gainNode);
-                        } else if (this.type === 'digital') {
-                            this.playOscillator(800, 'square', t, 0.1, gainNode);
-                            this.playOscillator(800, 'square', t + 0.15, 0.1, gainNode);
-                        } else if (this.type === 'harp') {
-                            [440, 554, 659, 880].forEach((freq, i) => {
-                                this.playOscillator(freq, 'triangle', t + (i * 0.1), 1.5, gainNode);
-                            });
-                        } else if (this.type === 'hd2') {
-                            // Start with low sound and build up
-                            const delay = 1.25;
-                            this.playOscillator(55, 'triangle', t, delay + 1, gainNode);
-                            
-                            const step1 = 5;
-                            const step1duration = 0.75;
-                            const step2duration = 0.75;
-                            const shape = 'triangle';
-                            [110, 117, 110, 131, 123, 117, 131, 123].forEach((freq, i) => {
-                            // [220, 233, 220, 262, 247, 233, 262, 247].forEach((freq, i) => { // higher octave
-                                if (i <= step1) {
-                                    this.playOscillator(freq, shape, t + delay + (i * 0.20), step1duration, gainNode);
-                                } else {
-                                    this.playOscillator(freq, shape, t + delay + ((i - step1) * 0.10) + (step1 * 0.20), step2duration, gainNode);
-                                }
-                            });
-                        }
-                    } else {
-                        // Reverse playback: invert the sequence/timing for a reverse effect
-                        if (this.type === 'chime') {
-                            // Play the higher tone first, then the lower with reversed timing
-                            this.playOscillator(880, 'sine', t, 0.1, gainNode);
-                            this.playOscillator(660, 'sine', t + 0.15, 0.8, gainNode);
-                        } else if (this.type === 'digital') {
-                            // Longer beep first then short beep
-                            this.playOscillator(800, 'square', t, 0.1, gainNode);
-                            this.playOscillator(800, 'square', t + 0.2, 0.15, gainNode);
-                        } else if (this.type === 'harp') {
-                            // Play the harp notes in reverse order
-                            [880, 659, 554, 440].forEach((freq, i) => {
-                                this.playOscillator(freq, 'triangle', t + (i * 0.1), 1.5, gainNode);
-                            });
-                        } else if (this.type === 'hd2') {
-                            // Start with low sound and build up
-                            const delay = 1.25;
-                            this.playOscillator(55, 'triangle', t, delay + 1, gainNode);
-                            
-                            const step1 = 4;
-                            const step1duration = 0.75;
-                            const step2duration = 0.75;
-                            const shape = 'triangle';
-                            [110, 117, 110, 131, 123, 117, 110].forEach((freq, i) => {
-                                if (i <= step1) {
-                                    this.playOscillator(freq, shape, t + delay + (i * 0.20), step1duration, gainNode);
-                                } else {
-                                    this.playOscillator(freq, shape, t + delay + ((i - step1) * 0.10) + (step1 * 0.20), step2duration, gainNode);
-                                }
-                            });
+                this.stop();
+                const variant = reverse ? 'reverse' : 'forward';
+                // Unknown types (e.g. from old saved settings) stay silent, as before
+                if (!SOUND_PROFILES[this.type] && !this.type.startsWith('custom:')) return Promise.resolve(null);
+                if (!this.context()) {
+                    this.playElements(repeatCount, repeatDelay, reverse, atMs);
+                    return Promise.resolve(null);
+                }
+                const notes = SOUND_PROFILES[this.type]?.[variant];
+                const sequence = this.sequence = { nodes: [], cancelled: false };
+                return this.buffer(variant).then((buffer) => {
+                    if (sequence.cancelled) return null;
+                    const now = this.ctx.currentTime;
+                    const latency = this.outputLatency();
+                    const t0 = atMs === null ? now : Math.max(now, now + (atMs - clockNow()) / 1000 - latency);
+                    for (let i = 0; i < repeatCount; i++) {
+                        const at = t0 + i * repeatDelay;
+                        if (buffer) {
+                            const source = this.ctx.createBufferSource();
+                            source.buffer = buffer;
+                            source.connect(this.master);
+                            source.start(at);
+                            sequence.nodes.push(source);
+                        } else if (notes) {
+                            sequence.nodes.push(...scheduleNotes(this.ctx, notes, this.master, at));
                         }
                     }
+                    return clockNow() + (t0 - now + latency) * 1000;
+                });
+            }
 
-                    setTimeout(() => playSound(count - 1), repeatDelay * 1000);
-                };
-                playSound(repeatCount);
+            // Fallback without Web Audio: the server renders built-in profiles to WAV at
+            // the current volume; uploads play as stored (no reverse). Repeats are page
+            // timers here, so background tabs may stretch the gaps.
+            playElements(repeatCount, repeatDelay, reverse, atMs = null) {
+                const upload = this.type.startsWith('custom:');
+                const url = upload
+                    ? `/sounds/${this.type.slice('custom:'.length)}`
+                    : `/sounds/builtin/${this.type}.wav?volume=${Math.round(this.volume * 100)}${reverse ? '&reverse=1' : ''}`;
+                const sequence = this.sequence = { nodes: [], timers: [], cancelled: false };
+                const firstMs = atMs === null ? 0 : Math.max(0, atMs - clockNow());
+                for (let i = 0; i < repeatCount; i++) {
+                    sequence.timers.push(setTimeout(() => {
+                        const element = new Audio(url);
+                        if (upload) element.volume = this.volume;
+                        element.play().catch((err) => console.warn('Could not play sound', err));
+                        sequence.nodes.push({ stop: () => element.pause() });
+                    }, firstMs + i * repeatDelay * 1000));
+                }
             }
 
-            playOscillator(freq, type, startTime, duration, outputNode) {
-                const osc = this.ctx.createOscillator();
-                osc.type = type;
-                osc.frequency.value = freq;
-                
-                const envelope = this.ctx.createGain();
-                envelope.gain.setValueAtTime(0, startTime);
-                envelope.gain.linearRampToValueAtTime(1, startTime + 0.05);
-                envelope.gain.exponentialRampToValueAtTime(0.01, startTime + duration);
-                
-                osc.connect(envelope);
-                envelope.connect(outputNode);
-                
-                osc.start(startTime);
-                osc.stop(startTime + duration);
+            // Cancel the pending ring sequence (Skip/Reset), including repeats not yet started
+            stop() {
+                if (!this.sequence) return;
+                this.sequence.cancelled = true;
+                for (const id of this.sequence.timers || []) clearTimeout(id);
+                for (const node of this.sequence.nodes) {
+                    try {
+                        node.stop();
+                    } catch (err) {
+                        // Already stopped
+                    }
+                }
+                this.sequence = null;
             }
         }
 
         // --- App Logic ---
-        
+{{ timer_engine_js|safe }}
+        // --- Clock ---
+        // Device clocks disagree by seconds, so every timestamp the timer keeps or
+        // shares (endTimeMs, startTimeMs, sound times) is on the server's clock:
+        // clockNow() is Date.now() plus an offset estimated from /api/time probes.
+        const CLOCK_PROBES = 5;
+        // Re-estimate when a page comes back after this long (drift, sleep, NTP steps)
+        const CLOCK_RESYNC_MS = 60 * 60 * 1000;
+        const clock = { offsetMs: 0, delayMs: null, syncedAtMs: null };
+        const clockNow = () => Date.now() + clock.offsetMs;
+
+        const probeClock = async () => {
+            const t0 = Date.now();
+            const sentAt = performance.now();
+            const resp = await fetch('/api/time', { cache: 'no-store' });
+            if (!resp.ok) throw new Error(`HTTP ${resp.status}`);
+            const { t1, t2 } = await resp.json();
+            // The round trip comes from the monotonic clock, in case the wall clock steps meanwhile
+            return { t0, t1, t2, t3: t0 + (performance.now() - sentAt) };
+        };
+
+        // Probes go one at a time: concurrent ones would queue behind each other and
+        // inflate their round trips. The filter discards the slow ones (the first
+        // usually pays for connection setup).
+        const syncClock = async () => {
+            const samples = [];
+            for (let i = 0; i < CLOCK_PROBES; i++) samples.push(await probeClock());
+            Object.assign(clock, estimateClockOffset(samples), { syncedAtMs: Date.now() });
+            // Timestamps are already on the server's clock; only the countdown moves
+            if (appState.isRunning) syncEngine();
+            else updateUI();
+        };
+
         // Default State
         const appState = {
             isRunning: false,
@@ -375,7 +827,6 @@ HTML_TEMPLATE = """
             startTimeMs: null,
             endTimeMs: null,
             remainingMs: 20 * 60 * 1000,
-            finished: false,
             
             settings: {
                 focusTime: 20 * 60,
@@ -397,6 +848,8 @@ HTML_TEMPLATE = """
             progressBar: document.getElementById('progress-bar'),
             statusBadge: document.getElementById('status-badge'),
             nextText: document.getElementById('next-phase-text'),
+            heading: document.getElementById('app-heading'),
+            ruleText: document.getElementById('rule-text'),
             btnToggle: document.getElementById('btn-toggle'),
             playIcon: document.getElementById('play-icon'),
             playText: document.getElementById('play-text'),
@@ -411,9 +864,14 @@ HTML_TEMPLATE = """
                 volDisplay: document.getElementById('volume-val'),
                 theme: document.getElementById('theme-toggle'),
                 reverse: document.getElementById('reverse-toggle'),
+                notifications: document.getElementById('notification-toggle'),
                 testBtn: document.getElementById('btn-test-sound'),
+                upload: document.getElementById('sound-upload'),
+                uploadBtn: document.getElementById('btn-upload-sound'),
                 repeatCount: document.getElementById('repeat-count'),
-                repeatDelay: document.getElementById('repeat-delay')
+                repeatDelay: document.getElementById('repeat-delay'),
+                syncLink: document.getElementById('btn-sync-link'),
+                room: document.getElementById('btn-room')
             }
         };
 
@@ -431,80 +889,58 @@ HTML_TEMPLATE = """
                 notificationsEnabled: appState.settings.notificationsEnabled
             };
             localStorage.setItem('eyeTimerSettings', JSON.stringify(data));
+            queueStatePush();
+        };
+
+        // Show a toggle switch as on (brand track, knob right) or off
+        const renderToggle = (button, enabled) => {
+            const knob = button.querySelector('div');
+            button.classList.toggle('bg-brand-600', enabled);
+            button.classList.toggle('bg-slate-300', !enabled);
+            knob.classList.toggle('left-7', enabled);
+            knob.classList.toggle('left-1', !enabled);
         };
 
         const loadSettings = () => {
             const saved = localStorage.getItem('eyeTimerSettings');
-            if (saved) {
-                const data = JSON.parse(saved);
-                
-                // Apply to inputs
-                if(data.focus) els.inputs.focus.value = data.focus;
-                if(data.break) els.inputs.break.value = data.break;
-                if(data.sound) els.inputs.sound.value = data.sound;
-                if(data.volume) {
-                    els.inputs.volume.value = data.volume;
-                    els.inputs.volDisplay.textContent = `${data.volume}%`;
-                }
-                if(data.repeatCount) els.inputs.repeatCount.value = data.repeatCount;
-                if(data.repeatDelay) els.inputs.repeatDelay.value = data.repeatDelay;
-
-                // Apply to App State
-                appState.settings.focusTime = parseInt(data.focus) * 60;
-                appState.settings.breakTime = parseInt(data.break);
-                appState.settings.soundType = data.sound;
-                appState.settings.volume = parseInt(data.volume);
-                appState.settings.notificationsEnabled = data.notificationsEnabled ?? true;
-                appState.settings.repeatCount = parseInt(data.repeatCount);
-                appState.settings.repeatDelay = parseInt(data.repeatDelay);
-
-                // Apply to Audio
-                audio.setVolume(appState.settings.volume);
-                audio.setType(appState.settings.soundType);
-
-                // Apply Theme
-                if (data.theme === 'dark') {
-                    document.documentElement.classList.add('dark');
-                } else {
-                    document.documentElement.classList.remove('dark');
-                }
-
-                // Apply Notification Toggle (independent of theme)
-                const notifBtn = document.getElementById('notification-toggle');
-                const notifKnob = notifBtn.querySelector('div');
-                if (appState.settings.notificationsEnabled) {
-                    notifBtn.classList.add('bg-brand-600');
-                    notifBtn.classList.remove('bg-slate-300');
-                    notifKnob.classList.remove('left-1');
-                    notifKnob.classList.add('left-7');
-                } else {
-                    notifBtn.classList.add('bg-slate-300');
-                    notifBtn.classList.remove('bg-brand-600');
-                    notifKnob.classList.remove('left-7');
-                    notifKnob.classList.add('left-1');
-                }
-
-                // Apply Reverse Toggle
-                const revBtn = document.getElementById('reverse-toggle');
-                const revKnob = revBtn.querySelector('div');
-                appState.settings.reverseOnBreakEnd = data.reverse ?? false;
-                if (appState.settings.reverseOnBreakEnd) {
-                    revBtn.classList.remove('bg-slate-300');
-                    revBtn.classList.add('bg-brand-600');
-                    revKnob.classList.remove('left-1');
-                    revKnob.classList.add('left-7');
-                } else {
-                    revBtn.classList.add('bg-slate-300');
-                    revBtn.classList.remove('bg-brand-600');
-                    revKnob.classList.remove('left-7');
-                    revKnob.classList.add('left-1');
-                }
-            } else {
+            if (!saved) {
                 // If no save found, just ensure theme matches system or default
                 if (localStorage.getItem('theme') === 'light') {
                     document.documentElement.classList.remove('dark');
                 }
+                return;
+            }
+            const data = JSON.parse(saved);
+
+            // Apply to App State
+            appState.settings.focusTime = parseInt(data.focus) * 60;
+            appState.settings.breakTime = parseInt(data.break);
+            appState.settings.soundType = data.sound;
+            appState.settings.volume = parseInt(data.volume);
+            appState.settings.notificationsEnabled = data.notificationsEnabled ?? true;
+            appState.settings.reverseOnBreakEnd = data.reverse ?? false;
+            appState.settings.repeatCount = parseInt(data.repeatCount);
+            appState.settings.repeatDelay = parseInt(data.repeatDelay);
+
+            // Apply to Audio (only recorded; the AudioContext is created on first use)
+            audio.setVolume(appState.settings.volume);
+            audio.setType(appState.settings.soundType);
+
+            // Apply to the DOM in one write-only pass (no layout reads in between), so
+            // the first paint already shows the saved settings
+            if (data.focus) els.inputs.focus.value = data.focus;
+            if (data.break) els.inputs.break.value = data.break;
+            if (data.sound) els.inputs.sound.value = data.sound;
+            if (data.volume) {
+                els.inputs.volume.value = data.volume;
+                els.inputs.volDisplay.textContent = `${data.volume}%`;
             }
+            if (data.repeatCount) els.inputs.repeatCount.value = data.repeatCount;
+            if (data.repeatDelay) els.inputs.repeatDelay.value = data.repeatDelay;
+            document.documentElement.classList.toggle('dark', data.theme === 'dark');
+            // Toggles are independent of the theme
+            renderToggle(els.inputs.notifications, appState.settings.notificationsEnabled);
+            renderToggle(els.inputs.reverse, appState.settings.reverseOnBreakEnd);
         };
 
         // Helpers
@@ -514,84 +950,268 @@ HTML_TEMPLATE = """
             return `${mins}:${secs.toString().padStart(2, '0')}`;
         };
 
+        // --- Rendering ---
+        // Last value written per (target, property). A tick usually changes only the
+        // clock digits, so every other write is skipped and causes no style/layout work.
+        const rendered = new WeakMap();
+        const write = (target, prop, value) => {
+            let last = rendered.get(target);
+            if (!last) rendered.set(target, last = {});
+            if (last[prop] === value) return;
+            last[prop] = value;
+            target[prop] = value;
+        };
+
+        const PHASE_VIEW = {
+            focus: {
+                badge: "Focus Time",
+                badgeClass: "mb-6 px-4 py-1.5 rounded-full text-xs font-bold uppercase tracking-wider bg-brand-100 text-brand-600 dark:bg-brand-900/30 dark:text-brand-400 transition-colors",
+                next: (s) => `Next: ${s.breakTime}s Break`
+            },
+            break: {
+                badge: "Look Away (20ft)",
+                badgeClass: "mb-6 px-4 py-1.5 rounded-full text-xs font-bold uppercase tracking-wider bg-emerald-100 text-emerald-600 dark:bg-emerald-900/30 dark:text-emerald-400 transition-colors",
+                next: (s) => `Next: ${s.focusTime / 60}m Focus`
+            }
+        };
+
+        // Progress bar: while running, a linear scaleX animation that reaches 0 at
+        // endTimeMs. Transforms are composited off the main thread, so there is no
+        // per-frame script or layout; paused/reset shows a static scale instead.
+        let progressAnimation = null;
+        const renderProgress = () => {
+            const runningUntil = appState.isRunning ? appState.endTimeMs : null;
+            if (progressAnimation && progressAnimation.runningUntil === runningUntil) return;
+            if (progressAnimation) progressAnimation.cancel();
+            progressAnimation = null;
+
+            const totalMs = appState.totalTime * 1000;
+            const remainingMs = runningUntil ? Math.max(0, runningUntil - clockNow()) : appState.remainingMs;
+            const scale = totalMs > 0 ? Math.min(1, remainingMs / totalMs) : 0;
+            write(els.progressBar.style, 'transform', `scaleX(${scale})`);
+            // Without the Web Animations API the static scale is simply refreshed every tick
+            if (runningUntil && remainingMs > 0 && els.progressBar.animate) {
+                progressAnimation = els.progressBar.animate(
+                    [{ transform: `scaleX(${scale})` }, { transform: 'scaleX(0)' }],
+                    { duration: remainingMs, easing: 'linear', fill: 'forwards' }
+                );
+                progressAnimation.runningUntil = runningUntil;
+            }
+        };
+
+        // Render appState; safe to call every tick since unchanged values are never written
         const updateUI = () => {
-            els.display.textContent = formatTime(appState.timeLeft);
-            const pct = (appState.timeLeft / appState.totalTime) * 100;
-            els.progressBar.style.width = `${pct}%`;
+            write(els.display, 'textContent', formatTime(appState.timeLeft));
+            renderProgress();
 
-            // Update the title dynamically
+            const phase = PHASE_VIEW[appState.isFocus ? 'focus' : 'break'];
+            write(els.statusBadge, 'textContent', phase.badge);
+            write(els.statusBadge, 'className', phase.badgeClass);
+            write(els.nextText, 'textContent', phase.next(appState.settings));
+
+            // Title, heading and rule text follow the configured durations
             const focusMinutes = appState.settings.focusTime / 60;
             const breakSeconds = appState.settings.breakTime;
-            document.title = `${focusMinutes}-${breakSeconds}-20 Eye Timer`;
+            write(document, 'title', `${focusMinutes}-${breakSeconds}-20 Eye Timer`);
+            write(els.ruleText, 'textContent', `Look 20 feet away for ${breakSeconds} seconds every ${focusMinutes} minutes.`);
+            write(els.heading, 'textContent', `${focusMinutes}-${breakSeconds}-20`);
+        };
 
-            // Update the bottom text dynamically
-            const bottomText = `Look 20 feet away for ${breakSeconds} seconds every ${focusMinutes} minutes.`;
-            document.querySelector('.text-center p').textContent = bottomText;
+        // The sound for arriving in phase `isFocus`, heard at `atMs` (on clockNow()) or now
+        const playPhaseSound = (isFocus, atMs = null) => {
+            // If we're moving into focus (i.e., break ended) and reverse is enabled, play reversed sound
+            const reverseFlag = isFocus && appState.settings.reverseOnBreakEnd;
+            return audio.play(appState.settings.repeatCount, appState.settings.repeatDelay, reverseFlag, atMs);
+        };
 
-            // Update the H1 dynamically
-            const headerText = `${focusMinutes}-${breakSeconds}-20`;
-            document.querySelector('h1.font-bold').textContent = headerText;
+        // Noticing a boundary can take a timer wake-up, and the device adds its output
+        // latency on top. So CHIME_LEAD_MS before the boundary the next phase's sound is
+        // queued on the audio clock to be heard exactly at endTimeMs.
+        const CHIME_LEAD_MS = 3000;
+        let primedChime = null; // { endTimeMs, isFocus, sequence, heard }
+        const primeChime = () => {
+            if (!appState.isRunning || !appState.endTimeMs) return;
+            if (primedChime && primedChime.endTimeMs === appState.endTimeMs) return;
+            const remainingMs = appState.endTimeMs - clockNow();
+            if (remainingMs <= 0 || remainingMs > CHIME_LEAD_MS) return;
+            const isFocus = !appState.isFocus;
+            const heard = playPhaseSound(isFocus, appState.endTimeMs);
+            primedChime = { endTimeMs: appState.endTimeMs, isFocus, sequence: audio.sequence, heard };
+        };
+        // Drop a queued chime whose boundary is no longer coming (pause, reset, new schedule)
+        const unprimeChime = () => {
+            if (primedChime && audio.sequence === primedChime.sequence && primedChime.endTimeMs > clockNow()) {
+                audio.stop();
+            }
+            primedChime = null;
         };
 
-        const switchPhase = () => {
-                // Determine the upcoming phase (we haven't toggled yet)
-                const nextIsFocus = !appState.isFocus;
-                // If we're moving into focus (i.e., break ended) and reverse is enabled, play reversed sound
-                const reverseFlag = nextIsFocus && appState.settings.reverseOnBreakEnd;
-                audio.play(appState.settings.repeatCount, appState.settings.repeatDelay, reverseFlag);
-                appState.isFocus = nextIsFocus;
-
-                if (appState.isFocus) {
-                    // Switching to Focus
-                    appState.totalTime = appState.settings.focusTime;
-                    els.statusBadge.textContent = "Focus Time";
-                    els.statusBadge.className = "mb-6 px-4 py-1.5 rounded-full text-xs font-bold uppercase tracking-wider bg-brand-100 text-brand-600 dark:bg-brand-900/30 dark:text-brand-400 transition-colors";
-                    els.nextText.textContent = `Next: ${appState.settings.breakTime}s Break`;
-                } else {
-                    // Switching to Break
-                    appState.totalTime = appState.settings.breakTime;
-                    els.statusBadge.textContent = "Look Away (20ft)";
-                    els.statusBadge.className = "mb-6 px-4 py-1.5 rounded-full text-xs font-bold uppercase tracking-wider bg-emerald-100 text-emerald-600 dark:bg-emerald-900/30 dark:text-emerald-400 transition-colors";
-                    els.nextText.textContent = `Next: ${appState.settings.focusTime / 60}m Focus`;
-
-                    // Update notification dynamically
-                    if (appState.settings.notificationsEnabled) {
-                        new Notification("Eye Break!", { body: `Look 20 feet away for ${appState.settings.breakTime} seconds.` });
+        // Show phase `isFocus` ending at `endTimeMs`; `announce` plays the sound
+        // (and, for breaks, shows the notification) for arriving in it. Returns the
+        // sound's expected clockNow() time (see SoundEngine.play()), or null.
+        const enterPhase = (isFocus, endTimeMs, announce) => {
+                let heard = null;
+                if (announce) {
+                    const primed = primedChime;
+                    // Already queued for this boundary, and not since replaced (e.g. by a preview)
+                    if (primed && primed.endTimeMs === appState.endTimeMs && primed.isFocus === isFocus
+                        && primed.sequence && audio.sequence === primed.sequence) {
+                        heard = primed.heard;
+                    } else {
+                        heard = playPhaseSound(isFocus);
                     }
+                    primedChime = null;
+                }
+                appState.isFocus = isFocus;
+
+                // Arriving in a break: show the notification
+                if (!isFocus && announce && appState.settings.notificationsEnabled) {
+                    new Notification("Eye Break!", { body: `Look 20 feet away for ${appState.settings.breakTime} seconds.` });
                 }
 
-            // Initialize timestamps for the new phase
             appState.totalTime = appState.isFocus ? appState.settings.focusTime : appState.settings.breakTime;
-            appState.remainingMs = appState.totalTime * 1000;
-            appState.startTimeMs = Date.now();
-            appState.endTimeMs = appState.startTimeMs + appState.remainingMs;
+            appState.endTimeMs = endTimeMs;
+            appState.startTimeMs = endTimeMs - appState.totalTime * 1000;
+            appState.remainingMs = Math.max(0, endTimeMs - clockNow());
             appState.timeLeft = Math.ceil(appState.remainingMs / 1000);
-            appState.finished = false;
             updateUI();
+            return heard;
         };
 
-        const tick = () => {
-            // Only update while the timer is actively running
-            if (!appState.isRunning) return;
+        // Skip straight to the other phase, starting its full duration now
+        const switchPhase = () => {
+            const nextIsFocus = !appState.isFocus;
+            const durationMs = (nextIsFocus ? appState.settings.focusTime : appState.settings.breakTime) * 1000;
+            // The sound plays now, not at the boundary it may have been queued for
+            primedChime = null;
+            enterPhase(nextIsFocus, clockNow() + durationMs, true);
+            syncEngine();
+        };
+
+        // --- Timing Engine ---
+        // Phase boundaries are detected in a dedicated worker (TIMER_WORKER_JS), whose
+        // timers aren't throttled like a background tab's main thread. The page only
+        // renders and plays audio. Without Worker support the same engine functions
+        // run here on setTimeout.
+        // Spawned when the browser is first idle or on first start, whichever comes
+        // first: undefined until then, null if workers are unavailable or it failed
+        let timerWorker;
+        const startTimerWorker = () => {
+            if (timerWorker !== undefined) return timerWorker;
+            try {
+                const worker = timerWorker = new Worker('{{ timer_worker_url }}');
+                timerWorker.onmessage = onWorkerMessage;
+                // The script didn't load (e.g. a stale hashed URL after a deploy, or a
+                // CSP block) or threw: hand the schedule to the main-thread engine
+                timerWorker.onerror = (event) => {
+                    if (timerWorker !== worker) return;
+                    console.warn('Timer worker failed, timing on the main thread', event.message || event);
+                    worker.terminate();
+                    timerWorker = null;
+                    syncEngine();
+                };
+            } catch (err) {
+                console.warn('Timer worker unavailable, timing on the main thread', err);
+                timerWorker = null;
+            }
+            return timerWorker;
+        };
+        // Bumped on every (re)arm so events from a superseded schedule are ignored
+        let engineGeneration = 0;
+
+        // How late each phase change fired relative to its scheduled boundary, and
+        // when its sound is expected to be heard relative to it (`chimeOffsetMs`,
+        // including output latency); inspect with `eyeTimerTiming` in the console.
+        // Measurement mode (`?measure-timing`) also logs every transition as it happens.
+        const MEASURE_TIMING = new URLSearchParams(location.search).has('measure-timing');
+        const timingLog = window.eyeTimerTiming = [];
+        const recordTransition = (dueMs, firedMs, source, heard) => {
+            const entry = { dueMs, firedMs, lateMs: firedMs - dueMs, source, hidden: document.hidden, chimeOffsetMs: null };
+            timingLog.push(entry);
+            if (timingLog.length > 200) timingLog.shift();
+            Promise.resolve(heard).then((heardMs) => {
+                if (heardMs !== null) entry.chimeOffsetMs = Math.round(heardMs - dueMs);
+                if (MEASURE_TIMING) {
+                    console.info(`[eye-timer] phase change noticed ${entry.lateMs} ms late (${source}), `
+                        + `sound heard at ${entry.chimeOffsetMs ?? '?'} ms from the boundary`,
+                        { ...entry, outputLatencyMs: audio.ctx ? Math.round(audio.outputLatency() * 1000) : null });
+                }
+            });
+        };
 
-            // If no endTime set, nothing to do
-            if (!appState.endTimeMs) return;
+        // Main-thread engine: reconcile with the wall clock, render, and arm the next
+        // wake-up (per displayed second while visible, once per phase while hidden)
+        const tick = () => {
+            clearTimeout(appState.timerId);
+            appState.timerId = null;
+            if (!appState.isRunning || !appState.endTimeMs) return;
 
             // Compute remaining ms from wall-clock time so background throttling doesn't break logic
-            let remainingMs = appState.endTimeMs - Date.now();
-            // If we've missed the deadline (user was away), advance phases until caught up
-            while (remainingMs <= 0 && !appState.finished) {
-                // Mark finished for this phase to avoid infinite loop if switchPhase doesn't advance time
-                appState.finished = true;
-                switchPhase();
-                // After switching phase, recompute remainingMs for the new phase
-                if (!appState.endTimeMs) return;
-                remainingMs = appState.endTimeMs - Date.now();
-            }
-
-            appState.remainingMs = Math.max(0, remainingMs);
-            appState.timeLeft = Math.max(0, Math.ceil(appState.remainingMs / 1000));
-            updateUI();
+            const now = clockNow();
+            if (now >= appState.endTimeMs) {
+                // Past the deadline (possibly by days after a sleep): jump straight to the
+                // phase the schedule is in now; only that last transition is announced
+                const dueMs = appState.endTimeMs;
+                const next = catchUpPhase(appState.isFocus, dueMs, now,
+                    appState.settings.focusTime * 1000, appState.settings.breakTime * 1000);
+                recordTransition(dueMs, now, 'main', enterPhase(next.isFocus, next.endTimeMs, true));
+            } else {
+                appState.remainingMs = appState.endTimeMs - now;
+                appState.timeLeft = Math.max(0, Math.ceil(appState.remainingMs / 1000));
+                updateUI();
+                primeChime();
+            }
+            const delay = nextWakeupMs(appState.endTimeMs - clockNow(), document.hidden, CHIME_LEAD_MS);
+            appState.timerId = setTimeout(tick, delay);
+        };
+
+        // Hand the current schedule to the engine (or stop it when not running).
+        // Either engine evaluates immediately, so this also fast-forwards missed phases.
+        const syncEngine = () => {
+            unprimeChime();
+            const running = appState.isRunning && appState.endTimeMs;
+            // Stopping never needs to spawn the worker; only disarm one that exists
+            const worker = running ? startTimerWorker() : timerWorker;
+            if (!worker) {
+                tick();
+                return;
+            }
+            engineGeneration++;
+            if (!running) {
+                timerWorker.postMessage({ type: 'disarm' });
+                return;
+            }
+            timerWorker.postMessage({
+                type: 'arm',
+                generation: engineGeneration,
+                isFocus: appState.isFocus,
+                endTimeMs: appState.endTimeMs,
+                focusMs: appState.settings.focusTime * 1000,
+                breakMs: appState.settings.breakTime * 1000,
+                leadMs: CHIME_LEAD_MS,
+                hidden: document.hidden,
+                clockOffsetMs: clock.offsetMs
+            });
+        };
+
+        const onWorkerMessage = ({ data }) => {
+            if (data.generation !== engineGeneration || !appState.isRunning) return;
+            if (data.type === 'phase') {
+                recordTransition(data.dueMs, data.firedMs, 'worker', enterPhase(data.isFocus, data.endTimeMs, true));
+            } else {
+                appState.remainingMs = data.remainingMs;
+                appState.timeLeft = Math.max(0, Math.ceil(data.remainingMs / 1000));
+                updateUI();
+                primeChime();
+            }
+        };
+
+        // Show the main button as Pause (amber) while running, else Start/Resume
+        const renderPlayButton = (running, label) => {
+            els.playIcon.className = running ? "fa-solid fa-pause text-xl" : "fa-solid fa-play text-xl pl-1";
+            els.playText.textContent = label;
+            for (const name of ['bg-amber-500', 'hover:bg-amber-600']) els.btnToggle.classList.toggle(name, running);
+            for (const name of ['bg-brand-600', 'hover:bg-brand-500']) els.btnToggle.classList.toggle(name, !running);
         };
 
         const toggleTimer = () => {
@@ -600,71 +1220,117 @@ HTML_TEMPLATE = """
             if (appState.isRunning) {
                 // Snapshot remaining time and clear the endTime to avoid stale timestamps
                 if (appState.endTimeMs) {
-                    appState.remainingMs = Math.max(0, appState.endTimeMs - Date.now());
+                    appState.remainingMs = Math.max(0, appState.endTimeMs - clockNow());
                     appState.timeLeft = Math.max(0, Math.ceil(appState.remainingMs / 1000));
                     appState.endTimeMs = null;
                 }
 
-                clearInterval(appState.timerId);
                 appState.isRunning = false;
-                els.playIcon.className = "fa-solid fa-play text-xl pl-1";
-                els.playText.textContent = "Resume";
-                els.btnToggle.classList.remove('bg-amber-500', 'hover:bg-amber-600');
-                els.btnToggle.classList.add('bg-brand-600', 'hover:bg-brand-500');
+                syncEngine();
+                renderPlayButton(false, "Resume");
+                // Freezes the progress bar where it is
+                updateUI();
             } else {
                 // Request notification permission on first start
                 if (Notification.permission !== "granted") Notification.requestPermission();
 
                 // Initialize timestamps based on remainingMs (preserve paused remaining time)
-                appState.startTimeMs = Date.now();
+                appState.startTimeMs = clockNow();
                 appState.endTimeMs = appState.startTimeMs + (appState.remainingMs || (appState.totalTime * 1000));
 
                 // Mark running, update UI, and immediately reconcile time (handles any missed phases)
                 appState.isRunning = true;
-                els.playIcon.className = "fa-solid fa-pause text-xl";
-                els.playText.textContent = "Pause";
-                els.btnToggle.classList.remove('bg-brand-600', 'hover:bg-brand-500');
-                els.btnToggle.classList.add('bg-amber-500', 'hover:bg-amber-600');
-
-                // Run a tick immediately so we don't wait the first interval and to fast-forward if needed
-                tick();
+                renderPlayButton(true, "Pause");
 
-                // Start the main updater (timestamp-based). Frequency isn't critical because tick uses wall-clock.
-                appState.timerId = setInterval(tick, 1000);
+                // Start the engine; it reconciles immediately, fast-forwarding if needed
+                syncEngine();
             }
         };
 
         const resetTimer = () => {
-            clearInterval(appState.timerId);
             appState.isRunning = false;
+            syncEngine();
+            // Silence any repeats still queued from the last transition
+            audio.stop();
             appState.isFocus = true; // Always reset to focus
             appState.totalTime = appState.settings.focusTime;
             appState.timeLeft = appState.totalTime;
             appState.remainingMs = appState.totalTime * 1000;
-            appState.startTimeMs = Date.now();
+            appState.startTimeMs = clockNow();
             appState.endTimeMs = appState.startTimeMs + appState.remainingMs;
-            appState.finished = false;
-            
-            els.playIcon.className = "fa-solid fa-play text-xl pl-1";
-            els.playText.textContent = "Start";
-            els.btnToggle.classList.remove('bg-amber-500', 'hover:bg-amber-600');
-            els.btnToggle.classList.add('bg-brand-600', 'hover:bg-brand-500');
-            
-            els.statusBadge.textContent = "Focus Time";
-            els.statusBadge.className = "mb-6 px-4 py-1.5 rounded-full text-xs font-bold uppercase tracking-wider bg-brand-100 text-brand-600 dark:bg-brand-900/30 dark:text-brand-400 transition-colors";
-            
-            els.nextText.textContent = `Next: ${appState.settings.breakTime}s Break`;
-            
+            renderPlayButton(false, "Start");
+
             updateUI();
         };
 
         // --- Event Listeners ---
 
-        els.btnToggle.addEventListener('click', toggleTimer);
-        els.btnReset.addEventListener('click', resetTimer);
+        // Share a user's timer action with this user's other devices and a hosted room
+        const afterTimerAction = (action) => {
+            queueStatePush();
+            publishRoomState(action);
+        };
+
+        els.btnToggle.addEventListener('click', () => {
+            toggleTimer();
+            afterTimerAction(appState.isRunning ? 'start' : 'pause');
+        });
+        els.btnReset.addEventListener('click', () => {
+            resetTimer();
+            afterTimerAction('reset');
+        });
         els.btnSkip.addEventListener('click', () => {
             audio.resume();
+            // The new phase's ring replaces (cancels) any repeats still pending
             switchPhase();
+            afterTimerAction('skip');
+        });
+
+        // --- Uploaded Sounds ---
+        // The server stores uploads by content hash and keeps no list, so this browser
+        // remembers the ones it uploaded (with their file names) for the sound menu
+        const CUSTOM_SOUNDS_KEY = 'eyeTimerCustomSounds';
+        const savedCustomSounds = () => JSON.parse(localStorage.getItem(CUSTOM_SOUNDS_KEY) || '[]');
+
+        const addSoundOption = (id, name) => {
+            const value = `custom:${id}`;
+            if (![...els.inputs.sound.options].some((option) => option.value === value)) {
+                els.inputs.sound.add(new Option(name, value));
+            }
+        };
+
+        const loadCustomSounds = () => {
+            for (const { id, name } of savedCustomSounds()) addSoundOption(id, name);
+        };
+
+        const rememberCustomSound = (id, name) => {
+            const sounds = savedCustomSounds().filter((sound) => sound.id !== id);
+            sounds.push({ id, name });
+            localStorage.setItem(CUSTOM_SOUNDS_KEY, JSON.stringify(sounds));
+            addSoundOption(id, name);
+        };
+
+        els.inputs.uploadBtn.addEventListener('click', () => els.inputs.upload.click());
+        els.inputs.upload.addEventListener('change', async () => {
+            const file = els.inputs.upload.files[0];
+            if (!file) return;
+            const label = els.inputs.uploadBtn.textContent;
+            els.inputs.uploadBtn.textContent = 'Uploading...';
+            try {
+                const form = new FormData();
+                form.append('file', file);
+                const resp = await fetch('/api/sounds', { method: 'POST', body: form });
+                const data = await resp.json();
+                if (!resp.ok) throw new Error(data.error || `HTTP ${resp.status}`);
+                rememberCustomSound(data.id, file.name.replace(/\\.[^.]+$/, ''));
+                // Selected but, like every other setting, applied on "Save & Reset"
+                els.inputs.sound.value = `custom:${data.id}`;
+            } catch (err) {
+                alert(`Upload failed: ${err.message}`);
+            } finally {
+                els.inputs.uploadBtn.textContent = label;
+                els.inputs.upload.value = '';
+            }
         });
 
         // Test Sound Button
@@ -708,6 +1374,7 @@ HTML_TEMPLATE = """
             
             saveSettings(); // Save to LocalStorage
             resetTimer();
+            publishRoomState('reset');
             els.modal.classList.add('hidden');
         });
 
@@ -718,76 +1385,852 @@ HTML_TEMPLATE = """
         });
 
         // Notification Toggle (independent of theme)
-        const notificationToggle = document.getElementById('notification-toggle');
-        notificationToggle.addEventListener('click', () => {
-            const enabled = !appState.settings.notificationsEnabled;
-            appState.settings.notificationsEnabled = enabled;
-            const knob = notificationToggle.querySelector('div');
-            if (enabled) {
-                notificationToggle.classList.add('bg-brand-600');
-                notificationToggle.classList.remove('bg-slate-300');
-                knob.classList.remove('left-1');
-                knob.classList.add('left-7');
-            } else {
-                notificationToggle.classList.add('bg-slate-300');
-                notificationToggle.classList.remove('bg-brand-600');
-                knob.classList.remove('left-7');
-                knob.classList.add('left-1');
-            }
+        els.inputs.notifications.addEventListener('click', () => {
+            appState.settings.notificationsEnabled = !appState.settings.notificationsEnabled;
+            renderToggle(els.inputs.notifications, appState.settings.notificationsEnabled);
             saveSettings();
         });
 
         // Reverse Toggle (play reverse sound when break ends)
-        const reverseToggleBtn = document.getElementById('reverse-toggle');
-        reverseToggleBtn.addEventListener('click', () => {
-            const enabled = !appState.settings.reverseOnBreakEnd;
-            appState.settings.reverseOnBreakEnd = enabled;
-            const knob = reverseToggleBtn.querySelector('div');
-            if (enabled) {
-                reverseToggleBtn.classList.add('bg-brand-600');
-                reverseToggleBtn.classList.remove('bg-slate-300');
-                knob.classList.remove('left-1');
-                knob.classList.add('left-7');
+        els.inputs.reverse.addEventListener('click', () => {
+            appState.settings.reverseOnBreakEnd = !appState.settings.reverseOnBreakEnd;
+            renderToggle(els.inputs.reverse, appState.settings.reverseOnBreakEnd);
+            saveSettings();
+        });
+
+        // --- Sync Across Devices ---
+        // With a sync key (created by "Copy sync link", or arriving in a `#sync=` link)
+        // the timer and settings are also stored on the server (/api/state). Each user
+        // action sends only the fields it changed, conditional on the version last seen;
+        // opening or returning to the page is one conditional GET, a bodiless 304 when
+        // no other device has written since.
+        const SYNC_KEY_STORAGE = 'eyeTimerSyncKey';
+        const syncState = { key: localStorage.getItem(SYNC_KEY_STORAGE), version: 0, remote: { timer: {}, settings: {} } };
+        let syncQueued = false;
+        let syncInFlight = null;
+
+        const timerSnapshot = () => ({
+            isFocus: appState.isFocus,
+            isRunning: appState.isRunning,
+            // A running timer is described by its end time, a stopped one by what's left
+            endTimeMs: appState.isRunning ? appState.endTimeMs : null,
+            remainingMs: appState.isRunning ? null : appState.remainingMs
+        });
+        const settingsSnapshot = () => JSON.parse(localStorage.getItem('eyeTimerSettings') || '{}');
+
+        // Fields of `next` that differ from `prev`, as a merge patch (null removes a field)
+        const changedFields = (prev, next) => {
+            const delta = {};
+            for (const [name, value] of Object.entries(next)) {
+                if ((prev[name] ?? null) !== (value ?? null)) delta[name] = value ?? null;
+            }
+            return delta;
+        };
+
+        const rememberRemote = (version, state) => {
+            syncState.version = version;
+            syncState.remote = { timer: state.timer || {}, settings: state.settings || {} };
+        };
+
+        // Copy `link` to the clipboard, confirming on `button`
+        const shareLink = async (button, link, promptText) => {
+            const label = button.textContent;
+            try {
+                await navigator.clipboard.writeText(link);
+                button.textContent = 'Link copied';
+                setTimeout(() => { button.textContent = label; }, 2000);
+            } catch (err) {
+                // No clipboard access (e.g. plain http on the LAN): show it instead
+                prompt(promptText, link);
+            }
+        };
+
+        const sendStateDelta = async () => {
+            const delta = {};
+            for (const [part, snapshot] of [['timer', timerSnapshot()], ['settings', settingsSnapshot()]]) {
+                const changed = changedFields(syncState.remote[part], snapshot);
+                if (Object.keys(changed).length) delta[part] = changed;
+            }
+            if (!Object.keys(delta).length) return;
+            const resp = await fetch(`/api/state/${syncState.key}`, {
+                method: 'PATCH',
+                headers: { 'Content-Type': 'application/merge-patch+json', 'If-Match': `"${syncState.version}"` },
+                body: JSON.stringify(delta)
+            });
+            const data = await resp.json();
+            if (resp.status === 412) {
+                // Another device wrote first: rebase on its version and resend what still differs
+                rememberRemote(data.version, data.state);
+                return sendStateDelta();
+            }
+            if (!resp.ok) throw new Error(data.error || `HTTP ${resp.status}`);
+            syncState.version = data.version;
+            for (const [part, changed] of Object.entries(delta)) syncState.remote[part] = { ...syncState.remote[part], ...changed };
+        };
+
+        // Send local changes once the current handler has finished (a settings save
+        // also resets the timer: one PATCH carries both). One request at a time.
+        const queueStatePush = () => {
+            if (!syncState.key || syncQueued) return;
+            syncQueued = true;
+            setTimeout(async () => {
+                await syncInFlight;
+                syncQueued = false;
+                syncInFlight = sendStateDelta().catch((err) => console.warn('State sync failed', err));
+            }, 0);
+        };
+
+        // Take over a timer from elsewhere (a timerSnapshot()), fast-forwarding past
+        // phases that ended meanwhile; `announce` plays the sound for the phase it lands in
+        const applyTimerState = (timer, announce = false) => {
+            const focusMs = appState.settings.focusTime * 1000;
+            const breakMs = appState.settings.breakTime * 1000;
+            appState.isRunning = Boolean(timer.isRunning && timer.endTimeMs);
+            if (appState.isRunning) {
+                const now = clockNow();
+                const next = now >= timer.endTimeMs
+                    ? catchUpPhase(timer.isFocus, timer.endTimeMs, now, focusMs, breakMs)
+                    : { isFocus: timer.isFocus, endTimeMs: timer.endTimeMs };
+                enterPhase(next.isFocus, next.endTimeMs, announce);
+                renderPlayButton(true, "Pause");
             } else {
-                reverseToggleBtn.classList.add('bg-slate-300');
-                reverseToggleBtn.classList.remove('bg-brand-600');
-                knob.classList.remove('left-7');
-                knob.classList.add('left-1');
+                appState.isFocus = timer.isFocus;
+                appState.totalTime = timer.isFocus ? appState.settings.focusTime : appState.settings.breakTime;
+                appState.remainingMs = timer.remainingMs ?? appState.totalTime * 1000;
+                appState.timeLeft = Math.ceil(appState.remainingMs / 1000);
+                appState.startTimeMs = clockNow();
+                appState.endTimeMs = appState.startTimeMs + appState.remainingMs;
+                renderPlayButton(false, appState.remainingMs < appState.totalTime * 1000 ? "Resume" : "Start");
+                updateUI();
             }
-            saveSettings();
+            syncEngine();
+        };
+
+        // Take over the stored state: settings first (they set the phase lengths), then the timer
+        const applyRemoteState = (state) => {
+            if (state.settings) {
+                localStorage.setItem('eyeTimerSettings', JSON.stringify({ ...settingsSnapshot(), ...state.settings }));
+                loadSettings();
+            }
+            if (state.timer && state.timer.isFocus !== undefined) applyTimerState(state.timer);
+        };
+
+        const pullState = async () => {
+            // Local changes waiting to be sent take precedence over the stored copy, and
+            // a followed room over both
+            if (!syncState.key || syncQueued || room.source) return;
+            await syncInFlight;
+            const resp = await fetch(`/api/state/${syncState.key}`, {
+                headers: { 'If-None-Match': `"${syncState.version}"` },
+                cache: 'no-store'
+            });
+            if (resp.status === 304) return;
+            if (resp.status === 404) {
+                // First device on this key: what's here becomes its first version
+                queueStatePush();
+                return;
+            }
+            const data = await resp.json();
+            if (!resp.ok) throw new Error(data.error || `HTTP ${resp.status}`);
+            rememberRemote(data.version, data.state);
+            applyRemoteState(data.state);
+        };
+
+        els.inputs.syncLink.addEventListener('click', async () => {
+            if (!syncState.key) {
+                const bytes = crypto.getRandomValues(new Uint8Array(16));
+                syncState.key = btoa(String.fromCharCode(...bytes)).replaceAll('+', '-').replaceAll('/', '_').replaceAll('=', '');
+                localStorage.setItem(SYNC_KEY_STORAGE, syncState.key);
+                queueStatePush();
+            }
+            shareLink(els.inputs.syncLink, `${location.origin}/#sync=${syncState.key}`, 'Open this link on your other devices:');
         });
 
-        // Init
+        // --- Shared Rooms ---
+        // A host's start/pause/skip/reset goes to rooms_server.py, which streams it to
+        // every page that opened the room's `#room=` link (Server-Sent Events). Viewers
+        // follow the host's timer and phase lengths; their own controls are disabled.
+        const ROOMS_URL = {{ rooms_url|tojson }} || `${location.protocol}//${location.hostname}:{{ rooms_port }}`;
+        const ROOM_HOST_KEY = 'eyeTimerRoomHost';
+        const room = { id: null, token: null, source: null, events: 0 };
+
+        const publishRoomState = (action) => {
+            if (!room.token) return;
+            fetch(`${ROOMS_URL}/rooms/${room.id}/actions`, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json', Authorization: `Bearer ${room.token}` },
+                body: JSON.stringify({
+                    action,
+                    timer: timerSnapshot(),
+                    focusTime: appState.settings.focusTime,
+                    breakTime: appState.settings.breakTime
+                })
+            }).then((resp) => {
+                // Rooms live in the rooms server's memory; after a restart, host a new one
+                if (resp.status === 404) {
+                    localStorage.removeItem(ROOM_HOST_KEY);
+                    Object.assign(room, { id: null, token: null });
+                    els.inputs.room.textContent = 'Host a room';
+                }
+            }).catch((err) => console.warn('Room broadcast failed', err));
+        };
+
+        const setTimerControlsEnabled = (enabled) => {
+            for (const button of [els.btnToggle, els.btnReset, els.btnSkip]) {
+                button.disabled = !enabled;
+                button.classList.toggle('opacity-50', !enabled);
+            }
+        };
+
+        const followRoom = (id) => {
+            room.id = id;
+            setTimerControlsEnabled(false);
+            els.inputs.room.textContent = 'Leave room';
+            // EventSource reconnects by itself, sending Last-Event-ID so an up-to-date
+            // viewer isn't sent the state again
+            room.source = new EventSource(`${ROOMS_URL}/rooms/${id}/events`);
+            room.source.addEventListener('state', ({ data }) => {
+                const state = JSON.parse(data);
+                // The host's phase lengths, for this session only (not saved)
+                appState.settings.focusTime = state.focusTime;
+                appState.settings.breakTime = state.breakTime;
+                // A skip rings as it would for the host; the state found on joining doesn't
+                applyTimerState(state.timer, state.action === 'skip' && room.events++ > 0);
+            });
+        };
+
+        const leaveRoom = () => {
+            room.source.close();
+            Object.assign(room, { id: null, source: null, events: 0 });
+            history.replaceState(null, '', location.pathname + location.search);
+            setTimerControlsEnabled(true);
+            els.inputs.room.textContent = 'Host a room';
+            loadSettings(); // Back to this device's own phase lengths
+            resetTimer();
+        };
+
+        els.inputs.room.addEventListener('click', async () => {
+            if (room.source) {
+                leaveRoom();
+                return;
+            }
+            if (!room.token) {
+                try {
+                    const resp = await fetch(`${ROOMS_URL}/rooms`, { method: 'POST' });
+                    const data = await resp.json();
+                    if (!resp.ok) throw new Error(data.error || `HTTP ${resp.status}`);
+                    Object.assign(room, { id: data.room, token: data.token });
+                } catch (err) {
+                    alert(`Could not create a room: ${err.message}`);
+                    return;
+                }
+                localStorage.setItem(ROOM_HOST_KEY, JSON.stringify({ room: room.id, token: room.token }));
+                publishRoomState('host'); // Viewers joining from now on get the current timer
+                els.inputs.room.textContent = 'Copy room link';
+            }
+            shareLink(els.inputs.room, `${location.origin}/#room=${room.id}`, 'Share this link with your room:');
+        });
+
+        // Run `fn` once the browser has nothing more urgent to do
+        const whenIdle = (fn) => (window.requestIdleCallback ? requestIdleCallback(fn, { timeout: 2000 }) : setTimeout(fn, 200));
+
+        // Init: only what the first paint needs. Audio is set up on first use, the
+        // timing worker and service worker once the page is idle.
+        loadCustomSounds(); // Menu entries must exist before the saved choice is applied
         loadSettings(); // Load from storage
         resetTimer();   // Initialize with loaded settings
+        whenIdle(startTimerWorker);
+
+        // A sync link joins this device to the key (which then leaves the URL); a room
+        // link stays, so reloading keeps following the room. Then resume from the stored state.
+        const linkParams = new URLSearchParams(location.hash.slice(1));
+        if (linkParams.has('sync')) {
+            syncState.key = linkParams.get('sync');
+            localStorage.setItem(SYNC_KEY_STORAGE, syncState.key);
+            linkParams.delete('sync');
+            history.replaceState(null, '', location.pathname + location.search + (linkParams.toString() ? `#${linkParams}` : ''));
+        }
+        const hostedRoom = JSON.parse(localStorage.getItem(ROOM_HOST_KEY) || 'null');
+        if (hostedRoom) {
+            Object.assign(room, { id: hostedRoom.room, token: hostedRoom.token });
+            els.inputs.room.textContent = 'Copy room link';
+        }
+        if (linkParams.has('room') && linkParams.get('room') !== room.id) followRoom(linkParams.get('room'));
+        pullState().catch((err) => console.warn('State sync failed', err));
+        const resyncClock = () => syncClock().catch((err) => console.warn('Clock sync failed', err));
+        resyncClock();
 
-        // If page visibility changes (user returns), recompute immediately
+        // On visibility changes, recompute immediately and re-arm in the matching
+        // mode (per-second display vs. a single phase-boundary timer)
         document.addEventListener('visibilitychange', () => {
-            // Only run tick when the timer is actively running
-            if (!document.hidden && appState.isRunning) tick();
+            // Only resync when the timer is actively running
+            if (appState.isRunning) syncEngine();
+            if (document.hidden) return;
+            // Another device may have paused, skipped or changed settings meanwhile
+            pullState().catch((err) => console.warn('State sync failed', err));
+            if (clock.syncedAtMs === null || Date.now() - clock.syncedAtMs > CLOCK_RESYNC_MS) resyncClock();
         });
+{% if service_worker %}
 
-        // rAF loop for smooth progress when visible; setInterval fallback handles backgrounded checks
-        const rAFLoop = () => {
-            if (appState.isRunning && !document.hidden && appState.endTimeMs) {
-                // Light-weight update for progress bar and small visual smoothness
-                const remainingMs = Math.max(0, appState.endTimeMs - Date.now());
-                const remainingSec = Math.ceil(remainingMs / 1000);
-                const pct = (remainingSec / appState.totalTime) * 100;
-                els.progressBar.style.width = `${pct}%`;
-            }
-            requestAnimationFrame(rAFLoop);
+        // Offline app shell: repeat loads are answered from the service worker cache
+        if ('serviceWorker' in navigator) {
+            window.addEventListener('load', () => whenIdle(() => {
+                navigator.serviceWorker.register('/sw.js').catch((err) => console.warn('Service worker registration failed', err));
+            }));
+        }
+{% endif %}
+
+        // Startup trace: the page is interactive once init has run and every handler
+        // is bound; paints come from the Paint Timing API. Inspect `eyeTimerStartup`
+        // in the console. With `?startup-trace` it is also logged and posted to the
+        // embedding page (see benchmarks/startup_trace.py).
+        const startupTrace = window.eyeTimerStartup = {
+            interactiveMs: Math.round(performance.now()),
+            firstPaintMs: null,
+            firstContentfulPaintMs: null
+        };
+        const publishStartupTrace = () => {
+            if (!new URLSearchParams(location.search).has('startup-trace')) return;
+            console.info('[eye-timer] startup', startupTrace);
+            if (window.parent !== window) window.parent.postMessage({ eyeTimerStartup: startupTrace }, '*');
         };
-        requestAnimationFrame(rAFLoop);
+        if (window.PerformanceObserver && (PerformanceObserver.supportedEntryTypes || []).includes('paint')) {
+            new PerformanceObserver((list, observer) => {
+                for (const entry of list.getEntries()) {
+                    const key = entry.name === 'first-paint' ? 'firstPaintMs' : 'firstContentfulPaintMs';
+                    startupTrace[key] = Math.round(entry.startTime);
+                }
+                if (startupTrace.firstContentfulPaintMs !== null) {
+                    observer.disconnect();
+                    publishStartupTrace();
+                }
+            }).observe({ type: 'paint', buffered: true });
+        } else {
+            publishStartupTrace();
+        }
 
     </script>
 </body>
 </html>
 """
 
+# Service worker precaching the app shell. Rendered at startup with the list of
+# URLs to precache and a version derived from their content, so every deploy
+# that changes the page or an asset gets fresh cache names.
+SERVICE_WORKER_TEMPLATE = """
+const VERSION = {{ version|tojson }};
+const SHELL_CACHE = `eye-timer-shell-${VERSION}`;
+const RUNTIME_CACHE = `eye-timer-runtime-${VERSION}`;
+const PRECACHE = {{ precache|tojson }};
+const CDN_HOSTS = {{ cdn_hosts|tojson }};
+
+// No skipWaiting() or clients.claim(): pages already open run the previous
+// version's shell, which references its hashed assets, and only its caches still
+// have them after a deploy. This version takes over once those pages are gone.
+self.addEventListener('install', (event) => {
+    event.waitUntil(caches.open(SHELL_CACHE).then((cache) => cache.addAll(PRECACHE)));
+});
+
+self.addEventListener('activate', (event) => {
+    // Drop caches left behind by previous versions; no page uses them any more
+    event.waitUntil(
+        caches.keys().then((keys) => Promise.all(keys
+            .filter((key) => key.startsWith('eye-timer-') && key !== SHELL_CACHE && key !== RUNTIME_CACHE)
+            .map((key) => caches.delete(key))))
+    );
+});
+
+// Answer from cache immediately and refresh the cached copy in the background
+const staleWhileRevalidate = (event, cacheName, cacheKey) => {
+    const refresh = fetch(event.request).then((response) => {
+        if (response.ok || response.type === 'opaque') {
+            const copy = response.clone();
+            caches.open(cacheName).then((cache) => cache.put(cacheKey, copy));
+        }
+        return response;
+    });
+    event.waitUntil(refresh.catch(() => undefined));
+    return caches.match(cacheKey).then((cached) => cached || refresh);
+};
+
+// Hashed assets never change, so a cached copy is always current
+const cacheFirst = (event) => caches.match(event.request).then((cached) => cached || fetch(event.request).then((response) => {
+    if (response.ok) {
+        const copy = response.clone();
+        caches.open(RUNTIME_CACHE).then((cache) => cache.put(event.request, copy));
+    }
+    return response;
+}));
+
+self.addEventListener('fetch', (event) => {
+    const { request } = event;
+    if (request.method !== 'GET') return;
+    const url = new URL(request.url);
+
+    if (url.origin === self.location.origin) {
+        if (request.mode === 'navigate' || url.pathname === '/') {
+            // Every navigation gets the app shell, whatever the query string
+            event.respondWith(staleWhileRevalidate(event, SHELL_CACHE, '/'));
+        } else if (url.pathname.startsWith('/assets/')) {
+            event.respondWith(cacheFirst(event));
+        } else if (PRECACHE.includes(url.pathname)) {
+            event.respondWith(staleWhileRevalidate(event, SHELL_CACHE, url.pathname));
+        }
+    } else if (CDN_HOSTS.includes(url.hostname)) {
+        event.respondWith(staleWhileRevalidate(event, RUNTIME_CACHE, request));
+    }
+});
+"""
+
+class PrecompressedResponse:
+    """A response body built once and kept in memory with its compressed variants."""
+
+    # Server preference when the client accepts several encodings
+    ENCODINGS = ('br', 'gzip')
+
+    def __init__(self, body, mimetype):
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        self.mimetype = mimetype
+        self.digest = hashlib.sha256(body).hexdigest()[:32]
+        self.variants = {'identity': body}
+
+        compressed = {'gzip': gzip.compress(body, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            compressed['br'] = brotli.compress(body, quality=11)
+        for encoding, data in compressed.items():
+            # Tiny bodies can grow when compressed; only keep variants that pay off
+            if len(data) < len(body):
+                self.variants[encoding] = data
+
+        # Each representation gets its own strong ETag so caches never mix encodings
+        self.etags = {
+            encoding: self.digest if encoding == 'identity' else f'{self.digest}-{encoding}'
+            for encoding in self.variants
+        }
+
+    @classmethod
+    def from_export(cls, variants):
+        """Rebuild a response from its exported {encoding: (body, headers)} without recompressing."""
+        self = cls.__new__(cls)
+        self.mimetype = variants['identity'][1]['Content-Type'].split(';')[0]
+        self.variants = {encoding: body for encoding, (body, _) in variants.items()}
+        self.etags = {encoding: headers['ETag'].strip('"') for encoding, (_, headers) in variants.items()}
+        self.digest = self.etags['identity']
+        return self
+
+    def negotiate(self, accept_encodings):
+        """Pick the preferred encoding the client accepts, falling back to identity."""
+        for encoding in self.ENCODINGS:
+            if encoding in self.variants and accept_encodings[encoding] > 0:
+                return encoding
+        return 'identity'
+
+    def serve(self, cache_control):
+        """Build the response for the current request, answering If-None-Match with 304."""
+        encoding = self.negotiate(request.accept_encodings)
+        headers = {
+            'Cache-Control': cache_control,
+            'ETag': f'"{self.etags[encoding]}"',
+            'Vary': 'Accept-Encoding',
+        }
+        # Only the negotiated variant's tag: a cache holding another encoding's body
+        # must not be told that body is still right for this request
+        if request.if_none_match.contains_weak(self.etags[encoding]):
+            return app.response_class(status=304, headers=headers)
+
+        if encoding != 'identity':
+            headers['Content-Encoding'] = encoding
+        return app.response_class(self.variants[encoding], mimetype=self.mimetype, headers=headers)
+
+
+# Content-hashed static assets, keyed by URL path
+ASSETS = {}
+
+
+def register_asset(name, body, mimetype):
+    """Register an in-memory asset and return its hashed URL, e.g. /assets/app.1a2b3c4d5e6f.css."""
+    asset = PrecompressedResponse(body, mimetype)
+    stem, ext = os.path.splitext(name)
+    url = f'/assets/{stem}.{asset.digest[:12]}{ext}'
+    ASSETS[url] = asset
+    return url
+
+
+def build_font_assets():
+    """Register the vendored fonts.
+
+    Returns (stylesheet URL, font URLs worth preloading, text families the
+    manifest has no face for).
+    """
+    fonts_dir = os.path.join(STATIC_DIR, 'fonts')
+    try:
+        with open(os.path.join(fonts_dir, 'fonts.json')) as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        # Nothing vendored yet: the theme's generic fallbacks take over
+        manifest = []
+
+    rules, preloads = [], []
+    for entry in manifest:
+        with open(os.path.join(fonts_dir, entry['file']), 'rb') as f:
+            url = register_asset(entry['file'], f.read(), 'font/woff2')
+        if entry.get('preload'):
+            preloads.append(url)
+        rules.append(
+            f'@font-face{{font-family:"{entry["family"]}";font-style:normal;font-weight:{entry["weight"]};'
+            f'font-display:{entry.get("display", "swap")};src:url({url}) format("woff2")}}'
+        )
+    rules.append(FONTAWESOME_CSS)
+    rules.extend(f'.fa-{name}::before{{content:"\\{codepoint}"}}' for name, codepoint in FONTAWESOME_ICONS.items())
+    vendored = {entry['family'] for entry in manifest}
+    missing = [family for family in GOOGLE_FONT_FAMILIES if family not in vendored]
+    return register_asset('fonts.css', ''.join(rules), 'text/css'), preloads, missing
+
+
+def template_context():
+    """Values HTML_TEMPLATE is rendered with, building any assets it links to."""
+    context = {
+        'asset_source': ASSET_SOURCE,
+        'fontawesome_version': FONTAWESOME_VERSION,
+        'service_worker': SERVICE_WORKER,
+        'tailwind_mode': TAILWIND_MODE,
+        'tailwind_theme': TAILWIND_THEME,
+        'sound_cache_js': SOUND_CACHE_JS,
+        'sound_profiles': SOUND_PROFILES,
+        'rooms_url': ROOMS_URL,
+        'rooms_port': ROOMS_PORT,
+        'timer_engine_js': TIMER_ENGINE_JS,
+        'timer_worker_url': register_asset('timer-worker.js', TIMER_ENGINE_JS + TIMER_WORKER_JS, 'text/javascript'),
+    }
+    if ASSET_SOURCE == 'cdn':
+        context['google_fonts_url'] = google_fonts_url(list(GOOGLE_FONT_FAMILIES))
+    else:
+        context['fonts_css_url'], context['font_preloads'], missing = build_font_assets()
+        context['google_fonts_url'] = google_fonts_url(missing) if GOOGLE_FONTS_FALLBACK else None
+    if TAILWIND_MODE != 'cdn':
+        css = compile_tailwind(HTML_TEMPLATE, TAILWIND_THEME)
+        context['tailwind_css'] = css
+        context['tailwind_css_url'] = register_asset('tailwind.css', css, 'text/css')
+    return context
+
+
+def minify_css(css):
+    """Drop comments and insignificant whitespace from hand-written CSS."""
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};,>])\s*', r'\1', css)
+    return css.replace(';}', '}').strip()
+
+
+def minify_js(js):
+    """Drop indentation, blank lines and whole-line // comments.
+
+    Deliberately line-based: nothing is renamed or joined, so line breaks (and
+    automatic semicolon insertion) are untouched. Lines inside a multi-line
+    template literal are kept verbatim.
+    """
+    lines, in_template = [], False
+    for line in js.splitlines():
+        if in_template:
+            lines.append(line)
+        elif line.strip() and not line.strip().startswith('//'):
+            lines.append(line.strip())
+        if (line.count('`') - line.count('\\`')) % 2:
+            in_template = not in_template
+    return '\n'.join(lines)
+
+
+def minify_html(html):
+    """Drop indentation, blank lines and comments (the page has no <pre> or <textarea>)."""
+    html = re.sub(r'<!--.*?-->', '', html, flags=re.S)
+    return '\n'.join(line.strip() for line in html.splitlines() if line.strip())
+
+
+def bundle_page(html):
+    """Move the page's own inline <style> and <script> into hashed app.css/app.js assets.
+
+    Both are the last inline block of their kind; earlier ones (the inline Tailwind
+    build, the Play CDN config) stay where they are.
+    """
+    style = list(re.finditer(r'<style>(.*?)</style>', html, re.S))[-1]
+    css_url = register_asset('app.css', minify_css(style.group(1)), 'text/css')
+    html = f'{html[:style.start()]}<link rel="stylesheet" href="{css_url}">{html[style.end():]}'
+    script = list(re.finditer(r'<script>(.*?)</script>', html, re.S))[-1]
+    js_url = register_asset('app.js', minify_js(script.group(1)), 'text/javascript')
+    html = f'{html[:script.start()]}<script src="{js_url}"></script>{html[script.end():]}'
+    return minify_html(html)
+
+
+def render_index():
+    """Render HTML_TEMPLATE through Jinja once; the result never changes at runtime."""
+    with app.app_context():
+        html = render_template_string(HTML_TEMPLATE, **template_context())
+    return bundle_page(html) if BUNDLE_ASSETS else html
+
+
+def render_service_worker():
+    """Render the service worker for the current page and asset set."""
+    precache = ['/', '/favicon.png', *ASSETS]
+    # Any change to the page or an asset yields a new version and new cache names
+    version = hashlib.sha256(' '.join([INDEX_PAGE.digest, *precache]).encode()).hexdigest()[:12]
+    cdn_hosts = ['cdn.tailwindcss.com', 'cdnjs.cloudflare.com', 'fonts.googleapis.com', 'fonts.gstatic.com']
+    with app.app_context():
+        return render_template_string(SERVICE_WORKER_TEMPLATE, version=version, precache=precache, cdn_hosts=cdn_hosts)
+
+
+def load_export():
+    """The prebuilt routes from a current export in BUILD_DIR, or None to build them here."""
+    if not os.path.exists(os.path.join(BUILD_DIR, 'manifest.json')):
+        return None
+    import stdlib_server
+    build = stdlib_server.read_build(BUILD_DIR)
+    return build and build[0]
+
+
+EXPORTED_ROUTES = load_export()
+if EXPORTED_ROUTES:
+    # Same bytes and ETags as a fresh build, minus Jinja, Tailwind and brotli at startup
+    ASSETS.update((path, PrecompressedResponse.from_export(variants))
+                  for path, variants in EXPORTED_ROUTES.items() if path.startswith('/assets/'))
+    INDEX_PAGE = PrecompressedResponse.from_export(EXPORTED_ROUTES['/'])
+    SERVICE_WORKER_SCRIPT = PrecompressedResponse.from_export(EXPORTED_ROUTES['/sw.js'])
+else:
+    INDEX_PAGE = PrecompressedResponse(render_index(), 'text/html')
+    SERVICE_WORKER_SCRIPT = PrecompressedResponse(render_service_worker(), 'text/javascript')
+
+
 @app.route('/')
 def index():
-    return render_template_string(HTML_TEMPLATE)
+    return INDEX_PAGE.serve(INDEX_CACHE_CONTROL)
+
+@app.route('/assets/<path:filename>')
+def assets(filename):
+    asset = ASSETS.get(f'/assets/{filename}')
+    if asset is None:
+        abort(404)
+    return asset.serve(ASSET_CACHE_CONTROL)
+
+@app.route('/sw.js')
+def service_worker():
+    resp = SERVICE_WORKER_SCRIPT.serve(INDEX_CACHE_CONTROL)
+    resp.headers['Service-Worker-Allowed'] = '/'
+    return resp
+
+@app.route('/healthz')
+def healthz():
+    # Liveness probe: no template, no I/O, nothing worth caching
+    return 'ok', 200, {'Content-Type': 'text/plain', 'Cache-Control': 'no-store'}
+
+def answer_clock_probes(wsgi_app):
+    """Wrap `wsgi_app` so GET /api/time is answered before Flask sees the request.
+
+    A probe returns the server's wall clock, in ms, when the request arrived
+    (`t1`) and when the reply was built (`t2`), for the page's NTP-style offset
+    estimate. Pages send a handful on every load, so they skip routing and the
+    request/response objects entirely.
+    """
+    def middleware(environ, start_response):
+        if environ.get('PATH_INFO') != '/api/time':
+            return wsgi_app(environ, start_response)
+        received = time.time()
+        if environ['REQUEST_METHOD'] not in ('GET', 'HEAD'):
+            start_response('405 METHOD NOT ALLOWED', [('Allow', 'GET, HEAD'), ('Content-Length', '0')])
+            return []
+        body = clock_probe_body(received)
+        start_response('200 OK', [('Content-Type', 'application/json'), ('Content-Length', str(len(body))),
+                                  ('Cache-Control', 'no-store')])
+        return [] if environ['REQUEST_METHOD'] == 'HEAD' else [body]
+    return middleware
+
+app.wsgi_app = answer_clock_probes(app.wsgi_app)
+
+def sniff_audio(data):
+    """Return the AUDIO_TYPES extension matching the file's leading bytes, or None."""
+    if data[:4] == b'RIFF' and data[8:12] == b'WAVE':
+        return 'wav'
+    if data[:4] == b'OggS':
+        return 'ogg'
+    if data[:4] == b'fLaC':
+        return 'flac'
+    if data[4:8] == b'ftyp':
+        return 'm4a'
+    if data[:4] == b'\x1a\x45\xdf\xa3':
+        return 'webm'
+    # ID3 tag, or a bare MPEG audio frame sync
+    if data[:3] == b'ID3' or (len(data) > 1 and data[0] == 0xFF and data[1] & 0xE0 == 0xE0):
+        return 'mp3'
+    return None
+
+@app.route('/api/sounds', methods=['POST'])
+def upload_sound():
+    upload = request.files.get('file')
+    if upload is None:
+        return {'error': 'expected a multipart "file" field'}, 400
+    data = upload.read(MAX_SOUND_BYTES + 1)
+    if len(data) > MAX_SOUND_BYTES:
+        return {'error': f'sounds are limited to {MAX_SOUND_BYTES} bytes'}, 413
+    ext = sniff_audio(data)
+    if ext is None:
+        return {'error': f'unsupported audio format (expected {", ".join(AUDIO_TYPES)})'}, 415
+
+    # Content-addressed: the same file uploaded twice is stored (and cached) once
+    name = f'{hashlib.sha256(data).hexdigest()}.{ext}'
+    path = os.path.join(SOUNDS_DIR, name)
+    created = not os.path.exists(path)
+    if created:
+        write_atomically(path, data)
+    body = {'id': name, 'url': f'/sounds/{name}', 'size': len(data), 'type': AUDIO_TYPES[ext]}
+    return body, 201 if created else 200
+
+@app.route('/sounds/<name>')
+def sound(name):
+    if not SOUND_NAME.fullmatch(name):
+        abort(404)
+    # send_file streams through wsgi.file_wrapper and answers Range/If-None-Match;
+    # the content hash is a strong ETag, and the URL can never change meaning
+    resp = send_from_directory(SOUNDS_DIR, name, mimetype=AUDIO_TYPES[name.rsplit('.', 1)[1]],
+                               conditional=True, etag=name.split('.')[0])
+    resp.headers['Cache-Control'] = ASSET_CACHE_CONTROL
+    return resp
+
+@app.route('/sounds/builtin/<profile>.wav')
+def builtin_sound(profile):
+    """A built-in profile as a plain WAV, for browsers without Web Audio."""
+    if profile not in SOUND_PROFILES:
+        abort(404)
+    wav_synth = load_wav_synth()
+    if wav_synth is None:
+        return {'error': 'rendering sounds needs numpy (install the "wav" extra)'}, 503
+    try:
+        variant, volume = builtin_sound_options(request.args)
+    except ValueError as err:
+        return {'error': str(err)}, 400
+
+    name, key = wav_synth.render_cached(WAV_CACHE_DIR, profile, variant, volume, SOUND_PROFILES[profile][variant])
+    resp = send_from_directory(WAV_CACHE_DIR, name, mimetype='audio/wav', conditional=True, etag=key)
+    resp.headers['Cache-Control'] = BUILTIN_SOUND_CACHE_CONTROL
+    return resp
+
+STATE_STORE = StateStore(STATE_DB, pool_size=THREADS, max_bytes=MAX_STATE_BYTES)
+
+def on_phase_change(key, is_focus, due_ms, fired_ms):
+    """A synced timer crossed a phase boundary (called on the scheduler's thread)."""
+    if DEBUG:
+        print(f"Sync key {key[:4]}...: {'focus' if is_focus else 'break'} started {fired_ms - due_ms:.1f} ms after its boundary")
+    if WEBHOOKS is not None:
+        from webhooks import phase_event
+        WEBHOOKS.enqueue(phase_event(key, is_focus, due_ms, fired_ms))
+
+SCHEDULER = PhaseScheduler(on_phase_change)
+# Started with the scheduler, in the one process that fires phase changes
+if WEBHOOK_URLS:
+    # Imported only when configured: asyncio and ssl would add ~70 ms to every start
+    from webhooks import WebhookDispatcher
+    WEBHOOKS = WebhookDispatcher(WEBHOOK_URLS, WEBHOOK_DEAD_LETTER, batch_size=WEBHOOK_BATCH_SIZE,
+                                 connections=WEBHOOK_CONNECTIONS, max_attempts=WEBHOOK_MAX_ATTEMPTS)
+else:
+    WEBHOOKS = None
+scheduler_lock = None
+
+def stop_webhooks():
+    """Deliver what is queued for the webhooks, then dead-letter the rest.
+
+    Delivery gets half of GRACEFUL_TIMEOUT, because gunicorn kills workers
+    still running when it is up, and the dead-lettering must happen before that.
+    """
+    if WEBHOOKS is not None:
+        WEBHOOKS.close(timeout=GRACEFUL_TIMEOUT / 2)
+
+def start_phase_scheduler():
+    """Run SCHEDULER in this process, unless another process on STATE_DB already does; True if started."""
+    global scheduler_lock
+    if not PHASE_SCHEDULER or scheduler_lock is not None:
+        return False
+    os.makedirs(os.path.dirname(os.path.abspath(STATE_DB)), exist_ok=True)
+    lock = open(f'{STATE_DB}.scheduler.lock', 'a')
+    try:
+        import fcntl
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except ImportError:
+        pass  # No flock (Windows): only the single-process dev server runs there
+    except BlockingIOError:
+        lock.close()
+        return False
+    # Held open for the life of the process; the lock goes with it
+    scheduler_lock = lock
+    if WEBHOOKS is not None:
+        WEBHOOKS.start()
+        # The dispatcher's thread is a daemon: without this, queued events would
+        # vanish with the process (gunicorn workers also call it from worker_exit)
+        atexit.register(stop_webhooks)
+    SCHEDULER.start()
+    SCHEDULER.follow(STATE_STORE, SCHEDULER_POLL_INTERVAL)
+    return True
+
+def state_response(version, state, status=200):
+    """The stored document with its version, which is also its ETag."""
+    resp = app.response_class(json.dumps({'version': version, 'state': state}), status=status,
+                              mimetype='application/json')
+    resp.headers['ETag'] = f'"{version}"'
+    resp.headers['Cache-Control'] = 'private, no-cache'
+    return resp
+
+def reject_non_finite(value):
+    """parse_float/parse_constant hook: NaN and Infinity (also 1e999) aren't JSON."""
+    number = float(value)
+    if not math.isfinite(number):
+        raise ValueError(f'{value} is not a finite number')
+    return number
+
+def expected_version():
+    """The version an If-Match header says the client last saw; None without one, -1 if unparseable."""
+    header = request.headers.get('If-Match')
+    if header is None:
+        return None
+    tag = header.strip().removeprefix('W/').strip('"')
+    if tag == '*':
+        return None
+    return int(tag) if tag.isdigit() else -1
+
+@app.route('/api/state/<key>', methods=['GET', 'PATCH'])
+def timer_state(key):
+    """One sync key's timer state and settings: conditional GET, delta-only PATCH."""
+    if not SYNC_KEY.fullmatch(key):
+        abort(404)
+    if request.method == 'GET':
+        stored = STATE_STORE.get(key)
+        if stored is None:
+            return {'error': 'nothing stored for this key yet'}, 404
+        if request.if_none_match.contains_weak(str(stored[0])):
+            return app.response_class(status=304, headers={'ETag': f'"{stored[0]}"', 'Cache-Control': 'private, no-cache'})
+        return state_response(*stored)
+
+    if (request.content_length or 0) > MAX_STATE_BYTES:
+        return {'error': f'state is limited to {MAX_STATE_BYTES} bytes'}, 413
+    try:
+        delta = json.loads(request.get_data(), parse_float=reject_non_finite, parse_constant=reject_non_finite)
+    except ValueError:
+        delta = None
+    if not isinstance(delta, dict) or not delta or not all(
+            name in ('timer', 'settings') and isinstance(value, dict) for name, value in delta.items()):
+        return {'error': 'expected a JSON merge patch of "timer" and/or "settings" objects'}, 400
+    try:
+        version, state = STATE_STORE.patch(key, delta, expected_version())
+    except VersionConflict as conflict:
+        # The current document comes back with the 412, so the client can rebase in place
+        return state_response(conflict.version, conflict.state, status=412)
+    except StateTooLarge as err:
+        return {'error': str(err)}, 413
+    except InvalidState as err:
+        return {'error': str(err)}, 400
+    if SCHEDULER.thread is not None:
+        # Scheduled here: no need to wait for the next poll
+        SCHEDULER.apply_state(key, version, state)
+    # Acknowledge with the new version only; the client already has the content
+    resp = app.response_class(json.dumps({'version': version}), mimetype='application/json')
+    resp.headers['ETag'] = f'"{version}"'
+    return resp
 
 # Serve the favicon
 @app.route('/favicon.png')
@@ -796,12 +2239,80 @@ def favicon():
 
 def open_browser():
     """Opens the browser automatically after a short delay."""
+    import webbrowser
     webbrowser.open(f'http://{HOST}:{PORT}')
 
-if __name__ == '__main__':
+
+def serve_production():
+    """Serve `app` with gunicorn's threaded workers (Unix only)."""
+    from gunicorn.app.base import BaseApplication
+
+    class ProductionServer(BaseApplication):
+        def load_config(self):
+            for key, value in {
+                'bind': f'[{HOST}]:{PORT}' if ':' in HOST else f'{HOST}:{PORT}',
+                'workers': WORKERS,
+                'threads': THREADS,
+                'worker_class': 'gthread',
+                'keepalive': KEEPALIVE_TIMEOUT,
+                'graceful_timeout': GRACEFUL_TIMEOUT,
+                'backlog': 1024,
+                'accesslog': '-' if DEBUG else None,
+                # Threads don't survive the fork: each worker bids for the scheduler
+                'post_fork': lambda server, worker: start_phase_scheduler(),
+                'worker_exit': lambda server, worker: stop_webhooks(),
+            }.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            # The page and assets were built at import time, before the fork,
+            # so every worker shares them instead of rebuilding
+            return app
+
+    ProductionServer().run()
+
+
+def export_build(out_dir):
+    """Write every prebuilt response, with the headers Flask sends, for the stdlib backend."""
+    import stdlib_server
+
+    client = app.test_client()
+    routes = {}
+    for path in ['/', '/sw.js', '/favicon.png', *ASSETS]:
+        routes[path] = {}
+        for encoding in ('identity', *PrecompressedResponse.ENCODINGS):
+            resp = client.get(path, headers={'Accept-Encoding': encoding})
+            if resp.headers.get('Content-Encoding', 'identity') == encoding:
+                write_atomically(os.path.join(out_dir, stdlib_server.route_file(path, encoding)), resp.get_data())
+                routes[path][encoding] = {name: value for name, value in resp.headers.items()
+                                          if name not in ('Content-Length', 'Date', 'Accept-Ranges')}
+            resp.close()
+    manifest = {'key': stdlib_server.build_key(), 'routes': routes, 'sound_profiles': SOUND_PROFILES}
+    write_atomically(os.path.join(out_dir, 'manifest.json'), json.dumps(manifest, indent=1).encode())
+
+
+def main():
+    """Run the server (or, with --export [DIR], prebuild the page for BACKEND=stdlib)."""
     # # Start the browser in a separate thread to avoid blocking the server start
     # if not os.environ.get("WERKZEUG_RUN_MAIN"): # Prevent opening twice on reloads
     #     threading.Timer(1.0, open_browser).start()
-    
+
+    if '--export' in sys.argv:
+        args = sys.argv[sys.argv.index('--export') + 1:]
+        out_dir = args[0] if args else BUILD_DIR
+        export_build(out_dir)
+        print(f"Exported {len(ASSETS) + 3} responses to {out_dir}")
+        return 0
+
     print(f"Starting Eye Timer on http://{HOST}:{PORT}")
-    app.run(host=HOST, port=PORT, debug=DEBUG)
\ No newline at end of file
+    if SERVER_MODE == 'production':
+        print(f"Production mode: {WORKERS} worker(s) x {THREADS} thread(s), keep-alive {KEEPALIVE_TIMEOUT}s")
+        serve_production()
+    else:
+        start_phase_scheduler()
+        app.run(host=HOST, port=PORT, debug=DEBUG)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
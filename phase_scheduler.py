@@ -0,0 +1,256 @@
+"""Server-side focus/break timers for every synced user, on one heap.
+
+The page runs its own timer, but anything that has to happen on the server
+when a user's break starts or ends needs the server to know the schedule too.
+The synced state (/api/state, see state_store.py) already holds each key's
+running phase, its end time (on the server's clock, see /api/time) and the
+phase lengths. PhaseScheduler follows those documents and calls `on_phase`
+at every phase boundary, with the same semantics as the page:
+- phases alternate focus (settings `focus`, minutes) and break (`break`,
+  seconds), defaulting to 20 minutes and 20 seconds. Unlike the page, the
+  server runs no phase shorter than MIN_PHASE_MS: at zero length a boundary
+  would be due again the moment it fired. Nor longer than MAX_PHASE_MS, which
+  keeps the arithmetic on floats that fit;
+- a boundary is due at `endTimeMs` and the next phase ends one phase length
+  after it, however late the boundary fired;
+- a timer taken over already past its end (the server restarted, or a device
+  was asleep) is caught up silently to the phase it is in now, as the page's
+  applyTimerState() does.
+
+Every running timer has one entry on a min-heap of (end_ms, generation, key).
+Scheduling is a push. Cancelling or rescheduling just forgets the key's current
+generation, and the stale entry is skipped when it reaches the top. The heap is
+rebuilt once stale entries outnumber live ones. One thread sleeps until the
+earliest boundary and is woken early only when a new earliest one arrives.
+"""
+import heapq
+import itertools
+import threading
+import time
+import traceback
+
+DEFAULT_FOCUS_MS = 20 * 60 * 1000
+DEFAULT_BREAK_MS = 20 * 1000
+MIN_PHASE_MS = 1000
+# A day, the longest phase state_store.py accepts
+MAX_PHASE_MS = 24 * 60 * 60 * 1000
+# Latest end time taken from a synced document: the end of JavaScript's Date range
+MAX_TIME_MS = 8.64e15
+# Longest single sleep. Boundaries further off are simply looked at again, and
+# Condition.wait() rejects timeouts beyond threading.TIMEOUT_MAX
+MAX_SLEEP = 3600
+# Writers stamp updated_at inside their transaction, just before committing, so a
+# row can become visible slightly behind a reader's cursor; readers look back this far
+COMMIT_SLACK = 5
+
+
+def catch_up_phase(is_focus, end_ms, now_ms, focus_ms, break_ms):
+    """(is_focus, end_ms, transitions) at `now_ms`; the Python twin of catchUpPhase() in the page."""
+    overshoot = now_ms - end_ms
+    if overshoot < 0:
+        return is_focus, end_ms, 0
+    next_ms = break_ms if is_focus else focus_ms
+    cycle_ms = focus_ms + break_ms
+    if cycle_ms <= 0:
+        return not is_focus, now_ms, 1
+    cycles, into_cycle = divmod(overshoot, cycle_ms)
+    if into_cycle < next_ms:
+        return not is_focus, now_ms - into_cycle + next_ms, 2 * cycles + 1
+    return is_focus, now_ms - (into_cycle - next_ms) + cycle_ms - next_ms, 2 * cycles + 2
+
+
+def is_time_ms(value):
+    """Whether `value` can be a timer's end time: a number from 0 to MAX_TIME_MS.
+
+    NaN and the infinities fail the range check, so they never reach the heap.
+    """
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and 0 <= value <= MAX_TIME_MS
+
+
+def phase_lengths(settings):
+    """(focus_ms, break_ms) from a synced settings document, as loadSettings() reads it.
+
+    Both are clamped to MAX_PHASE_MS, for documents stored before it was checked.
+    """
+    try:
+        focus_ms = int(settings['focus']) * 60 * 1000
+    except (KeyError, TypeError, ValueError, OverflowError):
+        focus_ms = DEFAULT_FOCUS_MS
+    try:
+        break_ms = int(settings['break']) * 1000
+    except (KeyError, TypeError, ValueError, OverflowError):
+        break_ms = DEFAULT_BREAK_MS
+    return min(max(focus_ms, 0), MAX_PHASE_MS), min(max(break_ms, 0), MAX_PHASE_MS)
+
+
+class Timer:
+    """One key's running phase. Slots keep 100k of these small."""
+    __slots__ = ('is_focus', 'end_ms', 'focus_ms', 'break_ms', 'generation', 'version')
+
+    def __init__(self, is_focus, end_ms, focus_ms, break_ms, generation, version):
+        self.is_focus = is_focus
+        self.end_ms = end_ms
+        self.focus_ms = focus_ms
+        self.break_ms = break_ms
+        self.generation = generation
+        self.version = version
+
+
+class PhaseScheduler:
+    """The next phase boundary of every running timer, by key.
+
+    `on_phase(key, is_focus, due_ms, fired_ms)` is called from the scheduler's
+    thread for each boundary: `is_focus` is the phase just entered, `due_ms`
+    when it was due and `fired_ms` when it was noticed. `clock` returns
+    seconds, like time.time().
+    """
+
+    def __init__(self, on_phase, clock=time.time):
+        self.on_phase = on_phase
+        self.clock = clock
+        self.timers = {}
+        self.heap = []
+        self.stale = 0
+        self.generations = itertools.count()
+        self.changed = threading.Condition()
+        self.stopping = False
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def now_ms(self):
+        return self.clock() * 1000
+
+    def push(self, key, timer):
+        timer.generation = next(self.generations)
+        heapq.heappush(self.heap, (timer.end_ms, timer.generation, key))
+
+    def forget(self, key):
+        if self.timers.pop(key, None) is not None:
+            self.stale += 1
+            if self.stale > len(self.timers):
+                # Mostly dead entries: rebuild from the live timers
+                self.heap = [(t.end_ms, t.generation, k) for k, t in self.timers.items()]
+                heapq.heapify(self.heap)
+                self.stale = 0
+
+    def schedule(self, key, is_focus, end_ms, focus_ms, break_ms, version=0):
+        """Run `key`'s timer in phase `is_focus` until `end_ms`, replacing any it had.
+
+        A schedule already past its end is caught up to the current phase
+        without calling `on_phase`. Phase lengths are clamped to MIN_PHASE_MS
+        to MAX_PHASE_MS.
+        """
+        focus_ms = min(max(focus_ms, MIN_PHASE_MS), MAX_PHASE_MS)
+        break_ms = min(max(break_ms, MIN_PHASE_MS), MAX_PHASE_MS)
+        with self.changed:
+            self.forget(key)
+            is_focus, end_ms, _ = catch_up_phase(is_focus, end_ms, self.now_ms(), focus_ms, break_ms)
+            timer = self.timers[key] = Timer(is_focus, end_ms, focus_ms, break_ms, None, version)
+            self.push(key, timer)
+            if self.heap[0][1] == timer.generation:
+                # New earliest boundary: the runner is sleeping until a later one
+                self.changed.notify()
+
+    def cancel(self, key):
+        with self.changed:
+            self.forget(key)
+
+    def apply_state(self, key, version, state):
+        """Follow version `version` of `key`'s synced document (see state_store.py)."""
+        timer = state.get('timer') or {}
+        with self.changed:
+            current = self.timers.get(key)
+            if current is not None and current.version >= version:
+                return
+            if timer.get('isRunning') and is_time_ms(timer.get('endTimeMs')):
+                focus_ms, break_ms = phase_lengths(state.get('settings') or {})
+                self.schedule(key, bool(timer.get('isFocus', True)), timer['endTimeMs'], focus_ms, break_ms, version)
+            else:
+                self.forget(key)
+
+    def next_due_ms(self):
+        """End time of the earliest live timer, or None; drops stale entries on the way."""
+        while self.heap:
+            end_ms, generation, key = self.heap[0]
+            timer = self.timers.get(key)
+            if timer is not None and timer.generation == generation:
+                return end_ms
+            heapq.heappop(self.heap)
+            self.stale -= 1
+        return None
+
+    def pop_due(self, now_ms):
+        """Advance every timer due by `now_ms`; return their (key, is_focus, due_ms, fired_ms) events."""
+        events = []
+        while (due_ms := self.next_due_ms()) is not None and due_ms <= now_ms:
+            key = heapq.heappop(self.heap)[2]
+            timer = self.timers[key]
+            timer.is_focus, timer.end_ms, _ = catch_up_phase(
+                timer.is_focus, timer.end_ms, now_ms, timer.focus_ms, timer.break_ms)
+            self.push(key, timer)
+            events.append((key, timer.is_focus, due_ms, now_ms))
+        return events
+
+    def run(self):
+        # This thread serves every key, so one bad timer must not end it
+        while True:
+            try:
+                with self.changed:
+                    while not self.stopping:
+                        due_ms = self.next_due_ms()
+                        if due_ms is not None and due_ms <= self.now_ms():
+                            break
+                        self.changed.wait(None if due_ms is None else min((due_ms - self.now_ms()) / 1000, MAX_SLEEP))
+                    if self.stopping:
+                        return
+                    events = self.pop_due(self.now_ms())
+            except Exception:
+                traceback.print_exc()
+                # Don't spin if the same failure comes straight back
+                self.stopped.wait(1)
+                continue
+            # Outside the lock, so a slow callback doesn't hold up schedule() calls
+            for event in events:
+                try:
+                    self.on_phase(*event)
+                except Exception:
+                    traceback.print_exc()
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, name='phase-scheduler', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        with self.changed:
+            self.stopping = True
+            self.changed.notify()
+        if self.thread is not None:
+            self.thread.join()
+
+    def follow(self, store, interval=1.0):
+        """Keep applying changed documents from `store` (a StateStore), checking every `interval` seconds."""
+        def poll():
+            since = 0
+            while not self.stopped.is_set():
+                try:
+                    since = self.apply_changes(store, since)
+                except Exception:
+                    # The database couldn't be read: try again next time
+                    traceback.print_exc()
+                self.stopped.wait(interval)
+
+        threading.Thread(target=poll, name='phase-scheduler-follow', daemon=True).start()
+
+    def apply_changes(self, store, since):
+        """Apply documents written after `since` (seconds); return the cursor for the next call."""
+        # Documents seen before are skipped by version
+        cursor = since
+        for key, version, state, updated_at in store.changes(since - COMMIT_SLACK):
+            try:
+                self.apply_state(key, version, state)
+            except Exception:
+                # Skip a document that can't be scheduled rather than stall on it
+                traceback.print_exc()
+            cursor = max(cursor, updated_at)
+        return cursor
@@ -0,0 +1,329 @@
+"""Shared room timers: one controller's actions fanned out to every viewer over Server-Sent Events.
+
+A separate asyncio process next to the page server (`python rooms_server.py`),
+so thousands of idle viewer connections cost a coroutine and a socket each
+instead of a gunicorn thread. The page reaches it at ROOMS_URL (by default port
+ROOMS_PORT on the host the page came from).
+- `POST /rooms` creates a room and returns its id and the controller's token.
+- `POST /rooms/<id>/actions` (with `Authorization: Bearer <token>`) stores the
+  controller's timer state after a start/pause/skip/reset and broadcasts it.
+- `GET /rooms/<id>/events` is the SSE stream. Each subscriber gets the current
+  state on connect, unless its `Last-Event-ID` shows it already has it. After
+  that it gets every change, and a comment line every HEARTBEAT_INTERVAL seconds
+  so proxies and browsers keep idle streams open.
+
+Backpressure is per client. A subscriber holds at most one undelivered event:
+a newer state replaces one the client hasn't received yet, so a slow reader
+skips intermediate states and never buffers a queue. A client whose socket
+buffer doesn't drain within SLOW_CLIENT_TIMEOUT is disconnected; EventSource
+reconnects it, with Last-Event-ID, once it can keep up.
+
+Rooms live in memory. One with no viewers and no action for ROOM_TTL seconds
+is dropped.
+"""
+import asyncio
+import hashlib
+import hmac
+import json
+import os
+import re
+import secrets
+import sys
+import time
+from http import HTTPStatus
+
+# HOST, ROOMS_PORT and KEEPALIVE_TIMEOUT are the page server's settings
+from server_common import HOST, KEEPALIVE_TIMEOUT, ROOMS_PORT
+
+HEARTBEAT_INTERVAL = float(os.environ.get('HEARTBEAT_INTERVAL', '15'))
+SLOW_CLIENT_TIMEOUT = float(os.environ.get('SLOW_CLIENT_TIMEOUT', '10'))
+MAX_ROOMS = int(os.environ.get('MAX_ROOMS', '10000'))
+ROOM_TTL = int(os.environ.get('ROOM_TTL', str(24 * 60 * 60)))
+# The page is served from another origin (the page server's port)
+ALLOW_ORIGIN = os.environ.get('ROOMS_ALLOW_ORIGIN', '*')
+
+# EventSource waits this long before reconnecting a dropped stream
+RETRY_MS = 3000
+MAX_BODY_BYTES = 4096
+MAX_HEADERS = 100
+ROOM_PATH = re.compile(r'/rooms/([A-Za-z0-9_-]{8,32})/(events|actions)')
+# What the page's publishRoomState() sends; viewers need every field
+ACTIONS = {'host', 'start', 'pause', 'skip', 'reset'}
+ACTION_FIELDS = {'action', 'timer', 'focusTime', 'breakTime'}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+HEARTBEAT = b': heartbeat\n\n'
+
+
+def encode_event(seq, state):
+    """One SSE `state` event; encoded once per change and shared by every subscriber."""
+    return f'id: {seq}\nevent: state\ndata: {json.dumps(state, separators=(",", ":"))}\n\n'.encode()
+
+
+def is_phase_seconds(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and 0 < value < float('inf')
+
+
+def token_digest(token):
+    return hashlib.sha256(token.encode()).digest()
+
+
+class Subscriber:
+    """One viewer's SSE connection.
+
+    Events go straight into the socket while its send buffer is below the
+    transport's high-water mark, so an idle or keeping-up viewer costs no task or
+    timer. Past the mark, only the newest event is held until the buffer drains.
+    """
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.pending = None
+        self.flushing = None
+
+    def send(self, data):
+        if self.writer.is_closing():
+            return
+        transport = self.writer.transport
+        if self.flushing is None and transport.get_write_buffer_size() < transport.get_write_buffer_limits()[1]:
+            self.writer.write(data)
+            return
+        # Backed up: a newer state replaces one the client hasn't been sent yet, and a
+        # heartbeat is pointless while anything is queued
+        if data is not HEARTBEAT or self.pending is None:
+            self.pending = data
+        if self.flushing is None:
+            self.flushing = asyncio.ensure_future(self.flush())
+
+    async def flush(self):
+        try:
+            await asyncio.wait_for(self.writer.drain(), SLOW_CLIENT_TIMEOUT)
+        except (TimeoutError, ConnectionError):
+            # Stalled: drop it, and EventSource reconnects once it can keep up
+            self.writer.transport.abort()
+            return
+        finally:
+            self.flushing = None
+        data, self.pending = self.pending, None
+        self.send(data)
+
+
+class Room:
+    def __init__(self, token):
+        self.token_digest = token_digest(token)
+        self.seq = 0
+        self.event = None
+        self.subscribers = set()
+        self.touched = time.monotonic()
+
+    def authorized(self, header):
+        scheme, _, token = (header or '').partition(' ')
+        return scheme.lower() == 'bearer' and hmac.compare_digest(token_digest(token.strip()), self.token_digest)
+
+    def publish(self, state):
+        self.seq += 1
+        self.event = encode_event(self.seq, state)
+        self.touched = time.monotonic()
+        for subscriber in self.subscribers:
+            subscriber.send(self.event)
+
+
+async def read_request(reader):
+    """(method, path, headers, body) of the next request, or None at end of stream."""
+    line = await reader.readline()
+    if not line:
+        return None
+    try:
+        method, target, _ = line.decode('latin-1').split()
+    except ValueError:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, 'malformed request line')
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        if len(headers) >= MAX_HEADERS:
+            raise HTTPError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, 'too many headers')
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get('content-length') or 0)
+    if length > MAX_BODY_BYTES:
+        raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f'bodies are limited to {MAX_BODY_BYTES} bytes')
+    body = await reader.readexactly(length) if length else b''
+    return method, target.partition('?')[0], headers, body
+
+
+def response(status, body=None, content_type='application/json', extra=()):
+    """A complete HTTP/1.1 response with CORS headers; `body` is JSON-encoded unless bytes."""
+    if body is not None and not isinstance(body, bytes):
+        body = json.dumps(body).encode()
+    lines = [f'HTTP/1.1 {status.value} {status.phrase}', f'Access-Control-Allow-Origin: {ALLOW_ORIGIN}',
+             f'Content-Length: {len(body or b"")}', 'Cache-Control: no-store', *extra]
+    if body is not None:
+        lines.append(f'Content-Type: {content_type}')
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode() + (body or b'')
+
+
+class RoomsServer:
+    def __init__(self):
+        self.rooms = {}
+        self.housekeeping = None
+
+    def reap(self):
+        """Drop rooms nobody has watched or controlled for ROOM_TTL."""
+        cutoff = time.monotonic() - ROOM_TTL
+        for room_id in [room_id for room_id, room in self.rooms.items()
+                        if not room.subscribers and room.touched < cutoff]:
+            del self.rooms[room_id]
+
+    def send_heartbeats(self):
+        for room in self.rooms.values():
+            for subscriber in room.subscribers:
+                subscriber.send(HEARTBEAT)
+
+    async def keep_house(self):
+        """Heartbeats for every stream every HEARTBEAT_INTERVAL, and reaping every minute."""
+        last_reap = time.monotonic()
+        while True:
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+            self.send_heartbeats()
+            if time.monotonic() - last_reap > 60:
+                self.reap()
+                last_reap = time.monotonic()
+
+    def create_room(self):
+        if len(self.rooms) >= MAX_ROOMS:
+            self.reap()
+        if len(self.rooms) >= MAX_ROOMS:
+            raise HTTPError(HTTPStatus.SERVICE_UNAVAILABLE, 'too many rooms')
+        room_id, token = secrets.token_urlsafe(9), secrets.token_urlsafe(24)
+        self.rooms[room_id] = Room(token)
+        return {'room': room_id, 'token': token}
+
+    def act(self, room, headers, body):
+        if not room.authorized(headers.get('authorization')):
+            raise HTTPError(HTTPStatus.FORBIDDEN, 'only the room controller can change its timer')
+        try:
+            state = json.loads(body)
+        except ValueError:
+            state = None
+        if not isinstance(state, dict) or state.keys() != ACTION_FIELDS:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f'expected a JSON object with {", ".join(sorted(ACTION_FIELDS))}')
+        if not isinstance(state['action'], str) or state['action'] not in ACTIONS:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f'action must be one of {", ".join(sorted(ACTIONS))}')
+        if not isinstance(state['timer'], dict) or not all(
+                is_phase_seconds(state[name]) for name in ('focusTime', 'breakTime')):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, 'timer must be an object and focusTime/breakTime positive numbers')
+        room.publish(state)
+        return {'seq': room.seq, 'viewers': len(room.subscribers)}
+
+    async def stream(self, room, headers, reader, writer):
+        """Serve one SSE subscriber until it disconnects or falls too far behind."""
+        writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-store\r\n'
+                     + f'Access-Control-Allow-Origin: {ALLOW_ORIGIN}\r\n\r\nretry: {RETRY_MS}\n\n'.encode())
+        subscriber = Subscriber(writer)
+        # A reconnecting client that already has the latest state waits for the next change
+        if room.event is not None and headers.get('last-event-id') != str(room.seq):
+            subscriber.send(room.event)
+        room.subscribers.add(subscriber)
+        try:
+            # Clients send nothing after the request: any read completing means the
+            # connection closed (or was aborted as stalled)
+            await reader.read(1)
+        finally:
+            room.subscribers.discard(subscriber)
+            room.touched = time.monotonic()
+            if subscriber.flushing is not None:
+                subscriber.flushing.cancel()
+
+    def route(self, method, path, headers, body):
+        """(response bytes, keep the connection open) for a plain request."""
+        if method == 'OPTIONS':
+            return response(HTTPStatus.NO_CONTENT, extra=(
+                'Access-Control-Allow-Methods: GET, POST, OPTIONS',
+                'Access-Control-Allow-Headers: Authorization, Content-Type, Last-Event-ID',
+                'Access-Control-Max-Age: 86400')), True
+        if method == 'GET' and path == '/healthz':
+            return response(HTTPStatus.OK, b'ok', 'text/plain'), True
+        if method == 'POST' and path == '/rooms':
+            return response(HTTPStatus.CREATED, self.create_room()), True
+        match = ROOM_PATH.fullmatch(path)
+        if match and match.group(2) == 'actions' and method == 'POST':
+            room = self.rooms.get(match.group(1))
+            if room is None:
+                raise HTTPError(HTTPStatus.NOT_FOUND, 'no such room')
+            return response(HTTPStatus.OK, self.act(room, headers, body)), True
+        raise HTTPError(HTTPStatus.NOT_FOUND, 'not found')
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                headers = {}
+                try:
+                    request = await asyncio.wait_for(read_request(reader), KEEPALIVE_TIMEOUT)
+                    if request is None:
+                        break
+                    method, path, headers, body = request
+                    match = ROOM_PATH.fullmatch(path)
+                    if method == 'GET' and match and match.group(2) == 'events':
+                        room = self.rooms.get(match.group(1))
+                        if room is None:
+                            raise HTTPError(HTTPStatus.NOT_FOUND, 'no such room')
+                        await self.stream(room, headers, reader, writer)
+                        break
+                    data, keep_alive = self.route(method, path, headers, body)
+                except HTTPError as err:
+                    data, keep_alive = response(err.status, {'error': str(err)}), err.status < 500
+                writer.write(data)
+                await writer.drain()
+                if not keep_alive or headers.get('connection', '').lower() == 'close':
+                    break
+        except (ConnectionError, TimeoutError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host=HOST, port=ROOMS_PORT):
+        server = await asyncio.start_server(self.handle, host, port, backlog=4096)
+        self.housekeeping = asyncio.ensure_future(self.keep_house())
+        return server
+
+
+def raise_open_file_limit():
+    """Allow as many sockets as the hard limit permits (the soft default is often 1024)."""
+    try:
+        import resource
+    except ImportError:  # Not on Unix
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft != hard:
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+        except (ValueError, OSError):  # e.g. macOS refuses an unlimited soft limit
+            pass
+
+
+async def serve_forever():
+    server = await RoomsServer().serve()
+    print(f'Starting Eye Timer rooms on http://{HOST}:{ROOMS_PORT}')
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    raise_open_file_limit()
+    try:
+        asyncio.run(serve_forever())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
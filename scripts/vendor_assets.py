@@ -0,0 +1,126 @@
+"""Vendor the web fonts and the icon subset the page uses into static/fonts/.
+
+Run this whenever the template starts using a new icon or font weight. It needs
+network access plus the build-time-only packages fontTools and brotli
+(`pip install fonttools brotli`); the app itself only reads the output.
+
+  python scripts/vendor_assets.py                          # fetch everything
+  python scripts/vendor_assets.py --fontawesome fa-solid-900.woff2 --skip-google
+
+Writes subsetted WOFF2 files and static/fonts/fonts.json, the manifest
+eye-timer.py turns into @font-face rules at startup.
+"""
+import argparse
+import importlib.util
+import io
+import json
+import re
+import sys
+import urllib.request
+from pathlib import Path
+
+from fontTools import subset
+from fontTools.ttLib import TTFont
+
+ROOT = Path(__file__).resolve().parents[1]
+FONTS_DIR = ROOT / 'static' / 'fonts'
+
+# {version} is the app's FONTAWESOME_VERSION, so the subset matches the cdn stylesheet
+FONTAWESOME_URL = 'https://cdnjs.cloudflare.com/ajax/libs/font-awesome/{version}/webfonts/fa-solid-900.woff2'
+GOOGLE_CSS_URL = 'https://fonts.googleapis.com/css2?family={family}:wght@{weights}&display=swap'
+# Google Fonts only serves WOFF2 to browsers it recognises
+USER_AGENT = 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36'
+
+# family, Google Fonts name, weights, glyphs to keep (None keeps Basic Latin + Latin-1)
+GOOGLE_FONTS = [
+    ('Inter', 'Inter', [300, 400, 600, 800], None),
+    # Only the clock face and the volume badge use the mono face
+    ('JetBrains Mono', 'JetBrains+Mono', [500], '0123456789:%'),
+]
+LATIN = list(range(0x20, 0x7F)) + list(range(0xA0, 0x100)) + [0x2013, 0x2014, 0x2018, 0x2019, 0x201C, 0x201D, 0x2022, 0x2026]
+
+
+def load_app_module():
+    spec = importlib.util.spec_from_file_location('eye_timer', ROOT / 'eye-timer.py')
+    module = importlib.util.module_from_spec(spec)
+    sys.path.insert(0, str(ROOT))
+    spec.loader.exec_module(module)
+    return module
+
+
+def fetch(url):
+    request = urllib.request.Request(url, headers={'User-Agent': USER_AGENT})
+    with urllib.request.urlopen(request, timeout=30) as resp:
+        return resp.read()
+
+
+def subset_woff2(data, unicodes):
+    """Return `data` (any sfnt/WOFF/WOFF2 font) reduced to `unicodes`, as WOFF2."""
+    font = TTFont(io.BytesIO(data))
+    options = subset.Options()
+    options.flavor = 'woff2'
+    options.layout_features = ['*']
+    options.name_IDs = ['*']
+    options.notdef_outline = True
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(unicodes=unicodes)
+    subsetter.subset(font)
+    out = io.BytesIO()
+    font.flavor = 'woff2'
+    font.save(out)
+    return out.getvalue()
+
+
+def vendor_fontawesome(source, icons, version):
+    data = Path(source).read_bytes() if source else fetch(FONTAWESOME_URL.format(version=version))
+    filename = 'fa-solid-900.woff2'
+    (FONTS_DIR / filename).write_bytes(subset_woff2(data, [int(cp, 16) for cp in icons.values()]))
+    print(f'{filename}: {len(icons)} icons')
+    return {'family': 'Font Awesome 6 Free', 'weight': '900', 'display': 'block', 'file': filename, 'preload': True}
+
+
+def vendor_google(family, name, weights, text):
+    css = fetch(GOOGLE_CSS_URL.format(family=name, weights=';'.join(map(str, weights)))).decode()
+    entries, seen = [], {}
+    # Each block is preceded by a /* subset */ comment; only the latin one is needed
+    for subset_name, block in re.findall(r'/\* ([\w-]+) \*/\s*@font-face\s*{([^}]*)}', css):
+        if subset_name != 'latin':
+            continue
+        weight = re.search(r'font-weight:\s*(\d+)', block).group(1)
+        url = re.search(r'url\((https://[^)]+)\)', block).group(1)
+        if url in seen:
+            # Variable fonts reuse one file for every weight; widen its range instead
+            seen[url]['weight'] = f"{seen[url]['weight'].split()[0]} {weight}"
+            continue
+        unicodes = [ord(c) for c in text] if text else LATIN
+        filename = f"{family.lower().replace(' ', '-')}-{weight}.woff2"
+        (FONTS_DIR / filename).write_bytes(subset_woff2(fetch(url), unicodes))
+        # Glyph-subsetted faces are tiny and on screen at first paint
+        seen[url] = {'family': family, 'weight': weight, 'display': 'swap', 'file': filename, 'preload': bool(text)}
+        entries.append(seen[url])
+        print(f'{filename}: {len(unicodes)} code points')
+    return entries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--fontawesome', help='local fa-solid-900 font, of FONTAWESOME_VERSION, to subset')
+    parser.add_argument('--skip-google', action='store_true', help='keep the existing Google Fonts entries')
+    args = parser.parse_args()
+
+    FONTS_DIR.mkdir(parents=True, exist_ok=True)
+    manifest_path = FONTS_DIR / 'fonts.json'
+    previous = json.loads(manifest_path.read_text()) if manifest_path.exists() else []
+
+    app = load_app_module()
+    manifest = [vendor_fontawesome(args.fontawesome, app.FONTAWESOME_ICONS, app.FONTAWESOME_VERSION)]
+    if args.skip_google:
+        manifest += [entry for entry in previous if entry['family'] != 'Font Awesome 6 Free']
+    else:
+        for family, name, weights, text in GOOGLE_FONTS:
+            manifest += vendor_google(family, name, weights, text)
+    manifest_path.write_text(json.dumps(manifest, indent=2) + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,27 @@
+"""Start Eye Timer from cached bytecode (the container entry point).
+
+`python eye-timer.py` recompiles the whole file on every start: a script run as
+__main__ never reads or writes __pycache__. Importing it does. So this imports
+eye-timer.py (or stdlib_server for BACKEND=stdlib) and calls its main().
+Precompile with `python -m compileall .`, as the Docker image does.
+"""
+import importlib.util
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def main():
+    if os.environ.get('BACKEND', 'flask').lower() == 'stdlib':
+        import stdlib_server
+        return stdlib_server.main()
+    spec = importlib.util.spec_from_file_location('eye_timer', os.path.join(ROOT, 'eye-timer.py'))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules['eye_timer'] = module
+    spec.loader.exec_module(module)
+    return module.main()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""Settings and request helpers shared by both backends.
+
+eye-timer.py (Flask) and stdlib_server.py (http.server) answer the same routes.
+What they must agree on lives here, so the two can't drift apart. rooms_server.py
+reads its host, port and keep-alive settings from here too. Like stdlib_server,
+this module must not import Flask.
+"""
+import functools
+import os
+import re
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Configuration
+# Allow environment overrides so the app can run inside containers and CI
+HOST = os.environ.get('HOST', '0.0.0.0')
+PORT = int(os.environ.get('PORT', str(5000)))
+DEBUG = os.environ.get('DEBUG', 'False').lower() in ('1', 'true', 'yes')
+KEEPALIVE_TIMEOUT = int(os.environ.get('KEEPALIVE_TIMEOUT', '5'))
+# User-uploaded notification sounds, stored under the SHA-256 of their content
+SOUNDS_DIR = os.environ.get('SOUNDS_DIR', os.path.join(ROOT, 'uploads', 'sounds'))
+# Built-in sounds rendered to WAV on first request (see wav_synth.py), one file
+# per profile, direction and volume
+WAV_CACHE_DIR = os.environ.get('WAV_CACHE_DIR', os.path.join(ROOT, 'uploads', 'wav-cache'))
+# Shared room timers are served by rooms_server.py, a separate asyncio process on this port
+ROOMS_PORT = int(os.environ.get('ROOMS_PORT', '5001'))
+# Output of `--export`. When it is current for these sources and settings the
+# server starts from it instead of rendering and compressing the page again
+BUILD_DIR = os.environ.get('BUILD_DIR', os.path.join(ROOT, 'build'))
+
+# Hashed asset URLs change whenever their content does, so they can be cached forever
+ASSET_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+# A built-in sound's URL is stable across profile edits, so only cache it for a day
+BUILTIN_SOUND_CACHE_CONTROL = 'public, max-age=86400'
+
+# Audio containers accepted for upload (extension -> mimetype); see sniff_audio() in eye-timer.py
+AUDIO_TYPES = {
+    'flac': 'audio/flac',
+    'm4a': 'audio/mp4',
+    'mp3': 'audio/mpeg',
+    'ogg': 'audio/ogg',
+    'wav': 'audio/wav',
+    'webm': 'audio/webm',
+}
+SOUND_NAME = re.compile(r'[0-9a-f]{64}\.(?:%s)' % '|'.join(AUDIO_TYPES))
+
+
+def clock_probe_body(received):
+    """The /api/time reply for a request that arrived at `received` (time.time()).
+
+    `t1` is the arrival and `t2` the moment the reply is built, both in ms.
+    """
+    return b'{"t1":%.3f,"t2":%.3f}' % (received * 1000, time.time() * 1000)
+
+
+def builtin_sound_options(args):
+    """(variant, volume) from a built-in sound request's query `args` (a mapping of strings).
+
+    Raises ValueError, with a message for the client, when volume isn't 0-100.
+    """
+    variant = 'reverse' if args.get('reverse', '0').lower() in ('1', 'true', 'yes') else 'forward'
+    try:
+        volume = int(args.get('volume', '50'))
+    except ValueError:
+        volume = -1
+    if not 0 <= volume <= 100:
+        raise ValueError('volume must be an integer from 0 to 100')
+    return variant, volume
+
+
+@functools.cache
+def load_wav_synth():
+    """wav_synth, imported on first use so numpy stays out of startup; None without numpy."""
+    try:
+        import wav_synth  # Optional (needs numpy, the `wav` extra): server-rendered built-in sounds
+    except ImportError:
+        return None
+    return wav_synth
+
+
+def write_atomically(path, data):
+    """Write `data` to `path` via a rename, so readers never see a partial file."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    partial = f'{path}.{os.getpid()}.{threading.get_ident()}.part'
+    with open(partial, 'wb') as f:
+        f.write(data)
+    os.replace(partial, path)
@@ -0,0 +1,200 @@
+"""Per-user timer state and settings in SQLite, behind /api/state/<key>.
+
+Each sync key owns one JSON document, `{"timer": {...}, "settings": {...}}`,
+and a version number that goes up by one on every write. Readers revalidate
+with the version as ETag. Writers send only the fields that changed, as a JSON
+merge patch (RFC 7396), optionally conditional on the version they last saw.
+Timer fields must have their expected types, and numbers must be finite, so
+every stored document reads back as valid JSON on every device. The phase
+lengths in the settings must be whole numbers within a day, as the server's
+phase scheduler reads them too.
+
+The database runs in WAL mode, so readers never wait for the single writer.
+Connections are pooled per process: each gunicorn worker opens its own (SQLite
+connections must not cross a fork) and its threads borrow them one request at a
+time.
+"""
+import json
+import math
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS timer_state (
+    key TEXT PRIMARY KEY,
+    version INTEGER NOT NULL,
+    state TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS timer_state_updated_at ON timer_state (updated_at);
+"""
+
+
+class VersionConflict(Exception):
+    """A conditional write was based on an older version than the stored one."""
+
+    def __init__(self, version, state):
+        super().__init__(f'stored version is {version}')
+        self.version = version
+        self.state = state
+
+
+class StateTooLarge(Exception):
+    """The document would exceed the store's size limit after the write."""
+
+
+class InvalidState(ValueError):
+    """A delta sets a timer field or phase length to a value of the wrong type or range."""
+
+
+def is_finite_number(value):
+    if isinstance(value, bool):
+        return False
+    # Integers are always finite (and math.isfinite() can't convert the huge ones)
+    return isinstance(value, int) or (isinstance(value, float) and math.isfinite(value))
+
+
+# Checks for the timer fields the page syncs (see timerSnapshot()); null, which
+# removes a field, is always allowed
+TIMER_FIELDS = {
+    'isFocus': lambda value: isinstance(value, bool),
+    'isRunning': lambda value: isinstance(value, bool),
+    'endTimeMs': is_finite_number,
+    'remainingMs': is_finite_number,
+}
+
+
+# Phase lengths in the settings (focus in minutes, break in seconds) and their
+# largest value, a day. The page stores its <input> values, so digit strings count
+PHASE_LENGTH_LIMITS = {
+    'focus': 24 * 60,
+    'break': 24 * 60 * 60,
+}
+
+
+def is_phase_length(value, limit):
+    if isinstance(value, str) and value.isascii() and value.isdigit() and len(value) <= len(str(limit)):
+        value = int(value)
+    return isinstance(value, int) and not isinstance(value, bool) and 1 <= value <= limit
+
+
+def check_delta(delta):
+    """Raise InvalidState unless every timer field and phase length in `delta` is valid."""
+    timer = delta.get('timer')
+    if isinstance(timer, dict):
+        for name, check in TIMER_FIELDS.items():
+            value = timer.get(name)
+            if value is not None and not check(value):
+                raise InvalidState(f'timer.{name} has the wrong type')
+    settings = delta.get('settings')
+    if isinstance(settings, dict):
+        for name, limit in PHASE_LENGTH_LIMITS.items():
+            value = settings.get(name)
+            if value is not None and not is_phase_length(value, limit):
+                raise InvalidState(f'settings.{name} must be a whole number from 1 to {limit}')
+
+
+def merge_patch(target, patch):
+    """Apply a JSON merge patch: objects merge recursively and null deletes a field."""
+    if not isinstance(patch, dict):
+        return patch
+    merged = dict(target) if isinstance(target, dict) else {}
+    for name, value in patch.items():
+        if value is None:
+            merged.pop(name, None)
+        else:
+            merged[name] = merge_patch(merged.get(name), value)
+    return merged
+
+
+class StateStore:
+    """Versioned JSON documents by key, in an SQLite database at `path`."""
+
+    def __init__(self, path, pool_size=8, max_bytes=16 * 1024):
+        self.path = path
+        self.pool_size = pool_size
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.reset_pool()
+
+    def reset_pool(self):
+        self.pid = os.getpid()
+        self.pool = queue.SimpleQueue()
+
+    def connect(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        # Autocommit; writes open their own BEGIN IMMEDIATE transaction
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        # Durable across application crashes; a power cut may lose the last writes
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.executescript(SCHEMA)
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """Borrow a pooled connection for one operation."""
+        with self.lock:
+            if self.pid != os.getpid():
+                # Forked since the pool was filled: the parent's connections aren't ours
+                self.reset_pool()
+        try:
+            conn = self.pool.get_nowait()
+        except queue.Empty:
+            conn = self.connect()
+        try:
+            yield conn
+        finally:
+            if self.pool.qsize() < self.pool_size:
+                self.pool.put(conn)
+            else:
+                conn.close()
+
+    def get(self, key):
+        """(version, state) stored under `key`, or None."""
+        with self.connection() as conn:
+            row = conn.execute('SELECT version, state FROM timer_state WHERE key = ?', (key,)).fetchone()
+        return None if row is None else (row[0], json.loads(row[1]))
+
+    def changes(self, since):
+        """(key, version, state, updated_at) of every document written after `since` (seconds)."""
+        with self.connection() as conn:
+            rows = conn.execute('SELECT key, version, state, updated_at FROM timer_state WHERE updated_at > ? '
+                                'ORDER BY updated_at', (since,)).fetchall()
+        return [(key, version, json.loads(state), updated_at) for key, version, state, updated_at in rows]
+
+    def patch(self, key, delta, expected_version=None):
+        """Merge `delta` into the state under `key` (created if missing); return (version, state).
+
+        With `expected_version`, the write only applies if that is still the
+        stored version (0 for "not stored yet"); otherwise VersionConflict
+        carries the current version and state. A badly typed timer field or
+        an out-of-range phase length raises InvalidState.
+        """
+        check_delta(delta)
+        with self.connection() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                row = conn.execute('SELECT version, state FROM timer_state WHERE key = ?', (key,)).fetchone()
+                version, state = (row[0], json.loads(row[1])) if row else (0, {})
+                if expected_version is not None and expected_version != version:
+                    raise VersionConflict(version, state)
+                state = merge_patch(state, delta)
+                # allow_nan=False: NaN and Infinity aren't JSON, and browsers reject them
+                encoded = json.dumps(state, separators=(',', ':'), allow_nan=False)
+                if len(encoded) > self.max_bytes:
+                    raise StateTooLarge(f'state is limited to {self.max_bytes} bytes')
+                conn.execute(
+                    'INSERT INTO timer_state (key, version, state, updated_at) VALUES (?, ?, ?, ?) '
+                    'ON CONFLICT(key) DO UPDATE SET version = excluded.version, state = excluded.state, '
+                    'updated_at = excluded.updated_at',
+                    (key, version + 1, encoded, time.time()))
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+        return version + 1, state
@@ -0,0 +1,248 @@
+"""Flask-free backend (BACKEND=stdlib) serving the page prebuilt by `eye-timer.py --export`.
+
+Everything the page needs is a fixed set of responses. `eye-timer.py --export
+DIR` renders them once with Flask and writes each encoding's body to a file,
+plus a manifest of the headers Flask would send. This module serves that output
+with `http.server`, so a running kiosk never imports Flask, Werkzeug or Jinja.
+- `/`, `/sw.js`, `/assets/...` and `/favicon.png` get the same bytes, headers,
+  content negotiation and ETag/304 behaviour as the Flask app.
+- `/healthz` is the same liveness probe, and `/api/time` the same clock probe.
+- Uploaded sounds (`/sounds/<sha256>.<ext>`) are served read-only, with Range
+  support, from SOUNDS_DIR.
+- Built-in sounds (`/sounds/builtin/<profile>.wav`) are rendered through
+  wav_synth when numpy is installed, as under Flask.
+- The rest of the API (uploading sounds, syncing state) needs the Flask
+  backend and answers 501.
+
+The export is rebuilt automatically (in a short-lived subprocess) when the app's
+sources or the build-affecting settings change; see build_key(). The Flask
+backend also starts from a current export instead of rebuilding the page.
+
+Configuration uses the same environment variables and defaults as eye-timer.py;
+the settings and request handling both backends share live in server_common.py.
+"""
+import hashlib
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+from server_common import (ASSET_CACHE_CONTROL, AUDIO_TYPES, BUILD_DIR, BUILTIN_SOUND_CACHE_CONTROL, DEBUG, HOST,
+                           KEEPALIVE_TIMEOUT, PORT, ROOT, SOUND_NAME, SOUNDS_DIR, WAV_CACHE_DIR,
+                           builtin_sound_options, clock_probe_body, load_wav_synth)
+
+# Inputs that change the exported output: source files, vendored static files
+# and the settings that select how the page is built
+BUILD_SOURCES = ('eye-timer.py', 'server_common.py', 'tailwind_build.py')
+BUILD_SETTINGS = ('TAILWIND_MODE', 'ASSET_SOURCE', 'GOOGLE_FONTS_FALLBACK', 'SERVICE_WORKER', 'BUNDLE_ASSETS',
+                  'ROOMS_URL', 'ROOMS_PORT')
+
+ENCODINGS = ('br', 'gzip')
+FILE_SUFFIXES = {'identity': '', 'gzip': '.gz', 'br': '.br'}
+
+
+def build_key(root=ROOT):
+    """Hash of everything the export depends on; a mismatch means it is stale."""
+    digest = hashlib.sha256()
+    paths = [os.path.join(root, name) for name in BUILD_SOURCES]
+    for dirpath, _, filenames in sorted(os.walk(os.path.join(root, 'static'))):
+        paths.extend(os.path.join(dirpath, name) for name in sorted(filenames))
+    for path in paths:
+        digest.update(os.path.relpath(path, root).encode())
+        with open(path, 'rb') as f:
+            digest.update(hashlib.sha256(f.read()).digest())
+    for name in BUILD_SETTINGS:
+        digest.update(f'{name}={os.environ.get(name, "")}'.encode())
+    return digest.hexdigest()
+
+
+def route_file(path, encoding):
+    """Where the export stores the body of `path` in `encoding`, relative to the build dir."""
+    return ('index.html' if path == '/' else path.lstrip('/')) + FILE_SUFFIXES[encoding]
+
+
+def read_build(build_dir=BUILD_DIR):
+    """The export's (routes, sound profiles) if it is current, else None.
+
+    `routes` maps each URL path to {encoding: (body, headers)}.
+    """
+    try:
+        with open(os.path.join(build_dir, 'manifest.json')) as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return None
+    if manifest['key'] != build_key():
+        return None
+
+    routes = {}
+    for path, variants in manifest['routes'].items():
+        routes[path] = {}
+        for encoding, headers in variants.items():
+            with open(os.path.join(build_dir, route_file(path, encoding)), 'rb') as f:
+                routes[path][encoding] = (f.read(), headers)
+    return routes, manifest['sound_profiles']
+
+
+def load_build(build_dir=BUILD_DIR):
+    """Read the export into memory, re-exporting first if it is missing or stale."""
+    build = read_build(build_dir)
+    if build is None:
+        print(f'Exporting the page to {build_dir}')
+        subprocess.run([sys.executable, os.path.join(ROOT, 'eye-timer.py'), '--export', build_dir], check=True)
+        build = read_build(build_dir)
+    return build
+
+
+def accepted_encodings(header):
+    """Encodings named in an Accept-Encoding header with a non-zero q-value."""
+    accepted = set()
+    for part in header.split(','):
+        name, _, params = part.strip().partition(';')
+        q = re.search(r'q=([0-9.]+)', params)
+        if name and (q is None or float(q.group(1)) > 0):
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+def etag_matches(if_none_match, etags):
+    """Whether an If-None-Match header names any of `etags` (weak comparison)."""
+    if not if_none_match:
+        return False
+    candidates = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+    return '*' in candidates or any(f'"{tag}"' in candidates for tag in etags)
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Idle keep-alive connections are closed after this many seconds
+    timeout = KEEPALIVE_TIMEOUT
+    server_version = 'eye-timer'
+    sys_version = ''
+
+    routes = {}
+    sound_profiles = {}
+
+    def log_message(self, format, *args):
+        if DEBUG:
+            super().log_message(format, *args)
+
+    def send(self, status, body=b'', headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if status != HTTPStatus.NOT_MODIFIED:
+            self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def send_json(self, status, data):
+        self.send(status, json.dumps(data).encode(), {'Content-Type': 'application/json'})
+
+    def do_HEAD(self):
+        self.do_GET()
+
+    def do_GET(self):
+        path, _, query = self.path.partition('?')
+        if path in self.routes:
+            self.send_prebuilt(self.routes[path])
+        elif path == '/healthz':
+            self.send(HTTPStatus.OK, b'ok', {'Content-Type': 'text/plain', 'Cache-Control': 'no-store'})
+        elif path == '/api/time':
+            body = clock_probe_body(time.time())
+            self.send(HTTPStatus.OK, body, {'Content-Type': 'application/json', 'Cache-Control': 'no-store'})
+        elif path.startswith('/sounds/builtin/') and path.endswith('.wav'):
+            self.send_builtin_sound(path[len('/sounds/builtin/'):-len('.wav')], query)
+        elif path.startswith('/sounds/') and SOUND_NAME.fullmatch(path[len('/sounds/'):]):
+            self.send_upload(path[len('/sounds/'):])
+        elif path.startswith('/api/'):
+            self.send_json(HTTPStatus.NOT_IMPLEMENTED, {'error': 'the API needs the Flask backend'})
+        else:
+            self.send_json(HTTPStatus.NOT_FOUND, {'error': 'not found'})
+
+    def do_POST(self):
+        # Drain the body so the connection stays usable
+        self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        self.send_json(HTTPStatus.NOT_IMPLEMENTED, {'error': 'the API needs the Flask backend'})
+
+    do_PATCH = do_POST
+
+    def send_prebuilt(self, variants):
+        accepted = accepted_encodings(self.headers.get('Accept-Encoding', ''))
+        encoding = next((e for e in ENCODINGS if e in variants and e in accepted), 'identity')
+        body, headers = variants[encoding]
+        # Only the negotiated variant's tag counts, as in PrecompressedResponse.serve()
+        if 'ETag' in headers and etag_matches(self.headers.get('If-None-Match'), [headers['ETag'].strip('"')]):
+            self.send(HTTPStatus.NOT_MODIFIED, headers={k: v for k, v in headers.items()
+                                                        if k in ('Cache-Control', 'ETag', 'Vary')})
+            return
+        self.send(HTTPStatus.OK, body, headers)
+
+    def send_file(self, path, content_type, etag, cache_control):
+        """Serve a file on disk with a strong ETag, 304s and single byte ranges."""
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            self.send_json(HTTPStatus.NOT_FOUND, {'error': 'not found'})
+            return
+        headers = {'Content-Type': content_type, 'ETag': f'"{etag}"', 'Cache-Control': cache_control,
+                   'Accept-Ranges': 'bytes'}
+        if etag_matches(self.headers.get('If-None-Match'), [etag]):
+            self.send(HTTPStatus.NOT_MODIFIED, headers=headers)
+            return
+        match = re.fullmatch(r'bytes=(\d*)-(\d*)', self.headers.get('Range', ''))
+        if match and any(match.groups()):
+            first, last = match.groups()
+            start = int(first) if first else max(0, len(data) - int(last))
+            end = min(int(last), len(data) - 1) if first and last else len(data) - 1
+            if start >= len(data) or start > end:
+                self.send(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE, headers={'Content-Range': f'bytes */{len(data)}'})
+                return
+            headers['Content-Range'] = f'bytes {start}-{end}/{len(data)}'
+            self.send(HTTPStatus.PARTIAL_CONTENT, data[start:end + 1], headers)
+            return
+        self.send(HTTPStatus.OK, data, headers)
+
+    def send_upload(self, name):
+        self.send_file(os.path.join(SOUNDS_DIR, name), AUDIO_TYPES[name.rsplit('.', 1)[1]],
+                       name.split('.')[0], ASSET_CACHE_CONTROL)
+
+    def send_builtin_sound(self, profile, query):
+        if profile not in self.sound_profiles:
+            self.send_json(HTTPStatus.NOT_FOUND, {'error': 'not found'})
+            return
+        wav_synth = load_wav_synth()
+        if wav_synth is None:
+            self.send_json(HTTPStatus.SERVICE_UNAVAILABLE, {'error': 'rendering sounds needs numpy (install the "wav" extra)'})
+            return
+        try:
+            variant, volume = builtin_sound_options({name: values[0] for name, values in parse_qs(query).items()})
+        except ValueError as err:
+            self.send_json(HTTPStatus.BAD_REQUEST, {'error': str(err)})
+            return
+        name, key = wav_synth.render_cached(WAV_CACHE_DIR, profile, variant, volume, self.sound_profiles[profile][variant])
+        self.send_file(os.path.join(WAV_CACHE_DIR, name), 'audio/wav', key, BUILTIN_SOUND_CACHE_CONTROL)
+
+
+def main():
+    Handler.routes, Handler.sound_profiles = load_build()
+    server = ThreadingHTTPServer((HOST, PORT), Handler)
+    server.daemon_threads = True
+    print(f'Starting Eye Timer (stdlib backend) on http://{HOST}:{PORT}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
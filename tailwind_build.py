@@ -0,0 +1,439 @@
+"""Ahead-of-time Tailwind compiler for the utilities used by the Eye Timer page.
+
+Implements the subset of Tailwind CSS v3 the template relies on: candidate
+class names are scanned from the page source, resolved against the default
+palette and spacing scale plus the app's theme extensions, and emitted purged
+and minified in Tailwind's own plugin and variant order. Candidates that do not
+resolve are ignored, just like the Play CDN ignores them.
+
+Usage: python tailwind_build.py [OUTPUT]  (compiles eye-timer.py's template)
+"""
+import re
+
+# Tailwind v3 default palette (only the families the UI draws from)
+PALETTE = {
+    'black': '#000000',
+    'white': '#ffffff',
+    'slate': {
+        '50': '#f8fafc', '100': '#f1f5f9', '200': '#e2e8f0', '300': '#cbd5e1', '400': '#94a3b8',
+        '500': '#64748b', '600': '#475569', '700': '#334155', '800': '#1e293b', '900': '#0f172a',
+        '950': '#020617',
+    },
+    'gray': {
+        '50': '#f9fafb', '100': '#f3f4f6', '200': '#e5e7eb', '300': '#d1d5db', '400': '#9ca3af',
+        '500': '#6b7280', '600': '#4b5563', '700': '#374151', '800': '#1f2937', '900': '#111827',
+        '950': '#030712',
+    },
+    'red': {
+        '50': '#fef2f2', '100': '#fee2e2', '200': '#fecaca', '300': '#fca5a5', '400': '#f87171',
+        '500': '#ef4444', '600': '#dc2626', '700': '#b91c1c', '800': '#991b1b', '900': '#7f1d1d',
+        '950': '#450a0a',
+    },
+    'amber': {
+        '50': '#fffbeb', '100': '#fef3c7', '200': '#fde68a', '300': '#fcd34d', '400': '#fbbf24',
+        '500': '#f59e0b', '600': '#d97706', '700': '#b45309', '800': '#92400e', '900': '#78350f',
+        '950': '#451a03',
+    },
+    'emerald': {
+        '50': '#ecfdf5', '100': '#d1fae5', '200': '#a7f3d0', '300': '#6ee7b7', '400': '#34d399',
+        '500': '#10b981', '600': '#059669', '700': '#047857', '800': '#065f46', '900': '#064e3b',
+        '950': '#022c22',
+    },
+    'blue': {
+        '50': '#eff6ff', '100': '#dbeafe', '200': '#bfdbfe', '300': '#93c5fd', '400': '#60a5fa',
+        '500': '#3b82f6', '600': '#2563eb', '700': '#1d4ed8', '800': '#1e40af', '900': '#1e3a8a',
+        '950': '#172554',
+    },
+}
+
+DEFAULT_FONTS = {
+    'sans': ['ui-sans-serif', 'system-ui', 'sans-serif'],
+    'mono': ['ui-monospace', 'SFMono-Regular', 'Menlo', 'Monaco', 'Consolas', 'monospace'],
+}
+
+FONT_SIZES = {
+    'xs': ('0.75rem', '1rem'), 'sm': ('0.875rem', '1.25rem'), 'base': ('1rem', '1.5rem'),
+    'lg': ('1.125rem', '1.75rem'), 'xl': ('1.25rem', '1.75rem'), '2xl': ('1.5rem', '2rem'),
+    '3xl': ('1.875rem', '2.25rem'), '4xl': ('2.25rem', '2.5rem'), '5xl': ('3rem', '1'),
+    '6xl': ('3.75rem', '1'), '7xl': ('4.5rem', '1'), '8xl': ('6rem', '1'), '9xl': ('8rem', '1'),
+}
+
+TRANSFORM = (
+    'transform:translate(var(--tw-translate-x),var(--tw-translate-y)) rotate(var(--tw-rotate)) '
+    'skewX(var(--tw-skew-x)) skewY(var(--tw-skew-y)) scaleX(var(--tw-scale-x)) scaleY(var(--tw-scale-y))'
+)
+EASE = 'transition-timing-function:cubic-bezier(0.4,0,0.2,1);transition-duration:150ms'
+SHADOW = 'box-shadow:var(--tw-ring-offset-shadow,0 0 #0000),var(--tw-ring-shadow,0 0 #0000),var(--tw-shadow)'
+
+SHADOWS = {
+    'shadow-sm': ['0 1px 2px 0 {}'], 'shadow': ['0 1px 3px 0 {}', '0 1px 2px -1px {}'],
+    'shadow-md': ['0 4px 6px -1px {}', '0 2px 4px -2px {}'],
+    'shadow-lg': ['0 10px 15px -3px {}', '0 4px 6px -4px {}'],
+    'shadow-xl': ['0 20px 25px -5px {}', '0 8px 10px -6px {}'], 'shadow-2xl': ['0 25px 50px -12px {}'],
+}
+SHADOW_ALPHA = {'shadow-sm': '0.05', 'shadow-2xl': '0.25'}
+
+# Tailwind's corePlugins order, restricted to the plugins implemented here.
+# Later plugins win when two utilities on one element set the same property.
+PLUGINS = [
+    'pointerEvents', 'position', 'inset', 'zIndex', 'margin', 'display', 'height', 'minHeight',
+    'width', 'maxWidth', 'flex', 'flexShrink', 'transformOrigin', 'translate', 'rotate', 'scale', 'transform',
+    'cursor', 'gridTemplateColumns', 'flexDirection', 'alignItems', 'justifyContent', 'gap',
+    'space', 'overflow', 'borderRadius', 'borderWidth', 'borderStyle', 'borderColor',
+    'backgroundColor', 'padding', 'textAlign', 'fontFamily', 'fontSize', 'fontWeight',
+    'textTransform', 'fontVariantNumeric', 'letterSpacing', 'textColor', 'opacity', 'boxShadow',
+    'boxShadowColor', 'outlineStyle', 'ringWidth', 'ringColor', 'backdropFilter',
+    'transitionProperty', 'transitionDuration', 'transitionTimingFunction', 'willChange',
+]
+PLUGIN_ORDER = {name: i for i, name in enumerate(PLUGINS)}
+
+# variant: (sort weight, selector wrapper); stacked variants sort by summed weight
+VARIANTS = {
+    'hover': (1, '{}:hover'),
+    'focus': (2, '{}:focus'),
+    'active': (4, '{}:active'),
+    'group-hover': (8, '.group:hover {}'),
+    'dark': (16, '.dark {}'),
+}
+
+STATIC = {
+    'pointer-events-none': ('pointerEvents', 'pointer-events:none'),
+    'origin-left': ('transformOrigin', 'transform-origin:left'),
+    'pointer-events-auto': ('pointerEvents', 'pointer-events:auto'),
+    'static': ('position', 'position:static'),
+    'fixed': ('position', 'position:fixed'),
+    'absolute': ('position', 'position:absolute'),
+    'relative': ('position', 'position:relative'),
+    'sticky': ('position', 'position:sticky'),
+    'block': ('display', 'display:block'),
+    'inline-block': ('display', 'display:inline-block'),
+    'inline': ('display', 'display:inline'),
+    'flex': ('display', 'display:flex'),
+    'inline-flex': ('display', 'display:inline-flex'),
+    'grid': ('display', 'display:grid'),
+    'hidden': ('display', 'display:none'),
+    'min-h-screen': ('minHeight', 'min-height:100vh'),
+    'min-h-full': ('minHeight', 'min-height:100%'),
+    'flex-1': ('flex', 'flex:1 1 0%'),
+    'flex-auto': ('flex', 'flex:1 1 auto'),
+    'flex-none': ('flex', 'flex:none'),
+    'shrink-0': ('flexShrink', 'flex-shrink:0'),
+    'shrink': ('flexShrink', 'flex-shrink:1'),
+    'transform': ('transform', TRANSFORM),
+    'transform-none': ('transform', 'transform:none'),
+    'cursor-pointer': ('cursor', 'cursor:pointer'),
+    'flex-row': ('flexDirection', 'flex-direction:row'),
+    'flex-col': ('flexDirection', 'flex-direction:column'),
+    'items-start': ('alignItems', 'align-items:flex-start'),
+    'items-end': ('alignItems', 'align-items:flex-end'),
+    'items-center': ('alignItems', 'align-items:center'),
+    'justify-start': ('justifyContent', 'justify-content:flex-start'),
+    'justify-end': ('justifyContent', 'justify-content:flex-end'),
+    'justify-center': ('justifyContent', 'justify-content:center'),
+    'justify-between': ('justifyContent', 'justify-content:space-between'),
+    'overflow-hidden': ('overflow', 'overflow:hidden'),
+    'overflow-auto': ('overflow', 'overflow:auto'),
+    'rounded-none': ('borderRadius', 'border-radius:0px'),
+    'rounded-sm': ('borderRadius', 'border-radius:0.125rem'),
+    'rounded': ('borderRadius', 'border-radius:0.25rem'),
+    'rounded-md': ('borderRadius', 'border-radius:0.375rem'),
+    'rounded-lg': ('borderRadius', 'border-radius:0.5rem'),
+    'rounded-xl': ('borderRadius', 'border-radius:0.75rem'),
+    'rounded-2xl': ('borderRadius', 'border-radius:1rem'),
+    'rounded-3xl': ('borderRadius', 'border-radius:1.5rem'),
+    'rounded-full': ('borderRadius', 'border-radius:9999px'),
+    'border': ('borderWidth', 'border-width:1px'),
+    'border-0': ('borderWidth', 'border-width:0px'),
+    'border-2': ('borderWidth', 'border-width:2px'),
+    'border-t': ('borderWidth', 'border-top-width:1px'),
+    'border-b': ('borderWidth', 'border-bottom-width:1px'),
+    'border-solid': ('borderStyle', 'border-style:solid'),
+    'border-none': ('borderStyle', 'border-style:none'),
+    'text-left': ('textAlign', 'text-align:left'),
+    'text-center': ('textAlign', 'text-align:center'),
+    'text-right': ('textAlign', 'text-align:right'),
+    'font-light': ('fontWeight', 'font-weight:300'),
+    'font-normal': ('fontWeight', 'font-weight:400'),
+    'font-medium': ('fontWeight', 'font-weight:500'),
+    'font-semibold': ('fontWeight', 'font-weight:600'),
+    'font-bold': ('fontWeight', 'font-weight:700'),
+    'font-extrabold': ('fontWeight', 'font-weight:800'),
+    'uppercase': ('textTransform', 'text-transform:uppercase'),
+    'lowercase': ('textTransform', 'text-transform:lowercase'),
+    'tabular-nums': ('fontVariantNumeric', 'font-variant-numeric:tabular-nums'),
+    'tracking-tighter': ('letterSpacing', 'letter-spacing:-0.05em'),
+    'tracking-tight': ('letterSpacing', 'letter-spacing:-0.025em'),
+    'tracking-normal': ('letterSpacing', 'letter-spacing:0em'),
+    'tracking-wide': ('letterSpacing', 'letter-spacing:0.025em'),
+    'tracking-wider': ('letterSpacing', 'letter-spacing:0.05em'),
+    'tracking-widest': ('letterSpacing', 'letter-spacing:0.1em'),
+    'shadow-none': ('boxShadow', '--tw-shadow:0 0 #0000;--tw-shadow-colored:0 0 #0000;' + SHADOW),
+    'outline-none': ('outlineStyle', 'outline:2px solid transparent;outline-offset:2px'),
+    'backdrop-blur-sm': ('backdropFilter', '-webkit-backdrop-filter:blur(4px);backdrop-filter:blur(4px)'),
+    'backdrop-blur': ('backdropFilter', '-webkit-backdrop-filter:blur(8px);backdrop-filter:blur(8px)'),
+    'transition-none': ('transitionProperty', 'transition-property:none'),
+    'transition-all': ('transitionProperty', 'transition-property:all;' + EASE),
+    'transition': ('transitionProperty', 'transition-property:color,background-color,border-color,'
+                   'text-decoration-color,fill,stroke,opacity,box-shadow,transform,filter,'
+                   'backdrop-filter;' + EASE),
+    'transition-colors': ('transitionProperty', 'transition-property:color,background-color,'
+                          'border-color,text-decoration-color,fill,stroke;' + EASE),
+    'transition-opacity': ('transitionProperty', 'transition-property:opacity;' + EASE),
+    'transition-transform': ('transitionProperty', 'transition-property:transform;' + EASE),
+    'ease-linear': ('transitionTimingFunction', 'transition-timing-function:linear'),
+    'ease-in': ('transitionTimingFunction', 'transition-timing-function:cubic-bezier(0.4,0,1,1)'),
+    'ease-out': ('transitionTimingFunction', 'transition-timing-function:cubic-bezier(0,0,0.2,1)'),
+    'ease-in-out': ('transitionTimingFunction', 'transition-timing-function:cubic-bezier(0.4,0,0.2,1)'),
+    'will-change-transform': ('willChange', 'will-change:transform'),
+}
+STATIC_RANK = {name: i for i, name in enumerate(STATIC)}
+
+# prefix: (plugin, CSS properties, sub-order so `p-*` loses to `px-*` loses to `pt-*`)
+SPACING_FAMILIES = {
+    'inset': ('inset', ['inset'], 0), 'top': ('inset', ['top'], 1), 'right': ('inset', ['right'], 1),
+    'bottom': ('inset', ['bottom'], 1), 'left': ('inset', ['left'], 1),
+    'm': ('margin', ['margin'], 0), 'mx': ('margin', ['margin-left', 'margin-right'], 1),
+    'my': ('margin', ['margin-top', 'margin-bottom'], 1), 'mt': ('margin', ['margin-top'], 2),
+    'mr': ('margin', ['margin-right'], 2), 'mb': ('margin', ['margin-bottom'], 2),
+    'ml': ('margin', ['margin-left'], 2),
+    'h': ('height', ['height'], 0), 'w': ('width', ['width'], 0),
+    'translate-x': ('translate', ['--tw-translate-x'], 0),
+    'translate-y': ('translate', ['--tw-translate-y'], 0),
+    'gap': ('gap', ['gap'], 0), 'gap-x': ('gap', ['column-gap'], 1), 'gap-y': ('gap', ['row-gap'], 1),
+    'space-y': ('space', ['margin-top'], 0), 'space-x': ('space', ['margin-left'], 0),
+    'p': ('padding', ['padding'], 0), 'px': ('padding', ['padding-left', 'padding-right'], 1),
+    'py': ('padding', ['padding-top', 'padding-bottom'], 1), 'pt': ('padding', ['padding-top'], 2),
+    'pr': ('padding', ['padding-right'], 2), 'pb': ('padding', ['padding-bottom'], 2),
+    'pl': ('padding', ['padding-left'], 2),
+}
+SIZE_KEYWORDS = {
+    'w': {'full': '100%', 'screen': '100vw', 'auto': 'auto', 'min': 'min-content', 'max': 'max-content', 'fit': 'fit-content'},
+    'h': {'full': '100%', 'screen': '100vh', 'auto': 'auto', 'min': 'min-content', 'max': 'max-content', 'fit': 'fit-content'},
+}
+MAX_WIDTHS = {
+    'xs': '20rem', 'sm': '24rem', 'md': '28rem', 'lg': '32rem', 'xl': '36rem', '2xl': '42rem',
+    '3xl': '48rem', '4xl': '56rem', '5xl': '64rem', 'full': '100%', 'none': 'none',
+}
+COLOR_FAMILIES = {
+    'bg': ('backgroundColor', 'background-color:{}'),
+    'text': ('textColor', 'color:{}'),
+    'border': ('borderColor', 'border-color:{}'),
+    'shadow': ('boxShadowColor', '--tw-shadow-color:{};--tw-shadow:var(--tw-shadow-colored)'),
+    'ring': ('ringColor', '--tw-ring-color:{}'),
+}
+
+PREFLIGHT = (
+    "*,::before,::after{box-sizing:border-box;border-width:0;border-style:solid;border-color:#e5e7eb}"
+    "::before,::after{--tw-content:''}"
+    "html,:host{line-height:1.5;-webkit-text-size-adjust:100%;-moz-tab-size:4;tab-size:4;"
+    "font-family:{sans};font-feature-settings:normal;font-variation-settings:normal;"
+    "-webkit-tap-highlight-color:transparent}"
+    "body{margin:0;line-height:inherit}"
+    "hr{height:0;color:inherit;border-top-width:1px}"
+    "h1,h2,h3,h4,h5,h6{font-size:inherit;font-weight:inherit}"
+    "a{color:inherit;text-decoration:inherit}"
+    "b,strong{font-weight:bolder}"
+    "code,kbd,samp,pre{font-family:{mono};font-size:1em}"
+    "small{font-size:80%}"
+    "button,input,optgroup,select,textarea{font-family:inherit;font-feature-settings:inherit;"
+    "font-variation-settings:inherit;font-size:100%;font-weight:inherit;line-height:inherit;"
+    "letter-spacing:inherit;color:inherit;margin:0;padding:0}"
+    "button,select{text-transform:none}"
+    "button,input:where([type='button']),input:where([type='reset']),input:where([type='submit'])"
+    "{-webkit-appearance:button;background-color:transparent;background-image:none}"
+    ":-moz-focusring{outline:auto}"
+    "::-webkit-inner-spin-button,::-webkit-outer-spin-button{height:auto}"
+    "blockquote,dl,dd,h1,h2,h3,h4,h5,h6,hr,figure,p,pre{margin:0}"
+    "ol,ul,menu{list-style:none;margin:0;padding:0}"
+    "input::placeholder,textarea::placeholder{opacity:1;color:#9ca3af}"
+    "button,[role=\"button\"]{cursor:pointer}"
+    ":disabled{cursor:default}"
+    "img,svg,video,canvas,audio,iframe,embed,object{display:block;vertical-align:middle}"
+    "img,video{max-width:100%;height:auto}"
+    "[hidden]:where(:not([hidden=\"until-found\"])){display:none}"
+    "*,::before,::after{--tw-translate-x:0;--tw-translate-y:0;--tw-rotate:0;--tw-skew-x:0;"
+    "--tw-skew-y:0;--tw-scale-x:1;--tw-scale-y:1;--tw-ring-inset: ;--tw-ring-offset-width:0px;"
+    "--tw-ring-offset-color:#fff;--tw-ring-color:rgb(59 130 246 / 0.5);"
+    "--tw-ring-offset-shadow:0 0 #0000;--tw-ring-shadow:0 0 #0000;--tw-shadow:0 0 #0000;"
+    "--tw-shadow-colored:0 0 #0000}"
+)
+
+CANDIDATE_SPLIT = re.compile(r'[\s"\'`<>=;{}(),\[\]]+')
+
+
+def scan_candidates(content):
+    """Split page source into candidate class names (Tailwind's content scan)."""
+    return {token for token in CANDIDATE_SPLIT.split(content) if token}
+
+
+def _font_stack(families):
+    return ','.join(f'"{f}"' if ' ' in f else f for f in families)
+
+
+def _color(name, theme):
+    """Resolve `slate-800` / `black` / `brand-500/30` to a CSS color, or None."""
+    name, _, alpha = name.partition('/')
+    if name in ('transparent', 'current', 'inherit'):
+        return None if alpha else {'transparent': 'transparent', 'current': 'currentColor', 'inherit': 'inherit'}[name]
+    palette = {**PALETTE, **theme.get('colors', {})}
+    family, _, shade = name.rpartition('-')
+    value = palette.get(name) if not family else palette.get(family, {}).get(shade)
+    if not isinstance(value, str):
+        return None
+    if not alpha:
+        return value
+    if not alpha.isdigit():
+        return None
+    r, g, b = (int(value[i:i + 2], 16) for i in (1, 3, 5))
+    return f'rgb({r} {g} {b} / {int(alpha) / 100:g})'
+
+
+def _spacing(value):
+    """Map a spacing-scale key (`4`, `1.5`, `px`) to a length, or None."""
+    if value == '0':
+        return '0px'
+    if value == 'px':
+        return '1px'
+    if not re.fullmatch(r'\d+(\.5)?', value):
+        return None
+    return f'{float(value) / 4:g}rem'
+
+
+def resolve(utility, theme):
+    """Resolve a bare utility (no variants) to (plugin, rank, declarations, selector suffix)."""
+    negative = utility.startswith('-')
+    name = utility[1:] if negative else utility
+
+    if not negative and name in STATIC:
+        plugin, decls = STATIC[name]
+        return plugin, (STATIC_RANK[name],), decls, ''
+
+    if not negative and name in SHADOWS:
+        alpha = SHADOW_ALPHA.get(name, '0.1')
+        shadow = ','.join(s.format(f'rgb(0 0 0 / {alpha})') for s in SHADOWS[name])
+        colored = ','.join(s.format('var(--tw-shadow-color)') for s in SHADOWS[name])
+        return 'boxShadow', (list(SHADOWS).index(name),), f'--tw-shadow:{shadow};--tw-shadow-colored:{colored};{SHADOW}', ''
+
+    match = re.fullmatch(r'([a-z]+(?:-[xy])?)-(.+)', name)
+    if match and match.group(1) in SPACING_FAMILIES:
+        prefix, value = match.groups()
+        plugin, props, sub = SPACING_FAMILIES[prefix]
+        length = SIZE_KEYWORDS.get(prefix, {}).get(value) or _spacing(value)
+        if length is None:
+            return None
+        if negative:
+            if length == '0px' or not length[0].isdigit():
+                return None
+            length = f'-{length}'
+        decls = ';'.join(f'{prop}:{length}' for prop in props)
+        suffix = ''
+        if plugin == 'translate':
+            decls += ';' + TRANSFORM
+        elif plugin == 'space':
+            suffix = '>:not([hidden])~:not([hidden])'
+        rank = (sub, float(value) if re.fullmatch(r'[\d.]+', value) else 999)
+        return plugin, rank, decls, suffix
+
+    match = re.fullmatch(r'rotate-(\d+)', name)
+    if match:
+        sign = '-' if negative else ''
+        return 'rotate', (int(match.group(1)),), f'--tw-rotate:{sign}{match.group(1)}deg;{TRANSFORM}', ''
+    match = re.fullmatch(r'scale-(\d+)', name)
+    if match and not negative:
+        scale = f'{int(match.group(1)) / 100:g}'
+        return 'scale', (int(match.group(1)),), f'--tw-scale-x:{scale};--tw-scale-y:{scale};{TRANSFORM}', ''
+
+    if negative:
+        return None
+
+    match = re.fullmatch(r'max-w-(.+)', name)
+    if match and match.group(1) in MAX_WIDTHS:
+        return 'maxWidth', (list(MAX_WIDTHS).index(match.group(1)),), f'max-width:{MAX_WIDTHS[match.group(1)]}', ''
+    match = re.fullmatch(r'grid-cols-(\d+)', name)
+    if match:
+        cols = int(match.group(1))
+        return 'gridTemplateColumns', (cols,), f'grid-template-columns:repeat({cols},minmax(0,1fr))', ''
+    match = re.fullmatch(r'z-(\d+)', name)
+    if match:
+        return 'zIndex', (int(match.group(1)),), f'z-index:{match.group(1)}', ''
+    match = re.fullmatch(r'opacity-(\d+)', name)
+    if match and int(match.group(1)) <= 100:
+        return 'opacity', (int(match.group(1)),), f'opacity:{int(match.group(1)) / 100:g}', ''
+    match = re.fullmatch(r'duration-(\d+)', name)
+    if match:
+        return 'transitionDuration', (int(match.group(1)),), f'transition-duration:{match.group(1)}ms', ''
+    match = re.fullmatch(r'ring(?:-(\d+))?', name)
+    if match:
+        width = match.group(1) or '3'
+        return 'ringWidth', (int(width),), (
+            '--tw-ring-offset-shadow:var(--tw-ring-inset) 0 0 0 var(--tw-ring-offset-width) var(--tw-ring-offset-color);'
+            f'--tw-ring-shadow:var(--tw-ring-inset) 0 0 0 calc({width}px + var(--tw-ring-offset-width)) var(--tw-ring-color);'
+            'box-shadow:var(--tw-ring-offset-shadow),var(--tw-ring-shadow),var(--tw-shadow,0 0 #0000)'
+        ), ''
+    match = re.fullmatch(r'text-(.+)', name)
+    if match and match.group(1) in FONT_SIZES:
+        size, line_height = FONT_SIZES[match.group(1)]
+        return 'fontSize', (list(FONT_SIZES).index(match.group(1)),), f'font-size:{size};line-height:{line_height}', ''
+    match = re.fullmatch(r'font-(sans|mono)', name)
+    if match:
+        fonts = {**DEFAULT_FONTS, **theme.get('fontFamily', {})}
+        return 'fontFamily', (match.group(1),), f'font-family:{_font_stack(fonts[match.group(1)])}', ''
+
+    match = re.fullmatch(r'(bg|text|border|shadow|ring)-(.+)', name)
+    if match:
+        color = _color(match.group(2), theme)
+        if color is None:
+            return None
+        plugin, template = COLOR_FAMILIES[match.group(1)]
+        return plugin, (match.group(2),), template.format(color), ''
+    return None
+
+
+def _escape(class_name):
+    return re.sub(r'([^a-zA-Z0-9_-])', r'\\\1', class_name)
+
+
+def compile_rule(candidate, theme):
+    """Compile one candidate (with variants) to (sort key, CSS rule), or None."""
+    *variants, utility = candidate.split(':')
+    if not utility or any(v not in VARIANTS for v in variants):
+        return None
+    resolved = resolve(utility, theme)
+    if resolved is None:
+        return None
+    plugin, rank, decls, suffix = resolved
+
+    selector = '.' + _escape(candidate)
+    weight = 0
+    # Apply the innermost variant first, as Tailwind does when stacking
+    for variant in reversed(variants):
+        variant_weight, wrapper = VARIANTS[variant]
+        weight += variant_weight
+        selector = wrapper.format(selector)
+    key = (weight, PLUGIN_ORDER[plugin], tuple(str(r) if isinstance(r, str) else f'{r:012.3f}' for r in rank), candidate)
+    return key, f'{selector}{suffix}{{{decls}}}'
+
+
+def compile_tailwind(content, theme=None):
+    """Compile the utilities referenced in `content` into a minified stylesheet."""
+    theme = theme or {}
+    fonts = {**DEFAULT_FONTS, **theme.get('fontFamily', {})}
+    rules = [r for r in (compile_rule(c, theme) for c in scan_candidates(content)) if r]
+    rules.sort(key=lambda rule: rule[0])
+    preflight = PREFLIGHT.replace('{sans}', _font_stack(fonts['sans'])).replace('{mono}', _font_stack(fonts['mono']))
+    return preflight + ''.join(rule for _, rule in rules)
+
+
+if __name__ == '__main__':
+    import importlib.util
+    import sys
+    from pathlib import Path
+
+    spec = importlib.util.spec_from_file_location('eye_timer', Path(__file__).with_name('eye-timer.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    css = compile_tailwind(module.HTML_TEMPLATE, module.TAILWIND_THEME)
+    if len(sys.argv) > 1:
+        Path(sys.argv[1]).write_text(css)
+    else:
+        print(css)
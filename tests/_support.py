@@ -0,0 +1,29 @@
+"""Shared helpers for the tests in this directory.
+
+Importing this module puts the repository root on sys.path, so the app's
+modules (state_store, webhooks, ...) import the same way whichever test runs first.
+"""
+import importlib.util
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+
+def load_app_module():
+    """Import eye-timer.py (not importable by name because of the hyphen)."""
+    if 'eye_timer' not in sys.modules:
+        spec = importlib.util.spec_from_file_location('eye_timer', ROOT / 'eye-timer.py')
+        module = importlib.util.module_from_spec(spec)
+        sys.modules['eye_timer'] = module
+        spec.loader.exec_module(module)
+    return sys.modules['eye_timer']
+
+
+def app_script():
+    """The page's script, as served from the hashed app.js bundle."""
+    module = load_app_module()
+    url = next(u for u in module.ASSETS if u.startswith('/assets/app.') and u.endswith('.js'))
+    return module.ASSETS[url].variants['identity'].decode()
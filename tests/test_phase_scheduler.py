@@ -0,0 +1,178 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from _support import load_app_module
+from phase_scheduler import MAX_PHASE_MS, MAX_TIME_MS, MIN_PHASE_MS, PhaseScheduler, catch_up_phase
+from state_store import StateStore
+
+NODE = shutil.which('node')
+MINUTE = 60 * 1000
+FOCUS, BREAK = 20 * MINUTE, 20 * 1000
+KEY = 'AbCdEfGhIjKlMnOpQrStUv'
+
+
+class FakeClock:
+    def __init__(self, ms=0):
+        self.ms = ms
+
+    def __call__(self):
+        return self.ms / 1000
+
+
+def running(end_ms, is_focus=True, focus='20', brk='20'):
+    return {'timer': {'isFocus': is_focus, 'isRunning': True, 'endTimeMs': end_ms},
+            'settings': {'focus': focus, 'break': brk}}
+
+
+class TestCatchUpPhase(unittest.TestCase):
+    @unittest.skipIf(NODE is None, 'node not installed')
+    def test_matches_the_page_engine(self):
+        cases = [(focus, end, now, f, b) for focus in (True, False) for end in (0, 1000)
+                 for now in (0, 999, 1000, BREAK, FOCUS + BREAK + 7, 3 * 24 * 60 * MINUTE + 12345)
+                 for f, b in ((FOCUS, BREAK), (0, 0), (5, 0))]
+        script = load_app_module().TIMER_ENGINE_JS + 'console.log(JSON.stringify([' + ','.join(
+            f'catchUpPhase({json.dumps(c[0])}, {c[1]}, {c[2]}, {c[3]}, {c[4]})' for c in cases) + ']));'
+        page = json.loads(subprocess.run([NODE, '-e', script], capture_output=True, text=True, check=True).stdout)
+        for case, expected in zip(cases, page):
+            self.assertEqual(catch_up_phase(*case), (expected['isFocus'], expected['endTimeMs'], expected['transitions']), case)
+
+
+class TestPhaseScheduler(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.scheduler = PhaseScheduler(on_phase=None, clock=self.clock)
+
+    def test_fires_boundaries_in_order_and_keeps_cycling(self):
+        self.scheduler.schedule('b', True, 2000, FOCUS, BREAK)
+        self.scheduler.schedule('a', True, 1000, FOCUS, BREAK)
+        self.assertEqual(self.scheduler.pop_due(999), [])
+        self.assertEqual(self.scheduler.pop_due(2005), [('a', False, 1000, 2005), ('b', False, 2000, 2005)])
+        # The break ends one break length after its boundary, not after it fired
+        self.assertEqual(self.scheduler.next_due_ms(), 1000 + BREAK)
+        self.assertEqual(self.scheduler.pop_due(2000 + BREAK), [('a', True, 1000 + BREAK, 2000 + BREAK),
+                                                                 ('b', True, 2000 + BREAK, 2000 + BREAK)])
+
+    def test_cancel_and_reschedule_leave_no_live_duplicates(self):
+        for i in range(100):
+            self.scheduler.schedule(KEY, True, 1000 + i, FOCUS, BREAK)
+        self.scheduler.schedule('other', True, 5000, FOCUS, BREAK)
+        self.scheduler.cancel('other')
+        self.assertEqual(self.scheduler.pop_due(10000), [(KEY, False, 1099, 10000)])
+        # Stale entries are compacted away rather than piling up
+        self.assertLessEqual(len(self.scheduler.heap), 2 * len(self.scheduler.timers) + 1)
+
+    def test_overdue_schedule_is_caught_up_silently(self):
+        self.clock.ms = 3 * (FOCUS + BREAK) + 5000
+        self.scheduler.schedule(KEY, True, 0, FOCUS, BREAK)
+        self.assertEqual(self.scheduler.pop_due(self.clock.ms), [])
+        self.assertEqual(self.scheduler.next_due_ms(), 3 * (FOCUS + BREAK) + BREAK)
+
+    def test_follows_synced_documents_by_version(self):
+        self.scheduler.apply_state(KEY, 2, running(5000, focus='1', brk='10'))
+        self.scheduler.apply_state(KEY, 1, running(9000))  # older: ignored
+        self.assertEqual(self.scheduler.pop_due(5000), [(KEY, False, 5000, 5000)])
+        self.assertEqual(self.scheduler.next_due_ms(), 15000)
+        self.scheduler.apply_state(KEY, 3, {'timer': {'isFocus': False, 'isRunning': False, 'remainingMs': 4000}})
+        self.assertIsNone(self.scheduler.next_due_ms())
+
+    def test_ignores_end_times_that_are_not_usable(self):
+        for end_ms in (float('inf'), float('-inf'), float('nan'), -1, MAX_TIME_MS + 1, 10 ** 400, True):
+            self.scheduler.apply_state(KEY, 1, running(end_ms))
+            self.assertIsNone(self.scheduler.next_due_ms(), end_ms)
+
+    def test_zero_length_phases_still_advance(self):
+        # A boundary that is due again as soon as it fires would spin pop_due() forever
+        self.scheduler.apply_state(KEY, 1, running(5000, focus='0', brk='0'))
+        self.assertEqual(self.scheduler.pop_due(5000), [(KEY, False, 5000, 5000)])
+        self.assertEqual(self.scheduler.next_due_ms(), 5000 + MIN_PHASE_MS)
+        # Overdue ones are caught up in one step each, however far behind
+        self.clock.ms = 60000
+        self.scheduler.schedule('other', True, 0, 0, 0)
+        self.assertEqual(self.scheduler.pop_due(60000), [(KEY, True, 6000, 60000)])
+        self.assertGreater(self.scheduler.next_due_ms(), 60000)
+
+    def test_huge_phase_lengths_are_clamped(self):
+        # Stored before the store checked them: divmod() on these overflowed and ended the thread
+        self.scheduler.apply_state(KEY, 1, running(5000, focus='9' * 400, brk=10 ** 400))
+        self.clock.ms = 3 * MAX_PHASE_MS
+        self.scheduler.apply_state('other', 1, running(0, focus=float('inf')))
+        self.assertEqual(self.scheduler.pop_due(5000), [(KEY, False, 5000, 5000)])
+        self.assertEqual(self.scheduler.next_due_ms(), 5000 + MAX_PHASE_MS)
+
+    def test_thread_survives_a_failing_boundary(self):
+        fired = []
+        done = threading.Event()
+        scheduler = PhaseScheduler(lambda *event: (fired.append(event), done.set()))
+        pop_due, failures = scheduler.pop_due, [RuntimeError('first boundary fails')]
+
+        def flaky_pop_due(now_ms):
+            if failures:
+                raise failures.pop()
+            return pop_due(now_ms)
+
+        with mock.patch.object(scheduler, 'pop_due', flaky_pop_due), mock.patch('traceback.print_exc'):
+            scheduler.schedule(KEY, True, scheduler.now_ms() + 50, FOCUS, BREAK)
+            scheduler.start()
+            self.addCleanup(scheduler.stop)
+            self.assertTrue(done.wait(3))
+        self.assertEqual(fired[0][:2], (KEY, False))
+
+    def test_thread_wakes_for_an_earlier_boundary(self):
+        fired = []
+        done = threading.Event()
+        scheduler = PhaseScheduler(lambda *event: (fired.append(event), done.set()))
+        # The thread's first sleep is until a boundary too far off for one Condition.wait()
+        scheduler.schedule('latest', True, MAX_TIME_MS, FOCUS, BREAK)
+        scheduler.start()
+        self.addCleanup(scheduler.stop)
+        scheduler.schedule('late', True, scheduler.now_ms() + 60000, FOCUS, BREAK)
+        scheduler.schedule(KEY, True, scheduler.now_ms() + 50, FOCUS, BREAK)
+        self.assertTrue(done.wait(2))
+        self.assertEqual(fired[0][:2], (KEY, False))
+
+
+class TestSchedulerWithStore(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, 'state.sqlite3')
+        self.store = StateStore(self.path)
+
+    def test_picks_up_changes_once(self):
+        scheduler = PhaseScheduler(on_phase=None, clock=FakeClock())
+        self.store.patch(KEY, running(5000))
+        cursor = scheduler.apply_changes(self.store, 0)
+        self.assertEqual(scheduler.pop_due(5000), [(KEY, False, 5000, 5000)])
+        # Re-reading the same version (within the commit slack) doesn't rewind the timer
+        self.assertEqual(scheduler.apply_changes(self.store, cursor), cursor)
+        self.assertEqual(scheduler.next_due_ms(), 5000 + BREAK)
+
+    def test_only_one_process_runs_the_scheduler(self):
+        module = load_app_module()
+        with mock.patch.multiple(module, PHASE_SCHEDULER=True, STATE_DB=self.path, STATE_STORE=self.store, scheduler_lock=None,
+                                 SCHEDULER=PhaseScheduler(lambda *event: None)):
+            self.assertTrue(module.start_phase_scheduler())
+            self.addCleanup(module.scheduler_lock.close)
+            self.addCleanup(module.SCHEDULER.stop)
+            # Another worker on the same database (a second open file description) loses the bid
+            other = subprocess.run([sys.executable, '-c', (
+                'import fcntl, sys\n'
+                f'f = open({self.path + ".scheduler.lock"!r}, "a")\n'
+                'try:\n    fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)\nexcept BlockingIOError:\n    sys.exit(3)\n')])
+            self.assertEqual(other.returncode, 3)
+
+    def test_off_unless_enabled(self):
+        module = load_app_module()
+        with mock.patch.multiple(module, PHASE_SCHEDULER=False, scheduler_lock=None):
+            self.assertFalse(module.start_phase_scheduler())
+
+
+if __name__ == '__main__':
+    unittest.main()
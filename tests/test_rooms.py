@@ -0,0 +1,175 @@
+import asyncio
+import json
+import unittest
+from unittest import mock
+
+import _support  # noqa: F401 (puts the repository root on sys.path)
+import rooms_server
+
+
+async def http(port, method, path, body=None, headers=None):
+    """(status, parsed JSON body) of one request over a fresh connection."""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    data = json.dumps(body).encode() if body is not None else b''
+    head = [f'{method} {path} HTTP/1.1', 'Host: test', 'Connection: close', f'Content-Length: {len(data)}',
+            *(f'{name}: {value}' for name, value in (headers or {}).items())]
+    writer.write(('\r\n'.join(head) + '\r\n\r\n').encode() + data)
+    raw = await reader.read()
+    writer.close()
+    status_line, _, rest = raw.partition(b'\r\n')
+    payload = rest.partition(b'\r\n\r\n')[2]
+    return int(status_line.split()[1]), json.loads(payload) if payload else None
+
+
+class SSEClient:
+    """A minimal EventSource: reads events as (id, event, data) tuples; comments as ('', ':', text)."""
+
+    @classmethod
+    async def connect(cls, port, room, last_event_id=None):
+        self = cls()
+        self.reader, self.writer = await asyncio.open_connection('127.0.0.1', port)
+        extra = f'Last-Event-ID: {last_event_id}\r\n' if last_event_id else ''
+        self.writer.write(f'GET /rooms/{room}/events HTTP/1.1\r\nHost: test\r\n{extra}\r\n'.encode())
+        head = await self.reader.readuntil(b'\r\n\r\n')
+        self.status = int(head.split()[1])
+        return self
+
+    async def next(self, timeout=2):
+        while True:
+            block = (await asyncio.wait_for(self.reader.readuntil(b'\n\n'), timeout)).decode()
+            fields = dict(line.partition(': ')[::2] for line in block.strip().split('\n') if not line.startswith(':'))
+            if block.startswith(':'):
+                return '', ':', block.strip()
+            if 'event' in fields:
+                return fields.get('id'), fields['event'], json.loads(fields['data'])
+
+    def close(self):
+        self.writer.close()
+
+
+def room_state(action, **timer):
+    """An action body as the page's publishRoomState() sends it."""
+    return {'action': action, 'timer': timer, 'focusTime': 1200, 'breakTime': 20}
+
+
+class TestRoomsServer(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.app = rooms_server.RoomsServer()
+        self.server = await self.app.serve('127.0.0.1', 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+        status, body = await http(self.port, 'POST', '/rooms')
+        self.assertEqual(status, 201)
+        self.room, self.token = body['room'], body['token']
+
+    async def asyncTearDown(self):
+        self.app.housekeeping.cancel()
+        self.server.close()
+        for room in self.app.rooms.values():
+            for subscriber in list(room.subscribers):
+                subscriber.writer.close()
+        await self.server.wait_closed()
+
+    async def act(self, state, token=None):
+        return await http(self.port, 'POST', f'/rooms/{self.room}/actions', state,
+                          {'Authorization': f'Bearer {token or self.token}', 'Content-Type': 'application/json'})
+
+    async def test_actions_fan_out_to_every_subscriber(self):
+        viewers = [await SSEClient.connect(self.port, self.room) for _ in range(5)]
+        self.assertEqual({viewer.status for viewer in viewers}, {200})
+        await asyncio.sleep(0.05)  # let the server register them
+        state = room_state('start', isFocus=True, isRunning=True, endTimeMs=123)
+        self.assertEqual(await self.act(state), (200, {'seq': 1, 'viewers': 5}))
+        for viewer in viewers:
+            self.assertEqual(await viewer.next(), ('1', 'state', state))
+            viewer.close()
+
+    async def test_only_the_controller_can_act(self):
+        self.assertEqual((await self.act(room_state('pause'), token='wrong'))[0], 403)
+        self.assertEqual((await self.act({'unexpected': 1}))[0], 400)
+        status, _ = await http(self.port, 'POST', '/rooms/nosuchroom1/actions', {}, {'Authorization': 'Bearer x'})
+        self.assertEqual(status, 404)
+        self.assertEqual((await SSEClient.connect(self.port, 'nosuchroom1')).status, 404)
+
+    async def test_incomplete_or_unknown_actions_are_not_broadcast(self):
+        # Viewers apply every broadcast state: one without a timer would break them
+        for state in ({}, {'action': 'start'}, room_state(''), room_state('explode'), room_state(['start']),
+                      {**room_state('skip'), 'timer': None}, {**room_state('skip'), 'focusTime': '1200'},
+                      {**room_state('skip'), 'breakTime': 0}):
+            self.assertEqual((await self.act(state))[0], 400, state)
+        status, _ = await http(self.port, 'POST', f'/rooms/{self.room}/actions', None,
+                               {'Authorization': f'Bearer {self.token}'})
+        self.assertEqual(status, 400)
+        self.assertIsNone(self.app.rooms[self.room].event)
+
+    async def test_joining_gets_current_state_unless_already_seen(self):
+        await self.act(room_state('start'))
+        await self.act(room_state('pause'))
+        fresh = await SSEClient.connect(self.port, self.room)
+        self.assertEqual(await fresh.next(), ('2', 'state', room_state('pause')))
+        current = await SSEClient.connect(self.port, self.room, last_event_id='2')
+        await asyncio.sleep(0.05)
+        self.app.send_heartbeats()
+        self.assertEqual((await current.next())[1], ':')  # nothing was resent before the heartbeat
+        fresh.close()
+        current.close()
+
+
+class FakeTransport:
+    def __init__(self):
+        self.buffered = 0
+        self.aborted = False
+
+    def get_write_buffer_size(self):
+        return self.buffered
+
+    def get_write_buffer_limits(self):
+        return 16, 64
+
+    def abort(self):
+        self.aborted = True
+
+
+class FakeWriter:
+    def __init__(self):
+        self.transport = FakeTransport()
+        self.written = []
+        self.drained = asyncio.Event()
+
+    def is_closing(self):
+        return self.transport.aborted
+
+    def write(self, data):
+        self.written.append(data)
+
+    async def drain(self):
+        await self.drained.wait()
+
+
+class TestSubscriberBackpressure(unittest.IsolatedAsyncioTestCase):
+    async def test_backed_up_client_only_gets_the_latest_state(self):
+        writer = FakeWriter()
+        subscriber = rooms_server.Subscriber(writer)
+        subscriber.send(b'first')
+        self.assertIsNone(subscriber.flushing)  # written directly, no task
+        writer.transport.buffered = 100  # past the high-water mark
+        for data in (b'second', b'third', rooms_server.HEARTBEAT):
+            subscriber.send(data)
+        writer.transport.buffered = 0
+        writer.drained.set()
+        await asyncio.sleep(0.01)
+        self.assertEqual(writer.written, [b'first', b'third'])
+        self.assertIsNone(subscriber.flushing)
+
+    async def test_stalled_client_is_dropped(self):
+        writer = FakeWriter()
+        writer.transport.buffered = 100
+        subscriber = rooms_server.Subscriber(writer)
+        with mock.patch.object(rooms_server, 'SLOW_CLIENT_TIMEOUT', 0.05):
+            subscriber.send(b'event')
+            await asyncio.sleep(0.2)
+        self.assertTrue(writer.transport.aborted)
+        self.assertEqual(writer.written, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
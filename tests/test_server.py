@@ -0,0 +1,235 @@
+import gzip
+import importlib.util
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from _support import ROOT, app_script, load_app_module
+
+
+class TestIndexResponse(unittest.TestCase):
+    def setUp(self):
+        self.module = load_app_module()
+        self.client = self.module.app.test_client()
+
+    def test_index_matches_template(self):
+        """The prebuilt page is byte-identical to rendering the template per request."""
+        resp = self.client.get('/', headers={'Accept-Encoding': 'identity'})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.get_data(as_text=True), self.module.render_index())
+        self.assertEqual(resp.headers['Cache-Control'], 'no-cache')
+        self.assertNotIn('Content-Encoding', resp.headers)
+
+    def test_index_gzip_variant(self):
+        resp = self.client.get('/', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(resp.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(resp.headers['Vary'], 'Accept-Encoding')
+        self.assertEqual(gzip.decompress(resp.data), self.module.INDEX_PAGE.variants['identity'])
+
+    @unittest.skipIf(load_app_module().brotli is None, 'brotli not installed')
+    def test_index_brotli_preferred(self):
+        resp = self.client.get('/', headers={'Accept-Encoding': 'gzip, br'})
+        self.assertEqual(resp.headers['Content-Encoding'], 'br')
+        self.assertEqual(self.module.brotli.decompress(resp.data), self.module.INDEX_PAGE.variants['identity'])
+
+    def test_if_none_match_returns_304(self):
+        first = self.client.get('/', headers={'Accept-Encoding': 'gzip'})
+        etag = first.headers['ETag']
+        resp = self.client.get('/', headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+        self.assertEqual(resp.status_code, 304)
+        self.assertEqual(resp.data, b'')
+        self.assertEqual(resp.headers['ETag'], etag)
+
+    def test_etag_of_another_encoding_returns_full_body(self):
+        gzip_etag = self.client.get('/', headers={'Accept-Encoding': 'gzip'}).headers['ETag']
+        resp = self.client.get('/', headers={'Accept-Encoding': 'identity', 'If-None-Match': gzip_etag})
+        self.assertEqual(resp.status_code, 200)
+        self.assertNotIn('Content-Encoding', resp.headers)
+        self.assertEqual(resp.data, self.module.INDEX_PAGE.variants['identity'])
+
+    def test_stale_etag_returns_full_body(self):
+        resp = self.client.get('/', headers={'If-None-Match': '"not-the-current-page"'})
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp.data)
+
+
+class TestCompiledStylesheet(unittest.TestCase):
+    def setUp(self):
+        self.module = load_app_module()
+        self.client = self.module.app.test_client()
+
+    def test_page_links_hashed_stylesheet_instead_of_cdn(self):
+        page = self.client.get('/').get_data(as_text=True)
+        self.assertNotIn('cdn.tailwindcss.com', page)
+        url = next(u for u in self.module.ASSETS if u.startswith('/assets/tailwind.'))
+        self.assertIn(f'href="{url}"', page)
+
+    def test_stylesheet_is_immutable_and_conditional(self):
+        url = next(u for u in self.module.ASSETS if u.startswith('/assets/tailwind.'))
+        resp = self.client.get(url)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.mimetype, 'text/css')
+        self.assertIn('immutable', resp.headers['Cache-Control'])
+        self.assertIn(b'.hidden{display:none}', resp.data)
+        again = self.client.get(url, headers={'If-None-Match': resp.headers['ETag']})
+        self.assertEqual(again.status_code, 304)
+
+    def test_unknown_asset_is_404(self):
+        self.assertEqual(self.client.get('/assets/missing.000000000000.css').status_code, 404)
+
+
+class TestBundles(unittest.TestCase):
+    def setUp(self):
+        self.module = load_app_module()
+        self.client = self.module.app.test_client()
+        self.page = self.client.get('/').get_data(as_text=True)
+
+    def test_shell_links_bundles_instead_of_inlining(self):
+        self.assertNotIn('<script>', self.page)
+        self.assertNotIn('<style>', self.page)
+        self.assertLess(len(self.module.INDEX_PAGE.variants['identity']), 12 * 1024)
+        for kind, mimetype in (('css', 'text/css'), ('js', 'text/javascript')):
+            url = re.search(rf'"(/assets/app\.[0-9a-f]{{12}}\.{kind})"', self.page).group(1)
+            resp = self.client.get(url, headers={'Accept-Encoding': 'gzip'})
+            self.assertEqual(resp.mimetype, mimetype)
+            self.assertEqual(resp.headers['Cache-Control'], self.module.ASSET_CACHE_CONTROL)
+            self.assertEqual(resp.headers['Content-Encoding'], 'gzip')
+
+    def test_script_runs_after_the_markup_it_uses(self):
+        self.assertRegex(self.page, r'<script src="/assets/app\.[0-9a-f]{12}\.js"></script>\s*</body>')
+
+    def test_minify_js_keeps_code_and_template_literals(self):
+        source = """
+            // comment
+            const a = 1; // trailing comments stay
+            const b = `first
+                // not a comment
+            last`;
+        """
+        self.assertEqual(self.module.minify_js(source), 'const a = 1; // trailing comments stay\n'
+                         'const b = `first\n                // not a comment\n            last`;')
+
+    def test_minify_css(self):
+        css = '/* x */\n  input[type=range] {\n    height: 4px;\n    margin: 0 auto;\n  }\n  a > b, c { color: red; }'
+        self.assertEqual(self.module.minify_css(css), 'input[type=range]{height: 4px;margin: 0 auto}a>b,c{color: red}')
+
+
+class TestSelfHostedFonts(unittest.TestCase):
+    def setUp(self):
+        self.module = load_app_module()
+        self.client = self.module.app.test_client()
+        self.page = self.client.get('/').get_data(as_text=True)
+
+    def test_page_has_no_third_party_icon_requests(self):
+        self.assertNotIn('cdnjs.cloudflare.com', self.page)
+
+    def test_page_has_no_google_fonts_requests_by_default(self):
+        self.assertNotIn('fonts.googleapis.com', self.page)
+
+    def test_google_fonts_fallback_is_opt_in(self):
+        *_, missing = self.module.build_font_assets()
+        with mock.patch.object(self.module, 'GOOGLE_FONTS_FALLBACK', True), mock.patch.dict(self.module.ASSETS):
+            context = self.module.template_context()
+        self.assertEqual(context['google_fonts_url'], self.module.google_fonts_url(missing))
+
+    @unittest.skipIf(importlib.util.find_spec('fontTools') is None, 'fontTools not installed')
+    def test_cdn_stylesheet_matches_the_vendored_icon_release(self):
+        from fontTools.ttLib import TTFont
+        font = TTFont(ROOT / 'static' / 'fonts' / 'fa-solid-900.woff2')
+        self.assertIn(f'Font Awesome version: {self.module.FONTAWESOME_VERSION}', font['name'].getDebugName(5))
+        with mock.patch.object(self.module, 'ASSET_SOURCE', 'cdn'), mock.patch.dict(self.module.ASSETS):
+            page = self.module.render_index()
+        self.assertIn(f'/font-awesome/{self.module.FONTAWESOME_VERSION}/css/all.min.css', page)
+
+    def test_fully_vendored_families_need_no_google_fonts(self):
+        with tempfile.TemporaryDirectory() as static_dir:
+            os.mkdir(os.path.join(static_dir, 'fonts'))
+            manifest = [{'family': family, 'weight': '400', 'file': f'{i}.woff2'}
+                        for i, family in enumerate(self.module.GOOGLE_FONT_FAMILIES)]
+            for entry in manifest:
+                shutil.copy(ROOT / 'static' / 'fonts' / 'fa-solid-900.woff2', os.path.join(static_dir, 'fonts', entry['file']))
+            with open(os.path.join(static_dir, 'fonts', 'fonts.json'), 'w') as f:
+                json.dump(manifest, f)
+            with mock.patch.object(self.module, 'STATIC_DIR', static_dir), mock.patch.dict(self.module.ASSETS):
+                *_, missing = self.module.build_font_assets()
+        self.assertEqual(missing, [])
+        self.assertIsNone(self.module.google_fonts_url(missing))
+
+    def test_every_icon_in_template_is_subsetted(self):
+        used = set(re.findall(r'fa-([a-z-]+)', self.module.HTML_TEMPLATE)) - {'solid'}
+        self.assertLessEqual(used, set(self.module.FONTAWESOME_ICONS))
+
+    def test_fonts_css_and_font_files_are_hashed_assets(self):
+        css_url = re.search(r'href="(/assets/fonts\.[0-9a-f]+\.css)"', self.page).group(1)
+        css = self.client.get(css_url).get_data(as_text=True)
+        self.assertIn('.fa-play::before{content:"\\f04b"}', css)
+        font_url = re.search(r'url\((/assets/fa-solid-900\.[0-9a-f]+\.woff2)\)', css).group(1)
+        self.assertIn(f'rel="preload" href="{font_url}"', self.page)
+        resp = self.client.get(font_url)
+        self.assertEqual(resp.mimetype, 'font/woff2')
+        self.assertEqual(resp.headers['Cache-Control'], self.module.ASSET_CACHE_CONTROL)
+        self.assertEqual(resp.data[:4], b'wOF2')
+
+
+class TestServiceWorker(unittest.TestCase):
+    def setUp(self):
+        self.module = load_app_module()
+        self.client = self.module.app.test_client()
+
+    def test_page_registers_service_worker(self):
+        self.assertIn("navigator.serviceWorker.register('/sw.js')", app_script())
+
+    def test_service_worker_precaches_shell_and_assets(self):
+        resp = self.client.get('/sw.js')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.mimetype, 'text/javascript')
+        self.assertEqual(resp.headers['Cache-Control'], 'no-cache')
+        script = resp.get_data(as_text=True)
+        for url in ['/', '/favicon.png', *self.module.ASSETS]:
+            self.assertIn(f'"{url}"', script)
+
+    def test_new_version_waits_for_pages_on_the_old_one(self):
+        # Taking over open pages would delete the old hashed assets they still load
+        script = self.client.get('/sw.js').get_data(as_text=True)
+        self.assertNotIn('self.skipWaiting', script)
+        self.assertNotIn('self.clients.claim', script)
+
+    def test_service_worker_is_revalidated_by_etag(self):
+        etag = self.client.get('/sw.js').headers['ETag']
+        self.assertEqual(self.client.get('/sw.js', headers={'If-None-Match': etag}).status_code, 304)
+
+
+class TestHealthz(unittest.TestCase):
+    def test_healthz_is_cheap_and_uncached(self):
+        resp = load_app_module().app.test_client().get('/healthz')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data, b'ok')
+        self.assertEqual(resp.headers['Cache-Control'], 'no-store')
+
+
+class TestClockProbe(unittest.TestCase):
+    def test_reports_server_time_uncached(self):
+        before = time.time() * 1000
+        resp = load_app_module().app.test_client().get('/api/time')
+        after = time.time() * 1000
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.headers['Cache-Control'], 'no-store')
+        probe = resp.get_json()
+        self.assertLessEqual(before, probe['t1'])
+        self.assertLessEqual(probe['t1'], probe['t2'])
+        self.assertLessEqual(probe['t2'], after)
+
+    def test_only_get_and_head(self):
+        client = load_app_module().app.test_client()
+        self.assertEqual(client.head('/api/time').status_code, 200)
+        resp = client.post('/api/time')
+        self.assertEqual((resp.status_code, resp.headers['Allow']), (405, 'GET, HEAD'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,165 @@
+import io
+import json
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import unittest
+import wave
+from unittest import mock
+
+from _support import app_script, load_app_module
+
+NODE = shutil.which('node')
+
+# Minimal Web Audio stand-in: an AudioContext at currentTime 10 s whose output
+# is 200 ms behind its clock; records when every oscillator is started
+FAKE_AUDIO_JS = """
+const started = [];
+let contexts = 0;
+const node = () => ({
+    connect: (next) => next, frequency: {}, start: (t) => started.push(t), stop() {},
+    gain: { value: 0, setValueAtTime() {}, linearRampToValueAtTime() {}, exponentialRampToValueAtTime() {} },
+});
+class FakeContext {
+    constructor() { contexts++; Object.assign(this, { currentTime: 10, baseLatency: 0.01, outputLatency: 0.19, state: 'running', destination: {} }); }
+    createGain() { return node(); }
+    createOscillator() { return node(); }
+}
+const window = { AudioContext: FakeContext };
+const NOW = 1000000;
+Date.now = () => NOW;
+"""
+
+
+class TestSoundProfiles(unittest.TestCase):
+    def setUp(self):
+        self.module = load_app_module()
+
+    def test_every_selectable_sound_has_both_variants(self):
+        options = re.findall(r'<option value="(\w+)"', self.module.HTML_TEMPLATE)
+        self.assertEqual(set(options), set(self.module.SOUND_PROFILES))
+        for variants in self.module.SOUND_PROFILES.values():
+            self.assertEqual(set(variants), {'forward', 'reverse'})
+
+    def test_notes_are_well_formed(self):
+        for name, variants in self.module.SOUND_PROFILES.items():
+            for notes in variants.values():
+                for freq, waveform, start, duration in notes:
+                    self.assertIn(waveform, ('sine', 'square', 'triangle'), name)
+                    self.assertGreater(freq, 0)
+                    self.assertGreaterEqual(start, 0)
+                    # The envelope needs its 50 ms attack to fit
+                    self.assertGreater(duration, 0.05)
+
+    def test_page_embeds_the_table_and_plays_cached_buffers(self):
+        page = app_script()
+        embedded = json.loads(page.split('const SOUND_PROFILES = ', 1)[1].split(';\n', 1)[0])
+        self.assertEqual(embedded, json.loads(json.dumps(self.module.SOUND_PROFILES)))
+        self.assertIn('startRendering()', page)
+        self.assertIn('createBufferSource()', page)
+
+    def test_repeats_are_scheduled_on_the_audio_clock(self):
+        template = self.module.HTML_TEMPLATE
+        # Only the <audio> fallback (no Web Audio, so no audio clock) uses timers
+        play = template[template.index('            play(repeatCount'):template.index('            playElements(')]
+        self.assertNotIn('setTimeout', play)
+        self.assertIn('source.start(at)', play)
+        reset = template[template.index('const resetTimer = () => {'):]
+        self.assertIn('audio.stop();', reset[:reset.index('};')])
+
+
+def run_sound_engine(steps):
+    """Run `steps` against a SoundEngine (`audio`) over FAKE_AUDIO_JS; return what they print."""
+    page = app_script()
+    engine = page[page.index('const SOUND_PROFILES = '):page.index('const appState = {')]
+    script = FAKE_AUDIO_JS + engine + 'const audio = new SoundEngine();' + steps
+    return json.loads(subprocess.run([NODE, '-e', script], capture_output=True, text=True, check=True).stdout)
+
+
+@unittest.skipIf(NODE is None, 'node not installed')
+class TestLazyAudioContext(unittest.TestCase):
+    def test_context_is_created_on_first_use_only(self):
+        counts = run_sound_engine("""
+            const counts = [contexts];
+            audio.setVolume(80); audio.setType('harp');
+            counts.push(contexts);
+            audio.resume(); audio.resume();
+            counts.push(contexts, audio.master.gain.value);
+            console.log(JSON.stringify(counts));
+        """)
+        self.assertEqual(counts, [0, 0, 1, 0.8])
+
+
+@unittest.skipIf(NODE is None, 'node not installed')
+class TestLatencyCompensation(unittest.TestCase):
+    def play(self, call):
+        """Return [heardMs, oscillator start times] for a play() call."""
+        return run_sound_engine(f'{call}.then((heard) => console.log(JSON.stringify([heard, started])));')
+
+    def test_ring_is_queued_ahead_by_the_output_latency(self):
+        heard, started = self.play('audio.play(2, 1, false, NOW + 2000)')
+        # Heard at the requested moment: the audio clock starts it 0.2 s early
+        self.assertEqual(heard, 1002000)
+        self.assertAlmostEqual(min(started), 11.8)
+        self.assertAlmostEqual(max(started), 11.8 + 1 + 0.15)
+
+    def test_past_or_absent_target_starts_now(self):
+        for call in ('audio.play(1, 1, false, NOW - 500)', 'audio.play(1, 1)'):
+            heard, started = self.play(call)
+            self.assertAlmostEqual(min(started), 10)
+            self.assertEqual(heard, 1000200)
+
+
+class TestBuiltinWav(unittest.TestCase):
+    def setUp(self):
+        self.module = load_app_module()
+        self.wav_synth = self.module.load_wav_synth()
+        if self.wav_synth is None:
+            self.skipTest('numpy not installed')
+        self.client = self.module.app.test_client()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        patcher = mock.patch.object(self.module, 'WAV_CACHE_DIR', tmp.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def fetch(self, url):
+        resp = self.client.get(url)
+        self.addCleanup(resp.close)
+        return resp
+
+    def test_renders_a_mono_16_bit_wav_of_the_profile(self):
+        resp = self.fetch('/sounds/builtin/chime.wav')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.mimetype, 'audio/wav')
+        with wave.open(io.BytesIO(resp.data)) as w:
+            self.assertEqual((w.getnchannels(), w.getsampwidth()), (1, 2))
+            notes = self.module.SOUND_PROFILES['chime']['forward']
+            length = max(start + duration for _, _, start, duration in notes)
+            self.assertAlmostEqual(w.getnframes() / w.getframerate(), length, places=3)
+
+    def test_reverse_and_volume_change_the_render_and_are_cached_on_disk(self):
+        forward = self.fetch('/sounds/builtin/harp.wav?volume=80').data
+        reverse = self.fetch('/sounds/builtin/harp.wav?volume=80&reverse=1').data
+        quiet = self.fetch('/sounds/builtin/harp.wav?volume=20').data
+        self.assertEqual(len({forward, reverse, quiet}), 3)
+        self.assertEqual(len(os.listdir(self.module.WAV_CACHE_DIR)), 3)
+        # A second request is served from the cached file
+        with mock.patch.object(self.wav_synth, 'render_notes', side_effect=AssertionError):
+            self.assertEqual(self.fetch('/sounds/builtin/harp.wav?volume=80').data, forward)
+
+    def test_conditional_request_gets_304(self):
+        etag = self.fetch('/sounds/builtin/digital.wav').headers['ETag']
+        resp = self.client.get('/sounds/builtin/digital.wav', headers={'If-None-Match': etag})
+        self.assertEqual(resp.status_code, 304)
+
+    def test_rejects_unknown_profiles_and_bad_volumes(self):
+        self.assertEqual(self.fetch('/sounds/builtin/nope.wav').status_code, 404)
+        self.assertEqual(self.fetch('/sounds/builtin/chime.wav?volume=loud').status_code, 400)
+        self.assertEqual(self.fetch('/sounds/builtin/chime.wav?volume=101').status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from _support import load_app_module
+
+
+KEY = 'AbCdEfGhIjKlMnOpQrStUv'
+
+
+class TestStateApi(unittest.TestCase):
+    def setUp(self):
+        self.module = load_app_module()
+        from state_store import StateStore
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.store = StateStore(os.path.join(tmp.name, 'state.sqlite3'), max_bytes=1024)
+        patcher = mock.patch.object(self.module, 'STATE_STORE', self.store)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = self.module.app.test_client()
+
+    def patch(self, delta, version=None, key=KEY):
+        headers = {} if version is None else {'If-Match': f'"{version}"'}
+        return self.client.patch(f'/api/state/{key}', data=json.dumps(delta), headers=headers,
+                                 content_type='application/merge-patch+json')
+
+    def test_patch_then_conditional_get(self):
+        self.assertEqual(self.client.get(f'/api/state/{KEY}').status_code, 404)
+        created = self.patch({'timer': {'isFocus': True, 'isRunning': True, 'endTimeMs': 1000}}, version=0)
+        self.assertEqual((created.status_code, created.get_json()), (200, {'version': 1}))
+
+        resp = self.client.get(f'/api/state/{KEY}')
+        self.assertEqual(resp.headers['ETag'], '"1"')
+        self.assertEqual(resp.get_json()['state']['timer']['endTimeMs'], 1000)
+        again = self.client.get(f'/api/state/{KEY}', headers={'If-None-Match': resp.headers['ETag']})
+        self.assertEqual((again.status_code, again.data), (304, b''))
+
+    def test_patches_merge_and_null_removes(self):
+        self.patch({'timer': {'isRunning': True, 'endTimeMs': 1000}, 'settings': {'focus': '20'}})
+        self.patch({'timer': {'isRunning': False, 'endTimeMs': None, 'remainingMs': 500}})
+        state = self.client.get(f'/api/state/{KEY}').get_json()
+        self.assertEqual(state, {'version': 2, 'state': {
+            'timer': {'isRunning': False, 'remainingMs': 500}, 'settings': {'focus': '20'}}})
+
+    def test_stale_write_gets_412_with_current_state(self):
+        self.patch({'settings': {'focus': '20'}}, version=0)
+        self.patch({'settings': {'focus': '25'}}, version=1)
+        stale = self.patch({'settings': {'break': '30'}}, version=1)
+        self.assertEqual(stale.status_code, 412)
+        self.assertEqual(stale.get_json(), {'version': 2, 'state': {'settings': {'focus': '25'}}})
+        self.assertEqual(self.patch({'settings': {'break': '30'}}, version=2).get_json(), {'version': 3})
+
+    def test_rejects_bad_keys_bodies_and_oversized_state(self):
+        self.assertEqual(self.client.get('/api/state/short').status_code, 404)
+        self.assertEqual(self.patch(['not', 'an', 'object']).status_code, 400)
+        self.assertEqual(self.patch({'other': {}}).status_code, 400)
+        self.assertEqual(self.patch({'settings': {'note': 'x' * 2000}}).status_code, 413)
+        # NaN and Infinity (and overflowing literals) aren't JSON: browsers couldn't read the state back
+        for number in ('NaN', 'Infinity', '-Infinity', '1e999'):
+            resp = self.client.patch(f'/api/state/{KEY}', data='{"timer": {"endTimeMs": %s}}' % number,
+                                     content_type='application/merge-patch+json')
+            self.assertEqual(resp.status_code, 400, number)
+        for timer in ({'endTimeMs': '1000'}, {'remainingMs': True}, {'isRunning': 1}, {'isFocus': 'yes'}):
+            self.assertEqual(self.patch({'timer': timer}).status_code, 400, timer)
+        # The phase scheduler does arithmetic on the phase lengths
+        for settings in ({'focus': '9' * 400}, {'focus': 10 ** 400}, {'break': '0'}, {'break': 86401},
+                         {'focus': '1.5'}, {'focus': True}, {'break': ''}):
+            self.assertEqual(self.patch({'settings': settings}).status_code, 400, settings)
+        self.assertEqual(self.client.get(f'/api/state/{KEY}').status_code, 404)
+
+
+class TestStateStore(unittest.TestCase):
+    def setUp(self):
+        load_app_module()
+        from state_store import StateStore, merge_patch
+        self.merge_patch = merge_patch
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, 'state.sqlite3')
+        self.store = StateStore(self.path, pool_size=4)
+
+    def test_merge_patch(self):
+        self.assertEqual(self.merge_patch({'a': {'b': 1, 'c': 2}, 'd': 3}, {'a': {'b': None, 'e': 4}, 'd': [5]}),
+                         {'a': {'c': 2, 'e': 4}, 'd': [5]})
+
+    def test_concurrent_writers_each_get_a_version(self):
+        def writer(n):
+            for i in range(20):
+                self.store.patch(KEY, {'settings': {f'w{n}': i}})
+
+        threads = [threading.Thread(target=writer, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        version, state = self.store.get(KEY)
+        self.assertEqual(version, 160)
+        self.assertEqual(state['settings'], {f'w{n}': 19 for n in range(8)})
+        self.assertLessEqual(self.store.pool.qsize(), 4)
+        with sqlite3.connect(self.path) as conn:
+            self.assertEqual(conn.execute('PRAGMA journal_mode').fetchone()[0], 'wal')
+
+
+if __name__ == '__main__':
+    unittest.main()
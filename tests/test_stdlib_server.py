@@ -0,0 +1,112 @@
+import gzip
+import http.client
+import json
+import os
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from _support import load_app_module
+
+
+class TestStdlibServer(unittest.TestCase):
+    """The stdlib backend, serving a fresh export, answers like the Flask app."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.module = load_app_module()
+        import stdlib_server
+        cls.stdlib_server = stdlib_server
+        cls.tmp = tempfile.TemporaryDirectory()
+        build_dir = os.path.join(cls.tmp.name, 'build')
+        cls.module.export_build(build_dir)
+        stdlib_server.Handler.routes, stdlib_server.Handler.sound_profiles = stdlib_server.load_build(build_dir)
+        cls.server = stdlib_server.ThreadingHTTPServer(('127.0.0.1', 0), stdlib_server.Handler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.flask = cls.module.app.test_client()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.tmp.cleanup()
+
+    def request(self, path, headers=None, method='GET', body=None):
+        conn = http.client.HTTPConnection('127.0.0.1', self.server.server_address[1], timeout=5)
+        self.addCleanup(conn.close)
+        conn.request(method, path, body=body, headers=headers or {})
+        resp = conn.getresponse()
+        return resp, resp.read()
+
+    def test_prebuilt_responses_match_flask(self):
+        for path in ['/', '/sw.js', '/favicon.png', *self.module.ASSETS]:
+            for encoding in ('identity', 'gzip', 'br'):
+                expected = self.flask.get(path, headers={'Accept-Encoding': encoding})
+                resp, body = self.request(path, {'Accept-Encoding': encoding})
+                self.assertEqual(body, expected.get_data(), (path, encoding))
+                for name in ('Content-Type', 'Content-Encoding', 'Cache-Control', 'ETag', 'Vary'):
+                    self.assertEqual(resp.getheader(name), expected.headers.get(name), (path, encoding, name))
+                expected.close()
+
+    def test_conditional_request_gets_304(self):
+        resp, body = self.request('/', {'Accept-Encoding': 'gzip'})
+        self.assertEqual(gzip.decompress(body), self.module.INDEX_PAGE.variants['identity'])
+        again, body = self.request('/', {'Accept-Encoding': 'gzip', 'If-None-Match': resp.getheader('ETag')})
+        self.assertEqual(again.status, 304)
+        self.assertEqual(body, b'')
+        # The gzip variant's tag doesn't validate the identity body
+        plain, body = self.request('/', {'Accept-Encoding': 'identity', 'If-None-Match': resp.getheader('ETag')})
+        self.assertEqual(plain.status, 200)
+        self.assertEqual(body, self.module.INDEX_PAGE.variants['identity'])
+
+    def test_keeps_connections_alive(self):
+        conn = http.client.HTTPConnection('127.0.0.1', self.server.server_address[1], timeout=5)
+        self.addCleanup(conn.close)
+        for _ in range(3):
+            conn.request('GET', '/healthz')
+            resp = conn.getresponse()
+            self.assertEqual(resp.read(), b'ok')
+        self.assertIsNotNone(conn.sock)
+
+    def test_uploaded_sounds_are_served_with_ranges(self):
+        name = 'a' * 64 + '.wav'
+        with tempfile.TemporaryDirectory() as sounds_dir, mock.patch.object(self.stdlib_server, 'SOUNDS_DIR', sounds_dir):
+            Path(sounds_dir, name).write_bytes(b'RIFF0123WAVEdata')
+            resp, body = self.request(f'/sounds/{name}', {'Range': 'bytes=0-3'})
+            self.assertEqual((resp.status, body), (206, b'RIFF'))
+            self.assertEqual(resp.getheader('Content-Range'), 'bytes 0-3/16')
+            self.assertEqual(self.request(f'/sounds/{name}', {'If-None-Match': f'"{"a" * 64}"'})[0].status, 304)
+
+    def test_clock_probe(self):
+        resp, body = self.request('/api/time')
+        self.assertEqual((resp.status, resp.getheader('Cache-Control')), (200, 'no-store'))
+        self.assertEqual(sorted(json.loads(body)), ['t1', 't2'])
+
+    def test_unknown_paths_and_uploads(self):
+        self.assertEqual(self.request('/nope')[0].status, 404)
+        self.assertEqual(self.request('/sounds/builtin/nope.wav')[0].status, 404)
+        self.assertEqual(self.request('/api/sounds', method='POST', body=b'x')[0].status, 501)
+        self.assertEqual(self.request('/api/state/' + 'k' * 22)[0].status, 501)
+
+    def test_export_is_reused_until_an_input_changes(self):
+        build_dir = os.path.join(self.tmp.name, 'build')
+        with mock.patch.object(self.stdlib_server.subprocess, 'run') as run:
+            self.stdlib_server.load_build(build_dir)
+            run.assert_not_called()
+            with mock.patch.dict(os.environ, {'TAILWIND_MODE': 'inline'}):
+                self.stdlib_server.load_build(build_dir)
+            run.assert_called_once()
+
+    def test_flask_backend_can_start_from_the_export(self):
+        routes, _ = self.stdlib_server.read_build(os.path.join(self.tmp.name, 'build'))
+        for path, built in [('/', self.module.INDEX_PAGE), ('/sw.js', self.module.SERVICE_WORKER_SCRIPT),
+                            *self.module.ASSETS.items()]:
+            loaded = self.module.PrecompressedResponse.from_export(routes[path])
+            self.assertEqual((loaded.mimetype, loaded.digest, loaded.etags, loaded.variants),
+                             (built.mimetype, built.digest, built.etags, built.variants), path)
+
+
+if __name__ == '__main__':
+    unittest.main()
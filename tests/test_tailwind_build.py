@@ -0,0 +1,45 @@
+import unittest
+
+import _support  # noqa: F401 (puts the repository root on sys.path)
+from tailwind_build import compile_rule, compile_tailwind, scan_candidates
+
+THEME = {'colors': {'brand': {'500': '#3b82f6'}}}
+
+
+class TestTailwindBuild(unittest.TestCase):
+    def test_scan_picks_up_markup_and_script_classes(self):
+        content = '<div class="flex hidden"></div><script>el.classList.add(\'bg-amber-500\');</script>'
+        self.assertTrue({'flex', 'hidden', 'bg-amber-500'} <= scan_candidates(content))
+
+    def test_purges_unused_and_unknown_utilities(self):
+        css = compile_tailwind('<p class="text-center not-a-utility bg-brand-900"></p>', THEME)
+        self.assertIn('.text-center{text-align:center}', css)
+        self.assertNotIn('not-a-utility', css)
+        # brand only defines 500, exactly like the Play CDN config
+        self.assertNotIn('bg-brand-900', css)
+
+    def test_hidden_wins_over_flex(self):
+        """The modal toggles `hidden` on an element that is also `flex`."""
+        css = compile_tailwind('<div class="hidden flex"></div>')
+        self.assertLess(css.index('.flex{'), css.index('.hidden{'))
+
+    def test_variants_and_opacity_modifiers(self):
+        self.assertEqual(compile_rule('dark:hover:bg-brand-500', THEME)[1],
+                         '.dark .dark\\:hover\\:bg-brand-500:hover{background-color:#3b82f6}')
+        self.assertEqual(compile_rule('bg-black/50', THEME)[1], '.bg-black\\/50{background-color:rgb(0 0 0 / 0.5)}')
+        self.assertIn('.group:hover .group-hover\\:-rotate-180{--tw-rotate:-180deg;',
+                      compile_rule('group-hover:-rotate-180', THEME)[1])
+
+    def test_variant_rules_follow_base_rules(self):
+        css = compile_tailwind('<div class="dark:left-7 left-1 hover:bg-white bg-white"></div>')
+        self.assertLess(css.index('.left-1{'), css.index('.hover\\:bg-white:hover'))
+        self.assertLess(css.index('.hover\\:bg-white:hover'), css.index('.dark .dark\\:left-7'))
+
+    def test_transform_origin_and_will_change(self):
+        css = compile_tailwind('<div class="will-change-transform origin-left"></div>')
+        self.assertIn('.origin-left{transform-origin:left}', css)
+        self.assertIn('.will-change-transform{will-change:transform}', css)
+
+
+if __name__ == '__main__':
+    unittest.main()
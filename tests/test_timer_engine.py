@@ -0,0 +1,235 @@
+import json
+import re
+import shutil
+import subprocess
+import unittest
+
+from _support import app_script, load_app_module
+
+NODE = shutil.which('node')
+
+MINUTE = 60 * 1000
+DAY = 24 * 60 * MINUTE
+FOCUS, BREAK = 20 * MINUTE, 20 * 1000
+
+# Reference: walk the schedule one phase at a time, like the old tick() loop
+STEPWISE_JS = """
+function stepwise(isFocus, endTimeMs, nowMs, focusMs, breakMs) {
+    let transitions = 0;
+    while (nowMs >= endTimeMs) {
+        isFocus = !isFocus;
+        endTimeMs += isFocus ? focusMs : breakMs;
+        transitions++;
+    }
+    return { isFocus, endTimeMs, transitions };
+}
+"""
+
+
+def run_engine(expression):
+    """Evaluate a JS expression against TIMER_ENGINE_JS under node and return it as JSON."""
+    script = load_app_module().TIMER_ENGINE_JS + STEPWISE_JS + f'console.log(JSON.stringify({expression}));'
+    out = subprocess.run([NODE, '-e', script], capture_output=True, text=True, check=True).stdout
+    return json.loads(out)
+
+
+# Runs the worker script in a node vm context with a simulated clock and timers,
+# sends it one 'arm' message and advances time to `until`; returns what it posted
+WORKER_HARNESS = """
+const vm = require('vm');
+let now = 0;
+const timers = new Map();
+let nextId = 1;
+const posted = [];
+const context = {
+    Date: { now: () => now },
+    setTimeout: (fn, ms) => { timers.set(nextId, { fn, at: now + ms }); return nextId++; },
+    clearTimeout: (id) => timers.delete(id),
+    postMessage: (message) => posted.push(message),
+};
+vm.createContext(context);
+vm.runInContext(SOURCE, context);
+context.onmessage({ data: ARM });
+while (timers.size) {
+    const [id, timer] = [...timers].reduce((a, b) => (b[1].at < a[1].at ? b : a));
+    if (timer.at > UNTIL) break;
+    timers.delete(id);
+    now = timer.at;
+    timer.fn();
+}
+console.log(JSON.stringify(posted));
+"""
+
+
+def run_worker(arm, until):
+    """Drive TIMER_WORKER_JS on a simulated clock; return the messages it posted."""
+    module = load_app_module()
+    script = (f'const SOURCE = {json.dumps(module.TIMER_ENGINE_JS + module.TIMER_WORKER_JS)};'
+              f'const ARM = {json.dumps(arm)}; const UNTIL = {until};' + WORKER_HARNESS)
+    out = subprocess.run([NODE, '-e', script], capture_output=True, text=True, check=True).stdout
+    return json.loads(out)
+
+
+@unittest.skipIf(NODE is None, 'node not installed')
+class TestCatchUpPhase(unittest.TestCase):
+    def test_running_phase_is_untouched(self):
+        result = run_engine(f'catchUpPhase(true, 1000, 999, {FOCUS}, {BREAK})')
+        self.assertEqual(result, {'isFocus': True, 'endTimeMs': 1000, 'transitions': 0})
+
+    def test_deadline_enters_next_phase_on_schedule(self):
+        """The break starts when focus was due to end, not when the tick noticed."""
+        result = run_engine(f'catchUpPhase(true, 0, 250, {FOCUS}, {BREAK})')
+        self.assertEqual(result, {'isFocus': False, 'endTimeMs': BREAK, 'transitions': 1})
+
+    def test_matches_stepwise_walk_after_days_asleep(self):
+        nows = [0, BREAK - 1, BREAK, FOCUS + BREAK, 3 * DAY + 12345, 30 * DAY + 7]
+        pairs = run_engine('[' + ','.join(
+            f'[catchUpPhase({focus}, 0, {now}, {FOCUS}, {BREAK}), stepwise({focus}, 0, {now}, {FOCUS}, {BREAK})]'
+            for focus in ('true', 'false') for now in nows
+        ) + ']')
+        for closed_form, reference in pairs:
+            self.assertEqual(closed_form, reference)
+
+    def test_week_long_jump_lands_in_running_phase(self):
+        result = run_engine(f'catchUpPhase(true, 0, {7 * DAY}, {FOCUS}, {BREAK})')
+        self.assertGreater(result['endTimeMs'], 7 * DAY)
+        self.assertLessEqual(result['endTimeMs'] - 7 * DAY, FOCUS)
+
+    def test_zero_length_cycle_does_not_divide_by_zero(self):
+        result = run_engine('catchUpPhase(true, 0, 5, 0, 0)')
+        self.assertEqual(result, {'isFocus': False, 'endTimeMs': 5, 'transitions': 1})
+
+
+@unittest.skipIf(NODE is None, 'node not installed')
+class TestNextWakeup(unittest.TestCase):
+    # Simulated clock: wake at each requested delay until the phase ends
+    COUNT_WAKEUPS = """((remainingMs, hidden, leadMs) => {
+        let wakeups = 0;
+        while (remainingMs > 0) { remainingMs -= nextWakeupMs(remainingMs, hidden, leadMs); wakeups++; }
+        return wakeups;
+    })"""
+
+    def test_hidden_tab_wakes_once_per_phase(self):
+        self.assertEqual(run_engine(f'{self.COUNT_WAKEUPS}({FOCUS}, true)'), 1)
+
+    def test_visible_tab_wakes_once_per_displayed_second(self):
+        self.assertEqual(run_engine(f'{self.COUNT_WAKEUPS}({FOCUS}, false)'), FOCUS // 1000)
+
+    def test_hidden_tab_with_lead_wakes_before_and_at_the_boundary(self):
+        self.assertEqual(run_engine(f'{self.COUNT_WAKEUPS}({FOCUS}, true, 3000)'), 2)
+        self.assertEqual(run_engine(f'[nextWakeupMs({FOCUS}, true, 3000), nextWakeupMs(2500, true, 3000), nextWakeupMs(2500, false, 3000)]'),
+                         [FOCUS - 3000, 2500, 500])
+
+    def test_visible_wakeups_land_on_second_boundaries(self):
+        self.assertEqual(run_engine('[nextWakeupMs(59250, false), nextWakeupMs(59000, false), nextWakeupMs(-5, true)]'),
+                         [250, 1000, 0])
+
+
+@unittest.skipIf(NODE is None, 'node not installed')
+class TestTimerWorker(unittest.TestCase):
+    ARM = {'type': 'arm', 'generation': 7, 'isFocus': True, 'endTimeMs': FOCUS,
+           'focusMs': FOCUS, 'breakMs': BREAK}
+
+    def test_hidden_worker_posts_only_phase_events_on_the_boundary(self):
+        posted = run_worker({**self.ARM, 'hidden': True}, until=2 * (FOCUS + BREAK))
+        self.assertEqual([m['type'] for m in posted], ['phase'] * 4)
+        self.assertEqual([m['dueMs'] for m in posted], [FOCUS, FOCUS + BREAK, 2 * FOCUS + BREAK, 2 * (FOCUS + BREAK)])
+        self.assertTrue(all(m['firedMs'] == m['dueMs'] and m['generation'] == 7 for m in posted))
+        self.assertEqual([m['isFocus'] for m in posted], [False, True, False, True])
+
+    def test_hidden_worker_ticks_once_at_the_chime_lead(self):
+        posted = run_worker({**self.ARM, 'hidden': True, 'leadMs': 3000}, until=FOCUS)
+        self.assertEqual([(m['type'], m.get('remainingMs')) for m in posted], [('tick', 3000), ('phase', None)])
+
+    def test_visible_worker_ticks_every_displayed_second(self):
+        posted = run_worker({**self.ARM, 'endTimeMs': 3000, 'hidden': False}, until=3000)
+        self.assertEqual([(m['type'], m.get('remainingMs')) for m in posted],
+                         [('tick', 3000), ('tick', 2000), ('tick', 1000), ('phase', None)])
+
+    def test_boundaries_follow_the_corrected_clock(self):
+        """With the server 2 s ahead of this device, the phase ends 2 s earlier by the device's clock."""
+        posted = run_worker({**self.ARM, 'hidden': True, 'clockOffsetMs': 2000}, until=FOCUS)
+        self.assertEqual([(m['type'], m['dueMs'], m['firedMs']) for m in posted], [('phase', FOCUS, FOCUS)])
+
+    def test_arm_catches_up_immediately(self):
+        posted = run_worker({**self.ARM, 'endTimeMs': -7 * DAY, 'hidden': True}, until=0)
+        self.assertEqual(len(posted), 1)
+        self.assertEqual(posted[0]['dueMs'], -7 * DAY)
+        self.assertGreater(posted[0]['endTimeMs'], 0)
+
+
+@unittest.skipIf(NODE is None, 'node not installed')
+class TestEstimateClockOffset(unittest.TestCase):
+    def test_symmetric_round_trip_gives_the_exact_offset(self):
+        # Server 5 s ahead; 40 ms each way, 1 ms in the server
+        result = run_engine('estimateClockOffset([{ t0: 1000, t1: 6040, t2: 6041, t3: 1081 }])')
+        self.assertEqual(result, {'offsetMs': 5000, 'delayMs': 80})
+
+    def test_shortest_round_trip_wins(self):
+        result = run_engine('estimateClockOffset(['
+                            '{ t0: 0, t1: 5300, t2: 5300, t3: 400 },'  # queued on the way out
+                            '{ t0: 1000, t1: 6010, t2: 6010, t3: 1020 },'
+                            '{ t0: 2000, t1: 7050, t2: 7050, t3: 2300 }])')  # queued on the way back
+        self.assertEqual(result, {'offsetMs': 5000, 'delayMs': 20})
+        self.assertIsNone(run_engine('estimateClockOffset([])'))
+
+
+class TestPageUsesEngine(unittest.TestCase):
+    def test_engine_is_inlined_and_tick_no_longer_loops(self):
+        module = load_app_module()
+        self.assertIn('function catchUpPhase(', app_script())
+        self.assertNotIn('appState.finished', module.HTML_TEMPLATE)
+
+    @unittest.skipIf(NODE is None, 'node not installed')
+    def test_page_script_parses(self):
+        subprocess.run([NODE, '--check', '-'], input=app_script(), capture_output=True, text=True, check=True)
+
+    def test_render_does_not_query_the_dom_per_tick(self):
+        """Nodes are looked up once into `els`; updateUI() only diffs and writes."""
+        template = load_app_module().HTML_TEMPLATE
+        update_ui = template[template.index('const updateUI = () => {'):template.index('const enterPhase')]
+        self.assertNotIn('querySelector', update_ui)
+        self.assertNotIn('document.title =', update_ui)
+
+    def test_progress_bar_is_composited_without_a_frame_loop(self):
+        template = load_app_module().HTML_TEMPLATE
+        self.assertNotIn('requestAnimationFrame', template)
+        self.assertNotIn("style, 'width'", template)
+        bar = re.search(r'<div id="progress-bar" class="([^"]*)"', template).group(1).split()
+        self.assertIn('origin-left', bar)
+        self.assertNotIn('transition-all', bar)
+
+    def test_timer_is_armed_per_wakeup_not_polled(self):
+        template = load_app_module().HTML_TEMPLATE
+        self.assertNotIn('setInterval', template)
+        self.assertIn('nextWakeupMs(appState.endTimeMs - clockNow(), document.hidden, CHIME_LEAD_MS)', template)
+        self.assertIn('leadMs: CHIME_LEAD_MS', template)
+
+    def test_startup_only_does_first_paint_work(self):
+        template = load_app_module().HTML_TEMPLATE
+        constructor = template[template.index('            constructor() {'):template.index('            context() {')]
+        self.assertNotIn('new Context', constructor)
+        self.assertIn('whenIdle(startTimerWorker);', template)
+        # Settings reach the DOM in one write-only pass
+        load = template[template.index('const loadSettings = () => {'):template.index('// Helpers')]
+        self.assertNotIn('classList.add', load)
+        self.assertNotIn('getElementById', load)
+
+    def test_worker_script_is_a_hashed_asset(self):
+        module = load_app_module()
+        url = next(u for u in module.ASSETS if u.startswith('/assets/timer-worker.'))
+        self.assertIn(f"new Worker('{url}')", app_script())
+        resp = module.app.test_client().get(url)
+        self.assertEqual(resp.mimetype, 'text/javascript')
+        self.assertIn(b'function catchUpPhase(', resp.data)
+
+    def test_failed_worker_falls_back_to_the_main_thread(self):
+        template = load_app_module().HTML_TEMPLATE
+        start = template[template.index('const startTimerWorker = () => {'):template.index('let engineGeneration')]
+        handler = start[start.index('timerWorker.onerror = '):start.index('} catch (err) {')]
+        for step in ('worker.terminate();', 'timerWorker = null;', 'syncEngine();'):
+            self.assertIn(step, handler)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import io
+import json
+import shutil
+import subprocess
+import tempfile
+import unittest
+import wave
+from unittest import mock
+
+from _support import load_app_module
+
+NODE = shutil.which('node')
+
+
+def make_wav(frames=800):
+    buf = io.BytesIO()
+    with wave.open(buf, 'wb') as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(8000)
+        w.writeframes(bytes(range(256)) * (frames * 2 // 256))
+    return buf.getvalue()
+
+
+class TestSoundUpload(unittest.TestCase):
+    def setUp(self):
+        self.module = load_app_module()
+        self.client = self.module.app.test_client()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        patcher = mock.patch.object(self.module, 'SOUNDS_DIR', tmp.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.wav = make_wav()
+
+    def upload(self, data, filename='ding.wav'):
+        return self.client.post('/api/sounds', data={'file': (io.BytesIO(data), filename)},
+                                content_type='multipart/form-data')
+
+    def test_upload_is_content_addressed_and_deduplicated(self):
+        first = self.upload(self.wav)
+        self.assertEqual(first.status_code, 201)
+        body = first.get_json()
+        self.assertRegex(body['id'], r'^[0-9a-f]{64}\.wav$')
+        self.assertEqual(body['type'], 'audio/wav')
+        again = self.upload(self.wav, filename='renamed.wav')
+        self.assertEqual(again.status_code, 200)
+        self.assertEqual(again.get_json()['id'], body['id'])
+
+    def test_rejects_non_audio_and_oversized_files(self):
+        self.assertEqual(self.upload(b'<html>not a sound</html>').status_code, 415)
+        with mock.patch.object(self.module, 'MAX_SOUND_BYTES', len(self.wav) - 1):
+            self.assertEqual(self.upload(self.wav).status_code, 413)
+        self.assertEqual(self.client.post('/api/sounds').status_code, 400)
+
+    def test_sound_supports_range_and_strong_etag(self):
+        url = self.upload(self.wav).get_json()['url']
+        full = self.client.get(url)
+        self.assertEqual(full.status_code, 200)
+        self.assertEqual(full.data, self.wav)
+        self.assertEqual(full.headers['Accept-Ranges'], 'bytes')
+        self.assertEqual(full.headers['Cache-Control'], self.module.ASSET_CACHE_CONTROL)
+        etag = full.headers['ETag']
+        self.assertFalse(etag.startswith('W/'))
+
+        part = self.client.get(url, headers={'Range': 'bytes=0-11'})
+        self.assertEqual(part.status_code, 206)
+        self.assertEqual(part.data, self.wav[:12])
+        self.assertEqual(self.client.get(url, headers={'If-None-Match': etag}).status_code, 304)
+        full.close()
+        part.close()
+
+    def test_unknown_or_malformed_names_are_404(self):
+        self.assertEqual(self.client.get('/sounds/' + '0' * 64 + '.wav').status_code, 404)
+        self.assertEqual(self.client.get('/sounds/..%2Feye-timer.py').status_code, 404)
+
+
+@unittest.skipIf(NODE is None, 'node not installed')
+class TestBufferCache(unittest.TestCase):
+    def run_cache(self, steps):
+        script = load_app_module().SOUND_CACHE_JS + steps + 'console.log(JSON.stringify([...cache.entries.keys()]));'
+        return json.loads(subprocess.run([NODE, '-e', script], capture_output=True, text=True, check=True).stdout)
+
+    def test_evicts_least_recently_used_by_bytes(self):
+        keys = self.run_cache("""
+            const cache = new BufferCache(100);
+            cache.set('a', 1, 40); cache.set('b', 2, 40);
+            cache.get('a');            // b is now the least recently used
+            cache.set('c', 3, 40);     // 120 bytes: evict b
+        """)
+        self.assertEqual(keys, ['a', 'c'])
+
+    def test_oversized_entry_is_kept_alone(self):
+        keys = self.run_cache("""
+            const cache = new BufferCache(100);
+            cache.set('a', 1, 40); cache.set('huge', 2, 500);
+        """)
+        self.assertEqual(keys, ['huge'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,150 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from _support import ROOT, load_app_module
+from webhooks import WebhookDispatcher, phase_event
+
+
+class Receiver(BaseHTTPRequestHandler):
+    """Records each POST as (client port, events); answers with the next scripted status, then 200."""
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        with self.server.lock:
+            self.server.posts.append((self.client_address[1], body['events']))
+            status = self.server.statuses.pop(0) if self.server.statuses else 200
+        self.send_response(status)
+        self.send_header('Content-Length', '2')
+        if status == 429:
+            self.send_header('Retry-After', '0')
+        self.end_headers()
+        self.wfile.write(b'{}')
+
+
+class TestWebhookDispatcher(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Receiver)
+        self.server.posts, self.server.statuses, self.server.lock = [], [], threading.Lock()
+        threading.Thread(target=self.server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dead_letter = os.path.join(tmp.name, 'dead.jsonl')
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}/hook'
+
+    def dispatcher(self, urls=None, **options):
+        dispatcher = WebhookDispatcher(urls or [self.url], self.dead_letter, backoff=0.01, **options)
+        dispatcher.start()
+        return dispatcher
+
+    def dead_letters(self):
+        with open(self.dead_letter) as f:
+            return [json.loads(line) for line in f]
+
+    def test_batches_share_one_keep_alive_connection(self):
+        dispatcher = self.dispatcher(batch_size=20, connections=1, linger=0.02)
+        for i in range(50):
+            dispatcher.enqueue({'n': i})
+        dispatcher.close(timeout=5)
+        self.assertEqual([len(events) for _, events in self.server.posts], [20, 20, 10])
+        self.assertEqual([e['n'] for _, events in self.server.posts for e in events], list(range(50)))
+        self.assertEqual(len({port for port, _ in self.server.posts}), 1)
+        self.assertEqual(dispatcher.pools[self.url][0].opened, 1)
+
+    def test_retries_server_errors_then_delivers(self):
+        self.server.statuses += [503, 429, 500]
+        dispatcher = self.dispatcher(connections=1)
+        dispatcher.enqueue({'n': 1})
+        dispatcher.close(timeout=5)
+        self.assertEqual(len(self.server.posts), 4)
+        self.assertEqual(dispatcher.stats, {'delivered': 1, 'requests': 4, 'retries': 3, 'dead': 0})
+        self.assertFalse(os.path.exists(self.dead_letter))
+
+    def test_failed_batches_are_dead_lettered(self):
+        self.server.statuses += [400] + [503] * 3
+        dispatcher = self.dispatcher(connections=1, max_attempts=3)
+        dispatcher.enqueue({'n': 1})  # 400: not retried
+        dispatcher.close(timeout=5)
+        dispatcher = self.dispatcher(connections=1, max_attempts=3)
+        dispatcher.enqueue({'n': 2})  # 503 three times: gives up
+        dispatcher.close(timeout=5)
+        records = self.dead_letters()
+        self.assertEqual([(r['attempts'], r['error'], r['events']) for r in records],
+                         [(1, 'HTTP 400', [{'n': 1}]), (3, 'HTTP 503', [{'n': 2}])])
+        self.assertEqual(records[0]['url'], self.url)
+
+    def test_unreachable_destination_does_not_hold_up_others(self):
+        down = 'http://127.0.0.1:9/hook'  # discard port: connection refused
+        dispatcher = self.dispatcher(urls=[down, self.url], connections=1, max_attempts=2)
+        for i in range(3):
+            dispatcher.enqueue({'n': i})
+        dispatcher.close(timeout=5)
+        self.assertEqual(sorted(e['n'] for _, events in self.server.posts for e in events), [0, 1, 2])
+        lost = [r for r in self.dead_letters() if r['url'] == down]
+        self.assertEqual(sorted(e['n'] for r in lost for e in r['events']), [0, 1, 2])
+        self.assertTrue(all(r['attempts'] == 2 and 'ConnectionRefusedError' in r['error'] for r in lost))
+
+    def test_full_queue_overflows_to_the_dead_letter_file(self):
+        dispatcher = self.dispatcher(connections=1, queue_size=2)
+        # One burst, accepted before the sender gets to run
+        dispatcher.loop.call_soon_threadsafe(lambda: [dispatcher.accept({'n': i}) for i in range(3)])
+        dispatcher.close(timeout=5)
+        self.assertEqual([e['n'] for _, events in self.server.posts for e in events], [0, 1])
+        self.assertEqual([(r['error'], r['events']) for r in self.dead_letters()], [('queue full', [{'n': 2}])])
+
+    def test_close_dead_letters_what_it_could_not_deliver(self):
+        # Accepts connections but never answers
+        silent = socket.socket()
+        silent.bind(('127.0.0.1', 0))
+        silent.listen()
+        self.addCleanup(silent.close)
+        dispatcher = self.dispatcher(urls=[f'http://127.0.0.1:{silent.getsockname()[1]}/hook'],
+                                     batch_size=2, connections=1, linger=0)
+        for i in range(5):
+            dispatcher.enqueue({'n': i})
+        dispatcher.close(timeout=0.2)
+        dispatcher.enqueue({'n': 5})  # too late to send
+        dispatcher.close()  # a second close is a no-op
+        records = self.dead_letters()
+        self.assertEqual(sorted(e['n'] for r in records for e in r['events']), list(range(6)))
+        self.assertEqual({r['error'] for r in records}, {'shut down'})
+        self.assertEqual(dispatcher.stats['dead'], 6)
+
+    def test_phase_event_hides_the_sync_key(self):
+        event = phase_event('AbCdEfGhIjKlMnOpQrStUv', False, 1000.4, 1000.6)
+        self.assertEqual(event['phase'], 'break')
+        self.assertEqual((event['dueMs'], event['firedMs']), (1000, 1001))
+        self.assertNotIn('AbCdEfGhIjKlMnOpQrStUv', json.dumps(event))
+        self.assertEqual(len(event['user']), 64)
+
+    def test_scheduler_phase_changes_are_queued(self):
+        module = load_app_module()
+        with mock.patch.object(module, 'WEBHOOKS') as webhooks:
+            module.on_phase_change('AbCdEfGhIjKlMnOpQrStUv', False, 1000, 1002)
+        webhooks.enqueue.assert_called_once_with(phase_event('AbCdEfGhIjKlMnOpQrStUv', False, 1000, 1002))
+
+    def test_webhooks_are_only_imported_when_configured(self):
+        script = ('import sys; sys.path.insert(0, "tests"); from _support import load_app_module; '
+                  'm = load_app_module(); print(m.WEBHOOK_URLS, "webhooks" in sys.modules)')
+        for value, expected in (('', '[] False'),
+                                ('http://a/1, http://b/2\nhttp://c/3', "['http://a/1', 'http://b/2', 'http://c/3'] True")):
+            env = {**os.environ, 'WEBHOOK_URLS': value, 'PHASE_SCHEDULER': 'false'}
+            out = subprocess.run([sys.executable, '-c', script], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+            self.assertEqual(out.stdout.strip().splitlines()[-1], expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
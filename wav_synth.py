@@ -0,0 +1,78 @@
+"""Render SOUND_PROFILES note tables to WAV, matching the page's Web Audio graph.
+
+Each note is a Web Audio oscillator (sine/square/triangle, phase 0 at its start)
+through the same envelope the page uses: a 50 ms linear attack to full level,
+then an exponential ramp down to 1% at the note's end, where it stops. Notes
+are summed, scaled by the volume and clipped like the audio output would be.
+Everything is whole-array numpy math; the only Python loop is over notes.
+
+Needs numpy (the project's `wav` extra).
+"""
+import hashlib
+import io
+import json
+import os
+import wave
+
+import numpy as np
+
+from server_common import write_atomically
+
+SAMPLE_RATE = 22050  # the tones top out below 1 kHz; half of CD rate keeps files small
+ATTACK = 0.05
+FLOOR = 0.01
+
+
+def oscillator(shape, freq, t):
+    """One oscillator's samples at times `t` (seconds since it started)."""
+    cycles = freq * t
+    if shape == 'sine':
+        return np.sin(2 * np.pi * cycles)
+    if shape == 'square':
+        return np.where(cycles % 1 < 0.5, 1.0, -1.0)
+    if shape == 'triangle':
+        # Starts at 0 rising, like Web Audio's triangle
+        return 1 - 4 * np.abs((cycles + 0.25) % 1 - 0.5)
+    raise ValueError(f'unknown oscillator type {shape!r}')
+
+
+def envelope(t, duration):
+    """Linear attack to 1 over ATTACK, then exponential decay reaching FLOOR at `duration`."""
+    decay = FLOOR ** ((t - ATTACK) / max(duration - ATTACK, 1e-9))
+    return np.where(t < ATTACK, t / ATTACK, decay)
+
+
+def render_notes(notes, volume=1.0, sample_rate=SAMPLE_RATE):
+    """Mix (freq, shape, start, duration) notes into float samples in [-1, 1]."""
+    length = max(start + duration for _, _, start, duration in notes)
+    out = np.zeros(int(np.ceil(length * sample_rate)))
+    for freq, shape, start, duration in notes:
+        first = int(round(start * sample_rate))
+        count = min(int(round(duration * sample_rate)), len(out) - first)
+        t = np.arange(count) / sample_rate
+        out[first:first + count] += oscillator(shape, freq, t) * envelope(t, duration)
+    return np.clip(out * volume, -1.0, 1.0)
+
+
+def to_wav(samples, sample_rate=SAMPLE_RATE):
+    """Encode float samples as a mono 16-bit PCM WAV file."""
+    buf = io.BytesIO()
+    with wave.open(buf, 'wb') as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(sample_rate)
+        w.writeframes(np.round(samples * 32767).astype('<i2').tobytes())
+    return buf.getvalue()
+
+
+def render_cached(cache_dir, profile, variant, volume, notes):
+    """Render `notes` at `volume` (0-100) into `cache_dir` once; return (file name, content key).
+
+    The key covers the notes too, so editing a profile never serves a stale file.
+    """
+    key = hashlib.sha256(json.dumps([notes, volume, SAMPLE_RATE]).encode()).hexdigest()[:16]
+    name = f'{profile}-{variant}-{volume}-{key}.wav'
+    path = os.path.join(cache_dir, name)
+    if not os.path.exists(path):
+        write_atomically(path, to_wav(render_notes(notes, volume / 100)))
+    return name, key
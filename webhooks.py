@@ -0,0 +1,268 @@
+"""Outbound webhooks: phase changes POSTed to configured URLs.
+
+The phase scheduler hands events to `WebhookDispatcher.enqueue()` from its own
+thread. Delivery runs on an asyncio loop in a separate thread, so a slow or
+unreachable receiver never holds up the scheduler.
+- Each destination URL has a bounded queue (`queue_size` events). When it is
+  full, new events for that URL go straight to the dead-letter file.
+- Each destination also has `connections` sender tasks. Every sender owns one
+  keep-alive HTTP/1.1 connection, opened on first use and again after the
+  receiver closes it. That is the destination's connection pool, built on
+  asyncio streams with no client library.
+- A sender takes up to `batch_size` queued events at once and POSTs them as
+  one JSON body, `{"events": [...]}`. With fewer waiting, it lingers
+  `linger` seconds first so a burst (many users whose break starts on the
+  same minute) fills the batch.
+- 5xx, 408 and 429 responses and network errors are retried with exponential
+  backoff and full jitter, up to `max_attempts`. A Retry-After in seconds
+  replaces the computed delay. Other 4xx responses are not retried. A batch
+  that fails for good is appended to the dead-letter file (JSON lines) with
+  its last error.
+
+`close()` delivers what is queued, waiting up to its timeout. Then whatever is
+still queued or in flight is dead-lettered, and so is anything enqueued after
+close() began. So no event is silently dropped at shutdown.
+
+Delivery is at least once. A batch can arrive twice when a connection breaks
+after the receiver has taken it, so receivers should dedupe on (user, dueMs).
+"""
+import asyncio
+import hashlib
+import json
+import os
+import random
+import ssl
+import threading
+import time
+from urllib.parse import urlsplit
+
+USER_AGENT = 'eye-timer-webhooks'
+
+
+def phase_event(key, is_focus, due_ms, fired_ms):
+    """The payload for a phase change of sync key `key`.
+
+    The key is a credential for the user's timer, so receivers get its SHA-256
+    (`user`) instead. A user can compute that from their own sync link.
+    """
+    return {
+        'event': 'phase',
+        'phase': 'focus' if is_focus else 'break',
+        'user': hashlib.sha256(key.encode()).hexdigest(),
+        'dueMs': round(due_ms),
+        'firedMs': round(fired_ms),
+    }
+
+
+class Connection:
+    """One keep-alive HTTP/1.1 connection to a webhook URL, reopened as needed."""
+
+    def __init__(self, url, timeout):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == 'https' else 80)
+        self.ssl = ssl.create_default_context() if parts.scheme == 'https' else None
+        self.host_header = parts.netloc
+        self.target = (parts.path or '/') + (f'?{parts.query}' if parts.query else '')
+        self.timeout = timeout
+        self.reader = self.writer = None
+        self.opened = 0
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+    async def post(self, body):
+        """(status, headers) for POSTing `body`.
+
+        The receiver may have closed an idle connection just as it was reused.
+        Then the request is sent once more on a fresh connection.
+        """
+        reused = self.writer is not None
+        try:
+            return await asyncio.wait_for(self.exchange(body), self.timeout)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            self.close()
+            if not reused:
+                raise
+        return await asyncio.wait_for(self.exchange(body), self.timeout)
+
+    async def exchange(self, body):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port, ssl=self.ssl)
+            self.opened += 1
+        head = (f'POST {self.target} HTTP/1.1\r\nHost: {self.host_header}\r\nUser-Agent: {USER_AGENT}\r\n'
+                f'Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n')
+        self.writer.write(head.encode() + body)
+        await self.writer.drain()
+
+        status_line = await self.reader.readuntil(b'\r\n')
+        status = int(status_line.split()[1])
+        headers = {}
+        while (line := await self.reader.readuntil(b'\r\n')) != b'\r\n':
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        # Read the body off the connection (its content doesn't matter) so it can be reused
+        if status in (204, 304) or status < 200:
+            pass
+        elif headers.get('transfer-encoding', '').lower() == 'chunked':
+            while size := int((await self.reader.readuntil(b'\r\n')).split(b';')[0], 16):
+                await self.reader.readexactly(size + 2)
+            while await self.reader.readuntil(b'\r\n') != b'\r\n':
+                pass
+        elif 'content-length' in headers:
+            await self.reader.readexactly(int(headers['content-length']))
+        else:
+            await self.reader.read()
+            headers['connection'] = 'close'
+        if headers.get('connection', '').lower() == 'close' or status_line.startswith(b'HTTP/1.0'):
+            self.close()
+        return status, headers
+
+
+class WebhookDispatcher:
+    """Delivers events to every URL in `urls` from a background thread; see the module docstring."""
+
+    def __init__(self, urls, dead_letter_path, queue_size=10000, batch_size=100, linger=0.05, connections=4,
+                 max_attempts=6, backoff=0.5, max_backoff=60, timeout=10):
+        self.urls = list(urls)
+        self.dead_letter_path = dead_letter_path
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.linger = linger
+        self.connections = connections
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.loop = None
+        self.thread = None
+        self.queues = {}
+        self.pools = {}
+        self.tasks = []
+        self.stats = {'delivered': 0, 'requests': 0, 'retries': 0, 'dead': 0}
+        # Orders enqueue() against close(): every event handed to the loop is
+        # accepted before the shutdown starts, later ones are dead-lettered
+        self.lock = threading.Lock()
+        self.closing = False
+
+    def start(self):
+        ready = threading.Event()
+
+        def run():
+            self.loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self.loop)
+            for url in self.urls:
+                self.queues[url] = asyncio.Queue(self.queue_size)
+                self.pools[url] = [Connection(url, self.timeout) for _ in range(self.connections)]
+                self.tasks += [self.loop.create_task(self.send_batches(url, conn)) for conn in self.pools[url]]
+            ready.set()
+            self.loop.run_forever()
+
+        self.thread = threading.Thread(target=run, name='webhooks', daemon=True)
+        self.thread.start()
+        ready.wait()
+
+    def enqueue(self, event):
+        """Queue `event` (a JSON-serializable dict) for every URL; safe to call from any thread."""
+        with self.lock:
+            if not self.closing:
+                self.loop.call_soon_threadsafe(self.accept, event)
+                return
+        for url in self.urls:
+            self.dead_letter(url, [event], 0, 'shut down')
+
+    def accept(self, event):
+        for url, queue in self.queues.items():
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                self.dead_letter(url, [event], 0, 'queue full')
+
+    async def send_batches(self, url, connection):
+        queue = self.queues[url]
+        while True:
+            batch = [await queue.get()]
+            try:
+                if self.linger and queue.qsize() < self.batch_size - 1:
+                    await asyncio.sleep(self.linger)
+                while len(batch) < self.batch_size and not queue.empty():
+                    batch.append(queue.get_nowait())
+                await self.deliver(url, connection, batch)
+            except asyncio.CancelledError:
+                # close() ran out of time; the receiver may or may not have this batch
+                self.dead_letter(url, batch, 0, 'shut down')
+                raise
+            finally:
+                for _ in batch:
+                    queue.task_done()
+
+    async def deliver(self, url, connection, events):
+        body = json.dumps({'events': events}, separators=(',', ':')).encode()
+        for attempt in range(1, self.max_attempts + 1):
+            retry_after = None
+            try:
+                status, headers = await connection.post(body)
+            except (OSError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, TimeoutError, ValueError) as err:
+                connection.close()
+                error, retry = f'{type(err).__name__}: {err}', True
+            else:
+                self.stats['requests'] += 1
+                if 200 <= status < 300:
+                    self.stats['delivered'] += len(events)
+                    return
+                error, retry = f'HTTP {status}', status >= 500 or status in (408, 429)
+                if headers.get('retry-after', '').isdigit():
+                    retry_after = int(headers['retry-after'])
+            if not retry or attempt == self.max_attempts:
+                break
+            self.stats['retries'] += 1
+            if retry_after is None:
+                # Full jitter: receivers recovering from an outage aren't hit by every sender at once
+                delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** (attempt - 1)))
+            else:
+                delay = min(retry_after, self.max_backoff)
+            await asyncio.sleep(delay)
+        self.dead_letter(url, events, attempt, error)
+
+    def dead_letter(self, url, events, attempts, error):
+        """Append a batch that could not be delivered, as one JSON line."""
+        self.stats['dead'] += len(events)
+        os.makedirs(os.path.dirname(os.path.abspath(self.dead_letter_path)), exist_ok=True)
+        record = {'url': url, 'failedAt': round(time.time() * 1000), 'attempts': attempts, 'error': error,
+                  'events': events}
+        with open(self.dead_letter_path, 'a') as f:
+            f.write(json.dumps(record, separators=(',', ':')) + '\n')
+
+    def close(self, timeout=None):
+        """Deliver everything queued within `timeout` seconds, dead-letter the rest, then stop the thread.
+
+        Safe to call more than once.
+        """
+        async def shutdown():
+            try:
+                await asyncio.wait_for(asyncio.gather(*(queue.join() for queue in self.queues.values())), timeout)
+            except TimeoutError:
+                pass
+            for task in self.tasks:
+                task.cancel()
+            await asyncio.gather(*self.tasks, return_exceptions=True)
+            for url, queue in self.queues.items():
+                left = [queue.get_nowait() for _ in range(queue.qsize())]
+                if left:
+                    self.dead_letter(url, left, 0, 'shut down')
+            for pool in self.pools.values():
+                for conn in pool:
+                    conn.close()
+
+        with self.lock:
+            if self.closing or self.thread is None:
+                return
+            self.closing = True
+        try:
+            asyncio.run_coroutine_threadsafe(shutdown(), self.loop).result()
+        finally:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join()
+            self.loop.close()